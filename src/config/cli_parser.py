@@ -3,7 +3,35 @@ Validación y parsing de argumentos de línea de comandos.
 """
 
 import argparse
-from src.config.settings import DEFAULT_CONFIG, DEFAULT_MODBUS_CONFIG
+from src.config.settings import (
+    CATCH_UP_POLICIES,
+    STAGGER_POLICIES,
+    DEFAULT_CONFIG,
+    DEFAULT_MODBUS_CONFIG,
+    DEFAULT_TEMPLATES,
+    MAX_DEVICES,
+    MAX_UNIT_ID,
+    MIN_UPDATE_INTERVAL,
+)
+
+
+def parse_interval(value: str) -> float:
+    """
+    Convierte un intervalo en segundos: ``60``, ``0.5``, ``0.5s`` o ``10ms``.
+
+    Raises:
+        argparse.ArgumentTypeError: Si el valor no es un intervalo válido
+    """
+    text = value.strip().lower()
+    scale = 1.0
+    if text.endswith("ms"):
+        text, scale = text[:-2], 0.001
+    elif text.endswith("s"):
+        text = text[:-1]
+    try:
+        return float(text) * scale
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"intervalo inválido: {value}") from None
 
 
 def create_argument_parser():
@@ -19,8 +47,38 @@ Opciones generales:
   -v, --verbose                 Muestra información detallada de los registros en la terminal
   -P, --protocol {tcp,rtu}      Protocolo Modbus
   -h, --help                    Muestra este mensaje de ayuda y termina
-  -t, --update-interval         Intervalo de actualización en segundos (por defecto: 60)
-  -d, --devices {1,2}           Number of devices to simulate (1 or 2)
+  -t, --update-interval         Intervalo de actualización en segundos (por defecto: 60); admite
+                                fracciones y milisegundos (ej: 0.5, 10ms; mínimo 1ms)
+  -d, --devices N               Número de dispositivos a simular (1-5000, por defecto: 1)
+  -T, --templates               Plantillas de registros separadas por coma, asignadas en ciclo
+                                (por defecto: register_table_PM21XX.json,register_table_generic.json)
+  --catch-up {skip,coalesce,burst}
+                                Ciclos perdidos por atraso: descartarlos conservando la grilla,
+                                reiniciar la grilla o recuperarlos uno a uno (por defecto: skip)
+  --align-ticks                 Alinea los ciclos a múltiplos de su período en la hora de pared
+  --stagger {none,even,hash}    Reparte los ciclos de los dispositivos dentro del intervalo:
+                                uniforme por posición (even, por defecto), por hash del unit ID
+                                (hash) o todos juntos (none)
+  --lazy                        Genera valores solo al ser leídos por un cliente Modbus
+  --lazy-ttl                    Antigüedad máxima (s) de un valor en modo --lazy (por defecto: intervalo)
+  -w, --workers N               Reparte la generación en N procesos con memoria compartida
+                                (por defecto: 0, genera en el loop del servidor)
+  --fast-read                   Responde las lecturas de registros (funciones 3 y 4) copiando
+                                los bytes ya codificados de la imagen de registros
+  --response-cache N            Guarda hasta N respuestas de lectura codificadas por servidor,
+                                válidas hasta la siguiente actualización (implica --fast-read)
+  --metrics-port N              Expone las métricas de peticiones Modbus en formato Prometheus
+                                en http://<host>:N/metrics
+  --history N                   Guarda en memoria las últimas N generaciones de cada dispositivo
+                                para /api/history (por defecto: 0, sin historial)
+  --history-resolution S        Segundos mínimos entre dos filas del historial (por defecto: 1)
+  --store DIR                   Guarda los valores generados en DIR (un directorio por dispositivo)
+                                con agregados por minuto y por hora, para /api/store
+  --store-retention H           Horas conservadas sin agregar (por defecto: 24; los agregados
+                                por minuto se conservan 30 días y los por hora, 1 año)
+  --store-resolution S          Segundos mínimos entre dos filas guardadas (por defecto: 1)
+  --profile ARCHIVO             Perfila la ejecución (servidores y generación) con cProfile y
+                                guarda el resultado al detener (ver con: python -m pstats ARCHIVO)
 
 Opciones TCP:
   -H, --host                    Dirección IP del servidor Modbus TCP (por defecto: 0.0.0.0)
@@ -48,7 +106,7 @@ Opciones RTU:
     parser.add_argument(
         "-t",
         "--update-interval",
-        type=int,
+        type=parse_interval,
         default=DEFAULT_CONFIG.update_interval,
         help=argparse.SUPPRESS,
     )
@@ -56,9 +114,81 @@ Opciones RTU:
         "-d",
         "--devices",
         type=int,
-        choices=[1, 2],
         default=DEFAULT_CONFIG.devices,
-        help="Number of devices to simulate (1 or 2)",
+        help=f"Número de dispositivos a simular (1-{MAX_DEVICES})",
+    )
+    parser.add_argument(
+        "-T",
+        "--templates",
+        type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+        default=list(DEFAULT_TEMPLATES),
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--catch-up",
+        choices=CATCH_UP_POLICIES,
+        default=DEFAULT_CONFIG.catch_up,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--align-ticks",
+        action="store_true",
+        default=DEFAULT_CONFIG.align_ticks,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--stagger",
+        choices=STAGGER_POLICIES,
+        default=DEFAULT_CONFIG.stagger,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--lazy", action="store_true", default=DEFAULT_CONFIG.lazy, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--lazy-ttl", type=float, default=DEFAULT_CONFIG.lazy_ttl, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=DEFAULT_CONFIG.workers, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--fast-read", action="store_true", default=DEFAULT_CONFIG.fast_read, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--response-cache",
+        type=int,
+        default=DEFAULT_CONFIG.response_cache,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=DEFAULT_CONFIG.metrics_port, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--history", type=int, default=DEFAULT_CONFIG.history, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--history-resolution",
+        type=float,
+        default=DEFAULT_CONFIG.history_resolution,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--store", type=str, default=DEFAULT_CONFIG.store, help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--store-retention",
+        type=float,
+        default=DEFAULT_CONFIG.store_retention,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--store-resolution",
+        type=float,
+        default=DEFAULT_CONFIG.store_resolution,
+        help=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--profile", type=str, default=DEFAULT_CONFIG.profile, help=argparse.SUPPRESS
     )
     parser.add_argument("-h", "--help", action="help", help=argparse.SUPPRESS)
 
@@ -90,6 +220,57 @@ def validate_arguments(args):
     if args.protocol == "rtu" and not args.port_serial:
         raise ValueError("Para Modbus RTU se requiere especificar --port-serial")
 
+    if args.update_interval < MIN_UPDATE_INTERVAL:
+        raise ValueError(f"--update-interval debe ser al menos {MIN_UPDATE_INTERVAL * 1000:g} ms")
+
+    if not 1 <= args.devices <= MAX_DEVICES:
+        raise ValueError(f"--devices debe estar entre 1 y {MAX_DEVICES}")
+
+    if args.protocol == "rtu" and args.slave_id + args.devices - 1 > MAX_UNIT_ID:
+        raise ValueError(
+            f"Modbus RTU admite hasta el slave ID {MAX_UNIT_ID} en un mismo puerto serial"
+        )
+
+    if not args.templates:
+        raise ValueError("--templates requiere al menos una plantilla")
+
+    if args.lazy_ttl is not None and args.lazy_ttl < 0:
+        raise ValueError("--lazy-ttl debe ser mayor o igual a 0")
+
+    if args.workers < 0:
+        raise ValueError("--workers debe ser mayor o igual a 0")
+
+    if args.response_cache < 0:
+        raise ValueError("--response-cache debe ser mayor o igual a 0")
+
+    if args.metrics_port is not None and not 1 <= args.metrics_port <= 65535:
+        raise ValueError("--metrics-port debe estar entre 1 y 65535")
+
+    if args.history < 0:
+        raise ValueError("--history debe ser mayor o igual a 0")
+
+    if args.history_resolution < 0:
+        raise ValueError("--history-resolution debe ser mayor o igual a 0")
+
+    if args.workers and args.history:
+        raise ValueError(
+            "--history no es compatible con --workers (la generación ocurre en otros procesos)"
+        )
+
+    if args.store_retention <= 0:
+        raise ValueError("--store-retention debe ser mayor que 0")
+
+    if args.store_resolution <= 0:
+        raise ValueError("--store-resolution debe ser mayor que 0")
+
+    if args.workers and args.store:
+        raise ValueError(
+            "--store no es compatible con --workers (la generación ocurre en otros procesos)"
+        )
+
+    if args.workers and args.lazy:
+        raise ValueError("--workers no es compatible con --lazy (la generación ocurre al leer)")
+
     return args
 
 
@@ -0,0 +1,86 @@
+"""
+Logging del simulador fuera del camino de generación.
+
+Los mensajes de los loggers ``vpm.*`` se encolan (``QueueHandler``) y un
+thread en segundo plano (``QueueListener``) los formatea y escribe en la
+terminal, de modo que la generación y el servidor Modbus nunca esperan por la
+E/S de la consola. El formateo también ocurre en ese thread: un mensaje puede
+ser cualquier objeto cuyo ``__str__`` sea costoso (ej: el volcado de registros
+de un dispositivo), que solo se evalúa al escribirse.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Logger raíz del simulador
+LOGGER_NAME = "vpm"
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Devuelve el logger de un módulo del simulador.
+
+    Args:
+        name: Nombre del módulo (ej: "generation")
+
+    Returns:
+        Logger hijo de ``vpm``
+    """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler que deja el formateo al thread del listener (misma memoria)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: int = logging.INFO, stream=None) -> None:
+    """
+    Configura el logger ``vpm`` con una cola y un thread escritor (idempotente).
+
+    Args:
+        level: Nivel mínimo de los mensajes
+        stream: Destino de los mensajes (por defecto, sys.stdout)
+    """
+    global _listener
+    with _setup_lock:
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(level)
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(logging.Formatter("%(message)s"))
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(_DeferredQueueHandler(records))
+        # Los mensajes no se duplican en los handlers del logger raíz
+        logger.propagate = False
+
+        _listener = QueueListener(records, output)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Escribe los mensajes pendientes y detiene el thread escritor."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logger = logging.getLogger(LOGGER_NAME)
+        for handler in list(logger.handlers):
+            if isinstance(handler, _DeferredQueueHandler):
+                logger.removeHandler(handler)
+        logger.propagate = True
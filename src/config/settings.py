@@ -3,8 +3,8 @@ Configuración general del simulador de medidores virtuales.
 """
 
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 
 
 @dataclass
@@ -25,8 +25,40 @@ class SimulatorConfig:
     """Configuración general del simulador."""
 
     devices: int = 1
-    update_interval: int = 60
+    # Segundos; admite fracciones (ej: 0.01 para 100 Hz)
+    update_interval: float = 60
     verbose: bool = False
+    # Generación bajo demanda: solo al leer, con antigüedad máxima lazy_ttl (None: intervalo)
+    lazy: bool = False
+    lazy_ttl: Optional[float] = None
+    # Procesos generadores con imágenes en memoria compartida (0: en el loop del servidor)
+    workers: int = 0
+    # Atender las lecturas de registros (funciones 3 y 4) desde la imagen codificada
+    fast_read: bool = False
+    # Respuestas de lectura codificadas en caché LRU por servidor (0: sin caché)
+    response_cache: int = 0
+    # Qué hacer con los ciclos perdidos por atraso (ver CATCH_UP_POLICIES)
+    catch_up: str = "skip"
+    # Alinear los ciclos a múltiplos de su período en la hora de pared
+    align_ticks: bool = False
+    # Desfase de los ciclos de cada dispositivo dentro del intervalo (ver STAGGER_POLICIES)
+    stagger: str = "even"
+    # Puerto del exportador HTTP de métricas /metrics (None: sin exportador)
+    metrics_port: Optional[int] = None
+    # Historial en memoria: filas por dispositivo (0: sin historial) y segundos
+    # mínimos entre filas
+    history: int = 0
+    history_resolution: float = 1.0
+    # Almacenamiento persistente: directorio (None: sin almacenamiento), horas
+    # conservadas en el nivel raw y segundos mínimos entre sus filas
+    store: Optional[str] = None
+    store_retention: float = 24.0
+    store_resolution: float = 1.0
+    # Archivo donde guardar el perfil cProfile de toda la ejecución (None: sin perfil)
+    profile: Optional[str] = None
+    # Períodos de regeneración (segundos) por categoría de registro; el campo
+    # "period" de cada registro tiene prioridad
+    category_periods: Dict[str, float] = field(default_factory=dict)
     register_tables_dir: str = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "..", "..", "config")
     )
@@ -36,5 +68,31 @@ class SimulatorConfig:
 DEFAULT_CONFIG = SimulatorConfig()
 DEFAULT_MODBUS_CONFIG = ModbusConfig()
 
+# Intervalo de actualización mínimo (1 ms) y umbral del modo de alta frecuencia,
+# por debajo del cual no se informa cada actualización de cada dispositivo
+MIN_UPDATE_INTERVAL = 0.001
+HIGH_FREQUENCY_INTERVAL = 1.0
+
+# Políticas de recuperación de ciclos perdidos del planificador
+# (ver src.data_generation.scheduler.DeadlineScheduler)
+CATCH_UP_POLICIES = ("skip", "coalesce", "burst")
+
+# Reparto de los ciclos de los dispositivos dentro del intervalo: todos juntos,
+# uniforme según la posición en la flota o según un hash del unit ID
+# (ver src.data_generation.scheduler.stagger_phase)
+STAGGER_POLICIES = ("none", "even", "hash")
+
 # Rutas de archivos de registros
 REGISTER_FILES = {1: "register_table_PM21XX.json", 2: "register_table_generic.json"}
+
+# Plantillas usadas por defecto: el dispositivo i usa DEFAULT_TEMPLATES[i % len]
+DEFAULT_TEMPLATES = [REGISTER_FILES[1], REGISTER_FILES[2]]
+
+# Límites del modo flota. El unit ID Modbus ocupa un byte (1-247 direccionables),
+# por lo que en TCP las flotas mayores se reparten en puertos consecutivos.
+MAX_DEVICES = 5000
+MAX_UNIT_ID = 247
+
+# Espacio de direcciones Modbus de cada dispositivo; solo se almacenan los rangos
+# definidos por su tabla de registros
+REGISTER_ADDRESS_SPACE = 5000
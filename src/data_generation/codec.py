@@ -0,0 +1,287 @@
+"""
+Codificación de valores de registros a palabras Modbus de 16 bits.
+
+Reproduce la configuración usada por el simulador con BinaryPayloadBuilder:
+bytes en orden big-endian dentro de cada palabra (``Endian.BIG``) y palabras en
+orden inverso (``Endian.LITTLE``), es decir, la palabra menos significativa
+primero.
+"""
+
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class DataTypeCodec:
+    """Codec para un tipo de datos de registro."""
+
+    def __init__(self, data_type: str, fmt: str, width: int, integer: bool):
+        """
+        Inicializa el codec.
+
+        Args:
+            data_type: Nombre del tipo de datos (ej: FLOAT32)
+            fmt: Formato de struct del valor (sin indicador de orden)
+            width: Número de palabras de 16 bits que ocupa
+            integer: Si el valor se convierte con int() antes de codificar
+        """
+        self.data_type = data_type
+        self.width = width
+        self.integer = integer
+        self._value_struct = struct.Struct(">" + fmt)
+        self._words_struct = struct.Struct(f">{width}H")
+
+    def encode(self, value: Any) -> List[int]:
+        """Codifica un valor a la lista de palabras del registro."""
+        value = int(value) if self.integer else float(value)
+        words = self._words_struct.unpack(self._value_struct.pack(value))
+        return list(reversed(words))
+
+    def decode(self, words: Sequence[int]) -> Any:
+        """Decodifica la lista de palabras del registro a su valor numérico."""
+        raw = self._words_struct.pack(*reversed(words))
+        return self._value_struct.unpack(raw)[0]
+
+    def to_display(self, value: Any) -> Any:
+        """Convierte un valor decodificado a su representación legible."""
+        return value
+
+
+class DateTimeCodec(DataTypeCodec):
+    """Codec para timestamps de 64 bits mostrados como fecha."""
+
+    def to_display(self, value: Any) -> Any:
+        return datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Registry de codecs por tipo de datos
+CODEC_REGISTRY: Dict[str, DataTypeCodec] = {
+    "FLOAT32": DataTypeCodec("FLOAT32", "f", 2, integer=False),
+    "4Q_FP_PF": DataTypeCodec("4Q_FP_PF", "f", 2, integer=False),
+    "INT16": DataTypeCodec("INT16", "h", 1, integer=True),
+    "INT16U": DataTypeCodec("INT16U", "H", 1, integer=True),
+    "INT64": DataTypeCodec("INT64", "q", 4, integer=True),
+    "DATETIME": DateTimeCodec("DATETIME", "Q", 4, integer=True),
+}
+
+
+def get_codec(data_type: str) -> DataTypeCodec:
+    """
+    Obtiene el codec de un tipo de datos.
+
+    Args:
+        data_type: Tipo de datos del registro
+
+    Returns:
+        Instancia del codec
+
+    Raises:
+        ValueError: Si el tipo de datos no está soportado
+    """
+    if data_type not in CODEC_REGISTRY:
+        raise ValueError(f"Tipo de datos no soportado: {data_type}")
+
+    return CODEC_REGISTRY[data_type]
+
+
+# Tipo NumPy (big-endian) usado para codificar cada tipo de datos en bloque
+_BATCH_DTYPES = {
+    "FLOAT32": ">f4",
+    "4Q_FP_PF": ">f4",
+    "INT16": ">i2",
+    "INT16U": ">u2",
+    "INT64": ">i8",
+    "DATETIME": ">u8",
+}
+
+
+class _EncodeGroup:
+    """Registros de un mismo tipo de datos y su posición en el buffer de palabras."""
+
+    __slots__ = (
+        "data_type",
+        "dtype",
+        "width",
+        "value_indices",
+        "word_positions",
+        "address_positions",
+    )
+
+    def __init__(
+        self,
+        data_type: str,
+        width: int,
+        value_indices: List[int],
+        offsets: List[int],
+        addresses: List[int],
+    ):
+        self.data_type = data_type
+        self.dtype = np.dtype(_BATCH_DTYPES[data_type])
+        self.width = width
+        self.value_indices = np.asarray(value_indices, dtype=np.intp)
+        # Posiciones (n, width) de cada palabra, ya en el orden de palabras invertido
+        reversed_words = np.arange(width - 1, -1, -1, dtype=np.intp)
+        self.word_positions = np.asarray(offsets, dtype=np.intp).reshape(-1, 1) + reversed_words
+        self.address_positions = (
+            np.asarray(addresses, dtype=np.intp).reshape(-1, 1) + reversed_words
+        )
+
+    def to_words(self, values: np.ndarray) -> np.ndarray:
+        """Convierte los valores del grupo a una matriz (n, width) de palabras big-endian."""
+        if self.dtype.kind in "iu":
+            # int() trunca hacia cero; los enteros se reducen a su ancho en bits
+            values = values.astype(np.int64)
+            if self.dtype.kind == "u" and self.dtype.itemsize == 8:
+                values = values.view(np.uint64)
+            else:
+                values = values.astype(self.dtype.newbyteorder("="))
+        return values.astype(self.dtype).view(">u2").reshape(-1, self.width)
+
+
+class BatchEncoder:
+    """
+    Codifica en bloque los valores de un plan de registros a palabras de 16 bits.
+
+    Cada tipo de datos se convierte con una sola operación vectorizada (bytes
+    big-endian y palabras invertidas, igual que ``DataTypeCodec``). Las palabras
+    se ordenan por dirección y se agrupan en rangos contiguos (``runs``), de modo
+    que escribirlas en una imagen de registros requiere una asignación por rango.
+
+    A diferencia de la codificación escalar, los enteros fuera del rango del tipo
+    se truncan a su ancho en bits en lugar de provocar un error.
+
+    Si se indica un ``layout`` (ver ``SpanLayout``), ``write`` y ``scatter``
+    escriben en el buffer compacto de una imagen en lugar de un arreglo
+    indexado por dirección.
+    """
+
+    def __init__(
+        self,
+        registers: Sequence[Any],
+        mask: Optional[Sequence[bool]] = None,
+        layout: Optional[Any] = None,
+    ):
+        """
+        Inicializa el encoder.
+
+        Args:
+            registers: Registros compilados (ver RegisterPlan.registers)
+            mask: Máscara opcional de registros a codificar (por defecto, todos)
+            layout: Layout de la imagen destino (por defecto, indexada por dirección)
+
+        Raises:
+            ValueError: Si algún registro no está almacenado en el layout
+        """
+        selected = [
+            (index, reg)
+            for index, reg in enumerate(registers)
+            if (mask is None or mask[index]) and reg.data_type in _BATCH_DTYPES
+        ]
+        selected.sort(key=lambda item: item[1].address)
+
+        # Unir los intervalos [address, address + width) en rangos contiguos
+        runs: List[Tuple[int, int, int]] = []
+        run_start = run_end = None
+        offset = 0
+        register_offsets: Dict[int, int] = {}
+        for index, reg in selected:
+            end = reg.address + reg.codec.width
+            if run_end is None or reg.address > run_end:
+                if run_end is not None:
+                    runs.append((run_start, offset, run_end - run_start))
+                    offset += run_end - run_start
+                run_start, run_end = reg.address, end
+            else:
+                run_end = max(run_end, end)
+            register_offsets[index] = offset + reg.address - run_start
+        if run_end is not None:
+            runs.append((run_start, offset, run_end - run_start))
+            offset += run_end - run_start
+
+        #: Rangos contiguos (address, offset en el buffer de palabras, longitud)
+        self.runs: Tuple[Tuple[int, int, int], ...] = tuple(runs)
+        self.word_count = offset
+        self.count = len(selected)
+
+        grouped: Dict[str, Tuple[int, List[int], List[int], List[int]]] = {}
+        for index, reg in selected:
+            _, indices, offsets, addresses = grouped.setdefault(
+                reg.data_type, (reg.codec.width, [], [], [])
+            )
+            indices.append(index)
+            offsets.append(register_offsets[index])
+            addresses.append(reg.address)
+        self.groups = [
+            _EncodeGroup(data_type, width, indices, offsets, addresses)
+            for data_type, (width, indices, offsets, addresses) in grouped.items()
+        ]
+
+        # Posición de cada rango (y de cada palabra) en el arreglo destino
+        self._targets = [(address, offset, length) for address, offset, length in runs]
+        if layout is not None:
+            for i, (address, offset, length) in enumerate(self._targets):
+                position = layout.position(address, length)
+                if position is None:
+                    raise ValueError(f"Rango {address}-{address + length - 1} fuera del layout")
+                self._targets[i] = (position, offset, length)
+            for group in self.groups:
+                group.address_positions = layout.positions(group.address_positions)
+
+    def encode(self, values: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Codifica los valores a palabras de 16 bits ordenadas por dirección.
+
+        Args:
+            values: Valores alineados con los registros del plan
+            out: Buffer uint16 opcional de ``word_count`` palabras
+
+        Returns:
+            Buffer de palabras (ver ``runs`` para ubicar cada rango)
+        """
+        if out is None:
+            out = np.zeros(self.word_count, dtype=np.uint16)
+
+        for group in self.groups:
+            out[group.word_positions] = group.to_words(values[group.value_indices])
+
+        return out
+
+    def write(self, image: Any, words: np.ndarray) -> None:
+        """
+        Escribe el buffer de palabras en una imagen de registros.
+
+        Args:
+            image: Arreglo indexable por dirección (ej: numpy uint16), o el
+                buffer compacto de una imagen si se indicó ``layout``
+            words: Buffer devuelto por ``encode``
+        """
+        for position, offset, length in self._targets:
+            image[position : position + length] = words[offset : offset + length]
+
+    def scatter(self, values: np.ndarray, image: np.ndarray, only: np.ndarray) -> int:
+        """
+        Codifica y escribe directamente en la imagen solo los registros seleccionados.
+
+        Pensado para actualizaciones parciales (ej: generación bajo demanda), donde
+        reescribir rangos completos sobrescribiría registros no regenerados.
+
+        Args:
+            values: Valores alineados con los registros del plan
+            image: Arreglo uint16 indexable por dirección (o buffer compacto, ver ``write``)
+            only: Máscara booleana (tamaño del plan) de registros a escribir
+
+        Returns:
+            Número de registros escritos
+        """
+        written = 0
+        for group in self.groups:
+            selected = only[group.value_indices]
+            if not selected.any():
+                continue
+            image[group.address_positions[selected]] = group.to_words(
+                values[group.value_indices[selected]]
+            )
+            written += int(selected.sum())
+        return written
@@ -0,0 +1,115 @@
+"""
+Plantillas de dispositivo compartidas por varios medidores.
+
+Una plantilla parsea la tabla de registros y compila su plan una sola vez; todos
+los dispositivos creados a partir de ella comparten esas estructuras (y los
+motores/encoders prototipo de cada grupo de frecuencia), de modo que cada
+dispositivo solo asigna su imagen de registros (compacta, ver ``layout``) y sus
+buffers de trabajo.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.data_generation.batch_engine import BatchGenerationEngine
+from src.data_generation.codec import BatchEncoder
+from src.data_generation.register_image import SpanLayout
+from src.data_generation.register_loader import load_register_table
+from src.data_generation.register_plan import RegisterPlan, compile_register_plan
+
+
+class DeviceTemplate:
+    """Tabla de registros parseada y plan compilado, compartidos entre dispositivos."""
+
+    def __init__(self, name: str, register_definitions: List[Dict[str, Any]]):
+        """
+        Inicializa la plantilla.
+
+        Args:
+            name: Nombre de la plantilla (normalmente el archivo de registros)
+            register_definitions: Definiciones de registros ya cargadas
+        """
+        self.name = name
+        self.register_definitions = register_definitions
+        self.plan: RegisterPlan = compile_register_plan(register_definitions)
+        self._rate_layouts: Dict[float, List[Tuple[float, BatchGenerationEngine, BatchEncoder]]] = (
+            {}
+        )
+
+        # Índice por dirección (para localizar los registros de un rango)
+        addresses = np.array([reg.address for reg in self.plan.registers], dtype=np.int64)
+        widths = np.array([reg.width for reg in self.plan.registers], dtype=np.int64)
+        self.address_order = np.argsort(addresses, kind="stable")
+        self.sorted_starts = addresses[self.address_order]
+        self.sorted_ends = self.sorted_starts + widths[self.address_order]
+
+        # Rangos de direcciones que ocupan los registros del plan
+        runs = BatchEncoder(self.plan.registers).runs
+        self.layout = SpanLayout([(address, length) for address, _, length in runs])
+
+    @classmethod
+    def from_file(cls, register_file: str, label: Optional[str] = None) -> "DeviceTemplate":
+        """
+        Crea una plantilla desde un archivo JSON de registros.
+
+        Los errores de carga se informan y producen una plantilla vacía.
+
+        Args:
+            register_file: Ruta al archivo de definiciones de registros
+            label: Prefijo de los mensajes (por defecto, el nombre del archivo)
+
+        Returns:
+            Plantilla creada
+        """
+        name = os.path.basename(register_file)
+        label = label or f"Template {name}"
+        try:
+            register_definitions = load_register_table(register_file)
+            print(f"[{label}] ✅ Cargados {len(register_definitions)} registros desde {name}")
+        except FileNotFoundError:
+            print(f"[{label}] ❌ Archivo no encontrado: {register_file}")
+            register_definitions = []
+        except Exception as e:
+            print(f"[{label}] ❌ Error cargando registros: {e}")
+            register_definitions = []
+
+        template = cls(name, register_definitions)
+        for address, error in template.plan.errors.items():
+            print(f"[{label}] ❌ Registro {address} no se generará: {error}")
+        return template
+
+    def rate_layout(
+        self, update_interval: float
+    ) -> List[Tuple[float, BatchGenerationEngine, BatchEncoder]]:
+        """
+        Devuelve los grupos de frecuencia del plan para un intervalo de actualización.
+
+        Cada grupo es ``(period, engine, encoder)``; el motor es un prototipo que
+        cada dispositivo debe clonar con ``spawn`` y el encoder (que escribe en el
+        buffer compacto de la imagen) no tiene estado, por lo que se comparte.
+        El resultado se calcula una vez por intervalo.
+
+        Args:
+            update_interval: Período de los registros sin período propio
+
+        Returns:
+            Lista de grupos ordenada por período
+        """
+        if update_interval not in self._rate_layouts:
+            by_period: Dict[float, List[int]] = {}
+            for index, reg in enumerate(self.plan.registers):
+                if reg.generator is None:
+                    continue
+                period = update_interval if reg.period is None else reg.period
+                by_period.setdefault(period, []).append(index)
+
+            layout = []
+            for period, indices in sorted(by_period.items()):
+                engine = BatchGenerationEngine(self.plan, indices=indices)
+                encoder = BatchEncoder(self.plan.registers, engine.valid, layout=self.layout)
+                layout.append((period, engine, encoder))
+            self._rate_layouts[update_interval] = layout
+
+        return self._rate_layouts[update_interval]
@@ -0,0 +1,222 @@
+"""
+Historial en memoria de los valores generados, con consultas submuestreadas.
+
+Cada dispositivo guarda sus valores en un buffer circular NumPy de tamaño
+fijo: una fila (un valor por registro del plan) por generación, como máximo
+una cada ``resolution`` segundos. La fila se copia del arreglo de valores del
+generador justo después de publicar la imagen, de modo que no hace falta
+decodificar registros. Los registros se guardan en float32, salvo los enteros
+de 32 bits o más (ver ``wide_columns``), que se guardan en float64.
+
+Las consultas devuelven una ventana de tiempo reducida en el servidor a una
+cantidad de puntos: mínimo, máximo y promedio por intervalo
+(``downsample_minmax``) o Largest-Triangle-Three-Buckets (``downsample_lttb``),
+que conserva la forma de la serie.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Métodos de submuestreo admitidos por /api/history
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def wide_columns(registers: Sequence) -> np.ndarray:
+    """
+    Columnas que float32 no representa exactamente: los enteros de más de una palabra.
+
+    Un timestamp Unix (~1.7e9) en float32 avanza de a 128 s, y un contador
+    INT64 pierde unidades por encima de 2^24.
+
+    Returns:
+        Máscara booleana alineada con ``registers``
+    """
+    return np.array([reg.codec.integer and reg.codec.width > 1 for reg in registers], dtype=bool)
+
+
+class RegisterHistory:
+    """Buffer circular de filas de valores (una por generación) de un dispositivo."""
+
+    def __init__(self, registers: Sequence, capacity: int, resolution: float = 0.0):
+        """
+        Inicializa el historial.
+
+        Args:
+            registers: Registros del plan (ver RegisterPlan.registers), en orden de columna
+            capacity: Filas guardadas como máximo
+            resolution: Segundos mínimos entre dos filas (0: una por generación)
+        """
+        if capacity < 1:
+            raise ValueError(f"El historial debe guardar al menos una fila: {capacity}")
+        self.capacity = capacity
+        self.resolution = resolution
+        wide = wide_columns(registers)
+        self._narrow_index = np.flatnonzero(~wide)
+        self._wide_index = np.flatnonzero(wide)
+        # Los enteros se guardan truncados, como los codifica la imagen
+        integer = np.array([reg.codec.integer for reg in registers], dtype=bool)
+        self._narrow_integer = integer[self._narrow_index]
+        # Columna de cada registro: (bloque, posición en el bloque)
+        self.columns: Dict[int, Tuple[np.ndarray, int]] = {}
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.narrow = np.full((capacity, len(self._narrow_index)), np.nan, dtype=np.float32)
+        self.wide = np.full((capacity, len(self._wide_index)), np.nan, dtype=np.float64)
+        for block, indices in ((self.narrow, self._narrow_index), (self.wide, self._wide_index)):
+            for position, index in enumerate(indices):
+                self.columns[registers[index].address] = (block, position)
+        # Filas registradas desde el inicio (incluye las ya sobrescritas)
+        self.total = 0
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def record(self, timestamp: float, values: np.ndarray) -> bool:
+        """
+        Guarda una fila si pasaron ``resolution`` segundos desde la anterior.
+
+        Las horas deben crecer para que ``series`` pueda buscar por hora: si el
+        reloj retrocede (ej: un ajuste NTP) las filas se descartan hasta que
+        vuelva a superar la última hora guardada.
+
+        Args:
+            timestamp: Hora de la generación (time.time)
+            values: Valores de todos los registros, alineados con el plan
+
+        Returns:
+            True si se guardó la fila
+        """
+        if self.total:
+            last = self.times[(self.total - 1) % self.capacity]
+            if timestamp < last or timestamp - last < self.resolution:
+                return False
+        row = self.total % self.capacity
+        self.times[row] = timestamp
+        narrow = values[self._narrow_index]
+        if self._narrow_integer.any():
+            narrow[self._narrow_integer] = np.trunc(narrow[self._narrow_integer])
+        self.narrow[row] = narrow
+        self.wide[row] = np.trunc(values[self._wide_index])
+        self.total += 1
+        return True
+
+    def series(
+        self, address: int, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve en orden cronológico los valores de un registro en una ventana.
+
+        Args:
+            address: Dirección del registro
+            start: Hora inicial (incluida; None: desde la fila más antigua)
+            end: Hora final (incluida; None: hasta la más reciente)
+
+        Returns:
+            Horas (float64) y valores (float64)
+
+        Raises:
+            KeyError: Si el registro no está en el historial
+        """
+        block, column = self.columns[address]
+        count = len(self)
+        first = self.total - count
+        order = (np.arange(first, self.total) % self.capacity).astype(np.intp)
+        times = self.times[order]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = count if end is None else int(np.searchsorted(times, end, side="right"))
+        rows = order[lo:hi]
+        return times[lo:hi], block[rows, column].astype(np.float64)
+
+    def memory_footprint(self) -> int:
+        """Bytes ocupados por los buffers."""
+        return self.times.nbytes + self.narrow.nbytes + self.wide.nbytes
+
+
+def downsample_minmax(times: np.ndarray, values: np.ndarray, points: int) -> Dict[str, List]:
+    """
+    Reduce una serie a ``points`` intervalos de igual cantidad de muestras.
+
+    Returns:
+        Hora inicial, mínimo, máximo y promedio de cada intervalo
+    """
+    if len(times) <= points:
+        column = _json_list(values)
+        return {"t": times.tolist(), "min": column, "max": column, "avg": column}
+    starts = np.linspace(0, len(times), points, endpoint=False).astype(np.intp)
+    counts = np.diff(np.append(starts, len(times)))
+    return {
+        "t": times[starts].tolist(),
+        "min": _json_list(np.fmin.reduceat(values, starts)),
+        "max": _json_list(np.fmax.reduceat(values, starts)),
+        "avg": _json_list(np.add.reduceat(values, starts) / counts),
+    }
+
+
+def downsample_lttb(times: np.ndarray, values: np.ndarray, points: int) -> Dict[str, List]:
+    """
+    Reduce una serie a ``points`` muestras con Largest-Triangle-Three-Buckets.
+
+    Conserva la primera y la última muestra; de cada intervalo intermedio elige
+    la que forma el triángulo de mayor área con la muestra elegida en el
+    intervalo anterior y el promedio del siguiente.
+
+    Returns:
+        Horas y valores de las muestras elegidas
+    """
+    count = len(times)
+    if count <= points or points < 3:
+        return {"t": times.tolist(), "value": _json_list(values)}
+
+    edges = np.linspace(1, count - 1, points - 1).astype(np.intp)
+    selected = [0]
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_lo, next_hi = hi, edges[bucket + 2] if bucket + 2 < len(edges) else count
+        avg_t = times[next_lo:next_hi].mean()
+        avg_v = values[next_lo:next_hi].mean()
+        prev_t, prev_v = times[selected[-1]], values[selected[-1]]
+        areas = np.abs(
+            (prev_t - avg_t) * (values[lo:hi] - prev_v) - (prev_t - times[lo:hi]) * (avg_v - prev_v)
+        )
+        selected.append(lo + int(np.argmax(areas)))
+    selected.append(count - 1)
+    return {"t": times[selected].tolist(), "value": _json_list(values[selected])}
+
+
+def downsample_rollup(
+    times: np.ndarray,
+    mins: np.ndarray,
+    maxs: np.ndarray,
+    avgs: np.ndarray,
+    counts: np.ndarray,
+    points: int,
+) -> Dict[str, List]:
+    """
+    Reduce filas ya agregadas (mínimo, máximo, promedio y muestras) a ``points`` intervalos.
+
+    El promedio de cada intervalo se pondera por la cantidad de muestras de sus filas.
+
+    Returns:
+        Hora inicial, mínimo, máximo y promedio de cada intervalo
+    """
+    if len(times) <= points:
+        starts = np.arange(len(times), dtype=np.intp)
+    else:
+        starts = np.linspace(0, len(times), points, endpoint=False).astype(np.intp)
+    if not len(starts):
+        return {"t": [], "min": [], "max": [], "avg": []}
+    weights = counts.astype(np.float64)
+    totals = np.add.reduceat(weights, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.add.reduceat(avgs * weights, starts) / totals
+    return {
+        "t": times[starts].tolist(),
+        "min": _json_list(np.fmin.reduceat(mins, starts)),
+        "max": _json_list(np.fmax.reduceat(maxs, starts)),
+        "avg": _json_list(avg),
+    }
+
+
+def _json_list(values: np.ndarray) -> List[Optional[float]]:
+    """Valores para JSON (NaN, que no es JSON válido, como null)."""
+    return [None if value != value else value for value in values.tolist()]
@@ -0,0 +1,157 @@
+"""
+Instrumentación del ciclo de generación.
+
+Cada ciclo del loop de actualización registra su duración y su retraso
+(jitter) respecto del plazo previsto, y cada dispositivo que regeneró
+registros su costo. Las muestras se guardan en buffers circulares de tamaño
+fijo, de modo que la memoria no crece con el tiempo de ejecución y los
+resúmenes (máximo, p99, ciclos excedidos) reflejan la historia reciente.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Muestras guardadas por serie (ciclos o generaciones de dispositivos)
+DEFAULT_HISTORY = 4096
+
+# Dispositivos más costosos informados en el resumen
+SLOWEST_DEVICES = 5
+
+
+class RingBuffer:
+    """Buffer circular de muestras float64 con una etiqueta entera opcional."""
+
+    __slots__ = ("values", "labels", "total")
+
+    def __init__(self, size: int):
+        """
+        Inicializa el buffer.
+
+        Args:
+            size: Número máximo de muestras guardadas
+        """
+        if size < 1:
+            raise ValueError(f"El tamaño del historial debe ser positivo: {size}")
+        self.values = np.zeros(size, dtype=np.float64)
+        self.labels = np.zeros(size, dtype=np.int64)
+        # Muestras registradas desde el inicio (incluye las ya sobrescritas)
+        self.total = 0
+
+    def __len__(self) -> int:
+        return min(self.total, len(self.values))
+
+    def append(self, value: float, label: int = 0) -> None:
+        """Agrega una muestra, sobrescribiendo la más antigua si el buffer está lleno."""
+        index = self.total % len(self.values)
+        self.values[index] = value
+        self.labels[index] = label
+        self.total += 1
+
+    def samples(self) -> np.ndarray:
+        """Devuelve las muestras guardadas (sin orden cronológico)."""
+        return self.values[: len(self)]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resume las muestras guardadas.
+
+        Returns:
+            Cantidad total, media, p50, p99 y máximo (en segundos; None sin muestras)
+        """
+        samples = self.samples()
+        if not len(samples):
+            return {"count": self.total, "mean": None, "p50": None, "p99": None, "max": None}
+        p50, p99 = np.percentile(samples, [50, 99])
+        return {
+            "count": self.total,
+            "mean": float(samples.mean()),
+            "p50": float(p50),
+            "p99": float(p99),
+            "max": float(samples.max()),
+        }
+
+
+class GenerationTimings:
+    """Duración, jitter y ciclos excedidos del loop de generación, y costo por dispositivo."""
+
+    def __init__(self, interval: float, history: int = DEFAULT_HISTORY):
+        """
+        Inicializa la instrumentación.
+
+        Args:
+            interval: Intervalo de actualización (un ciclo más largo cuenta como excedido)
+            history: Muestras guardadas por serie
+        """
+        self.interval = interval
+        self.ticks = RingBuffer(history)
+        self.jitter = RingBuffer(history)
+        self.devices = RingBuffer(history)
+        self.overruns = 0
+        self.last_overrun: Optional[float] = None
+
+    def record_tick(self, duration: float, jitter: Optional[float] = None) -> bool:
+        """
+        Registra un ciclo del loop.
+
+        Args:
+            duration: Duración del ciclo en segundos
+            jitter: Retraso del inicio del ciclo respecto de su plazo previsto
+                (None en el primer ciclo, que no tiene plazo)
+
+        Returns:
+            True si el ciclo excedió el intervalo de actualización
+        """
+        self.ticks.append(duration)
+        if jitter is not None:
+            self.jitter.append(jitter)
+        overrun = duration > self.interval
+        if overrun:
+            self.overruns += 1
+            self.last_overrun = duration
+        return overrun
+
+    def record_device(self, device_id: int, duration: float) -> None:
+        """
+        Registra el costo de una generación de un dispositivo.
+
+        Args:
+            device_id: Unit ID del dispositivo
+            duration: Duración de ``generate_registers`` en segundos
+        """
+        self.devices.append(duration, device_id)
+
+    def _slowest_devices(self) -> List[Dict[str, Any]]:
+        """Dispositivos con la generación más costosa en el historial."""
+        count = len(self.devices)
+        if not count:
+            return []
+        values = self.devices.values[:count]
+        labels = self.devices.labels[:count]
+        slowest: Dict[int, float] = {}
+        for index in np.argsort(values)[::-1]:
+            device_id = int(labels[index])
+            if device_id not in slowest:
+                slowest[device_id] = float(values[index])
+                if len(slowest) == SLOWEST_DEVICES:
+                    break
+        return [{"device_id": device_id, "max": cost} for device_id, cost in slowest.items()]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Resume la instrumentación (para ``get_server_stats`` y ``/api/status``).
+
+        Returns:
+            Resúmenes de duración de ciclo, jitter y costo por dispositivo,
+            ciclos excedidos y dispositivos más costosos
+        """
+        return {
+            "interval": self.interval,
+            "history": len(self.ticks.values),
+            "tick": self.ticks.summary(),
+            "jitter": self.jitter.summary(),
+            "device": self.devices.summary(),
+            "overruns": self.overruns,
+            "last_overrun": self.last_overrun,
+            "slowest_devices": self._slowest_devices(),
+        }
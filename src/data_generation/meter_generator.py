@@ -2,18 +2,58 @@
 Generador de datos mejorado para medidores de potencia virtuales.
 """
 
-import os
+import math
+import struct
 import time
 import threading
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
 
-from pymodbus.datastore import ModbusSequentialDataBlock
-from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
-from pymodbus.constants import Endian
+import numpy as np
 
-from src.data_generation.register_loader import load_register_table
-from src.data_generation.generators import get_generator
+from src.config.logging_setup import get_logger
+from src.config.settings import HIGH_FREQUENCY_INTERVAL, REGISTER_ADDRESS_SPACE
+from src.data_generation.batch_engine import BatchGenerationEngine
+from src.data_generation.device_template import DeviceTemplate
+from src.data_generation.history import RegisterHistory
+from src.data_generation.store import DeviceStore, TimeSeriesStore
+from src.data_generation.codec import CODEC_REGISTRY, BatchEncoder
+from src.data_generation.register_image import RegisterImage
+from src.data_generation.scheduler import DeadlineScheduler, aligned_deadline
+from src.modbus.datastore import RegisterImageDataBlock
+
+logger = get_logger("generation")
+
+# Separación mínima (segundos) entre dos mensajes de actualización de un dispositivo
+UPDATE_LOG_INTERVAL = 10.0
+
+
+class RateGroup:
+    """Registros que comparten un período de regeneración."""
+
+    __slots__ = ("period", "engine", "encoder", "words")
+
+    def __init__(self, period: float, engine: BatchGenerationEngine, encoder: BatchEncoder):
+        self.period = period
+        self.engine = engine
+        self.encoder = encoder
+        self.words = np.zeros(encoder.word_count, dtype=np.uint16)
+
+
+class RegisterDump:
+    """Volcado de los registros de un dispositivo, decodificado solo al escribirse."""
+
+    __slots__ = ("generator", "snapshot", "timestamp")
+
+    def __init__(
+        self, generator: "MeterDataGenerator", snapshot: np.ndarray, timestamp: datetime
+    ):
+        self.generator = generator
+        self.snapshot = snapshot
+        self.timestamp = timestamp
+
+    def __str__(self) -> str:
+        return self.generator.format_registers(self.snapshot, self.timestamp)
 
 
 class MeterDataGenerator:
@@ -22,145 +62,280 @@ class MeterDataGenerator:
     Versión mejorada con mejor manejo de errores y logging.
     """
 
-    def __init__(self, device_id: int, register_file: str, update_interval: int = 60):
+    def __init__(
+        self,
+        device_id: int,
+        register_file: Optional[str] = None,
+        update_interval: float = 60,
+        template: Optional[DeviceTemplate] = None,
+        image: Optional[RegisterImage] = None,
+        catch_up: str = "skip",
+        align_ticks: bool = False,
+        phase: float = 0.0,
+    ):
         """
         Inicializa el generador de datos del medidor.
 
         Args:
             device_id: ID del dispositivo
             register_file: Ruta al archivo de definiciones de registros
-            update_interval: Intervalo de actualización en segundos
+            update_interval: Intervalo de actualización en segundos (admite fracciones)
+            template: Plantilla compartida (si se indica, no se lee register_file)
+            image: Imagen de registros a usar (ej: en memoria compartida); por
+                defecto se crea una con el layout de la plantilla
+            catch_up: Política para los ciclos perdidos por atraso ("skip",
+                "coalesce" o "burst"; ver DeadlineScheduler)
+            align_ticks: Alinear los plazos de cada grupo a múltiplos de su
+                período en la hora de pared
+            phase: Fracción del período (0 a 1) en que se desfasan los ciclos
+                del dispositivo, para repartir la flota dentro del intervalo
         """
         self.device_id = device_id
         self.update_interval = update_interval
+        # En alta frecuencia no se informa cada actualización (costaría más que generarla)
+        self.log_updates = update_interval >= HIGH_FREQUENCY_INTERVAL
+        self._next_log_at = 0.0
+        self._updates_since_log = 0
         self._lock = threading.Lock()
         self._last_update = 0
 
-        # Inicializar bloque de datos Modbus
-        self.block = ModbusSequentialDataBlock(0x00, [0] * 5000)
+        # Tabla de registros y plan compilado (compartidos si vienen de una plantilla)
+        if template is None:
+            if register_file is None:
+                raise ValueError("Se requiere register_file o template")
+            template = DeviceTemplate.from_file(register_file, label=f"Device {device_id}")
+        self.template = template
+        self.register_definitions = template.register_definitions
+        self.plan = template.plan
+
+        # Imagen de registros con doble buffer (solo los rangos de la tabla) y
+        # bloque de datos Modbus que la expone
+        if image is None:
+            image = RegisterImage(REGISTER_ADDRESS_SPACE, layout=template.layout)
+        self.image = image
+        self.block = RegisterImageDataBlock(self.image)
+
+        # Grupos de registros por período, planificados por plazos en el reloj
+        # monótono (inmune a ajustes de la hora del sistema)
+        self._values = np.zeros(len(self.plan), dtype=np.float64)
+        self.scheduler = DeadlineScheduler(catch_up)
+        self.align_ticks = align_ticks
+        self.phase = phase
+        self.rate_groups = self._build_rate_groups()
+
+        # Antigüedad de cada registro en el reloj monótono (para generación bajo demanda)
+        self._generated_at = np.full(len(self.plan), np.nan)
+        self._max_age = np.full(len(self.plan), np.inf)
+        self.lazy_ttl: Optional[float] = None
+        self.lazy_refreshes = 0
+
+        # Historial de valores en memoria (ver enable_history)
+        self.history: Optional[RegisterHistory] = None
+        # Almacenamiento persistente de los valores (ver attach_store)
+        self.store: Optional[DeviceStore] = None
+
+    def _build_rate_groups(self) -> List[RateGroup]:
+        """
+        Crea los grupos de registros por período de regeneración.
 
-        # Cargar definiciones de registros
-        try:
-            self.register_definitions = load_register_table(register_file)
-            print(
-                f"[Device {device_id}] ✅ Cargados {len(self.register_definitions)} registros desde {os.path.basename(register_file)}"
-            )
-        except FileNotFoundError:
-            print(f"[Device {device_id}] ❌ Archivo no encontrado: {register_file}")
-            self.register_definitions = []
-        except Exception as e:
-            print(f"[Device {device_id}] ❌ Error cargando registros: {e}")
-            self.register_definitions = []
+        Los motores y encoders provienen de la plantilla; cada dispositivo solo
+        clona el motor (para tener su propio generador aleatorio) y registra el
+        grupo en el planificador. Los registros sin período propio usan
+        ``update_interval``. Con ``align_ticks`` el primer plazo de cada grupo
+        cae en un múltiplo de su período en la hora de pared (y los siguientes
+        también, al no haber deriva); si no, todos vencen de inmediato. En
+        ambos casos la grilla se desplaza ``phase`` períodos; sin alineación,
+        la primera generación sigue siendo inmediata.
+
+        Returns:
+            Lista de grupos indexada por la clave usada en el planificador
+        """
+        time_origin = time.time()
+        now = time.monotonic()
+        groups = []
+        for key, (period, engine, encoder) in enumerate(
+            self.template.rate_layout(self.update_interval)
+        ):
+            groups.append(RateGroup(period, engine.spawn(time_origin=time_origin), encoder))
+            offset = 0.0 if math.isinf(period) else self.phase * period
+            if self.align_ticks:
+                first_deadline = aligned_deadline(period, now, wall_now=time_origin) + offset
+                self.scheduler.add(key, period, first_deadline=first_deadline)
+            else:
+                self.scheduler.add(key, period, first_deadline=now, phase=offset)
+        return groups
+
+    @property
+    def epoch(self) -> int:
+        """Época de generación: aumenta con cada actualización publicada de la imagen."""
+        return self.image.version
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Devuelve el próximo instante en que algún grupo de registros debe regenerarse.
+
+        Returns:
+            Plazo en el reloj de ``time.monotonic()``, o None si no quedan plazos
+        """
+        return self.scheduler.next_deadline()
 
     def generate_registers(self) -> bool:
         """
-        Genera los datos simulados para el medidor.
+        Genera los datos simulados de los grupos de registros cuyo plazo venció.
 
         Returns:
-            True si la generación fue exitosa, False en caso contrario
+            True si se actualizó algún registro, False en caso contrario
         """
         with self._lock:
             try:
-                current_time = time.time()
+                # Solo actualizar si hay definiciones de registros
+                if not self.register_definitions:
+                    return False
 
-                # Para la primera ejecución o si no hay registros, generar inmediatamente
-                if self._last_update == 0 or not self.register_definitions:
-                    # Solo actualizar si hay definiciones de registros
-                    if not self.register_definitions:
-                        return False
-                else:
-                    # Verificar si necesita actualización
-                    if current_time - self._last_update < self.update_interval:
-                        return True
-
-                builder = BinaryPayloadBuilder(byteorder=Endian.BIG, wordorder=Endian.LITTLE)
-                successful_updates = 0
-
-                for reg_def in self.register_definitions:
-                    try:
-                        success = self._generate_single_register(reg_def, builder)
-                        if success:
-                            successful_updates += 1
-                    except Exception as e:
-                        print(
-                            f"[Device {self.device_id}] ❌ Error generando registro {reg_def.get('address', 'unknown')}: {e}"
-                        )
-                        continue
+                current_time = time.time()
+                monotonic_now = time.monotonic()
+                due = [self.rate_groups[key] for key in self.scheduler.pop_due(monotonic_now)]
+                if not due:
+                    return False
+
+                encoded = []
+                for group in due:
+                    values = group.engine.generate(out=self._values, now=current_time)
+                    encoded.append((group, group.encoder.encode(values, out=group.words)))
+
+                # Escribir el buffer trasero y publicarlo con un solo cambio de referencia
+                with self.image.write_lock:
+                    for group, words in encoded:
+                        group.encoder.write(self.image.back, words)
+                    self.image.publish()
+                successful_updates = sum(group.encoder.count for group in due)
+                if self.history is not None:
+                    self.history.record(current_time, self._values)
+                if self.store is not None:
+                    self.store.record(current_time, self._values)
 
                 self._last_update = current_time
+                for group in due:
+                    self._generated_at[group.engine.valid] = monotonic_now
 
-                if successful_updates > 0:
-                    print(
-                        f"[Device {self.device_id}] 🔄 Actualizados {successful_updates}/{len(self.register_definitions)} registros"
-                    )
+                if successful_updates > 0 and self.log_updates:
+                    self._log_update(successful_updates, monotonic_now)
 
                 return successful_updates > 0
 
             except Exception as e:
-                print(f"[Device {self.device_id}] ❌ Error general en generación de registros: {e}")
+                logger.error(
+                    "[Device %s] ❌ Error general en generación de registros: %s", self.device_id, e
+                )
                 return False
 
-    def _generate_single_register(
-        self, reg_def: Dict[str, Any], builder: BinaryPayloadBuilder
-    ) -> bool:
+    def _log_update(self, registers: int, now: float) -> None:
+        """Informa una actualización (como máximo una cada UPDATE_LOG_INTERVAL segundos)."""
+        self._updates_since_log += 1
+        if now < self._next_log_at:
+            return
+        skipped = self._updates_since_log - 1
+        self._next_log_at = now + UPDATE_LOG_INTERVAL
+        self._updates_since_log = 0
+        logger.info(
+            "[Device %s] 🔄 Actualizados %s/%s registros%s",
+            self.device_id,
+            registers,
+            len(self.register_definitions),
+            f" (+{skipped} actualizaciones sin informar)" if skipped else "",
+        )
+
+    def enable_lazy(self, ttl: float) -> None:
         """
-        Genera un solo registro.
+        Activa la generación bajo demanda.
+
+        Los registros solo se regeneran cuando se invoca ``refresh_range`` (ver
+        ``ModbusServerManager.create_modbus_context``) y su valor es más antiguo
+        que su período (si lo tiene) o que ``ttl``.
 
         Args:
-            reg_def: Definición del registro
-            builder: Builder para construir datos binarios
+            ttl: Antigüedad máxima en segundos de un valor servido
+        """
+        self.lazy_ttl = ttl
+        for index, reg in enumerate(self.plan.registers):
+            if reg.generator is not None:
+                self._max_age[index] = ttl if reg.period is None else reg.period
 
-        Returns:
-            True si la generación fue exitosa
+    def enable_history(self, capacity: int, resolution: float = 0.0) -> None:
         """
-        try:
-            address = reg_def["address"]
-            gen_info = reg_def.get("generation")
+        Activa el historial en memoria de los valores generados.
 
-            if not gen_info:
-                return False
+        Args:
+            capacity: Filas (generaciones) guardadas como máximo
+            resolution: Segundos mínimos entre dos filas
+        """
+        self.history = RegisterHistory(self.plan.registers, capacity, resolution)
 
-            # Obtener generador y parámetros
-            gen_type = gen_info.get("type", "fixed")
-            params = gen_info.get("params", [])
-
-            # Generar valor
-            generator = get_generator(gen_type)
-            value = generator.generate(params)
-
-            # Codificar según el tipo de datos
-            data_type = reg_def["data_type"]
-            builder.reset()
-
-            if data_type in ["FLOAT32", "4Q_FP_PF"]:
-                builder.add_32bit_float(float(value))
-            elif data_type == "INT16":
-                builder.add_16bit_int(int(value))
-            elif data_type == "INT16U":
-                builder.add_16bit_uint(int(value))
-            elif data_type == "INT64":
-                builder.add_64bit_int(int(value))
-            elif data_type == "DATETIME":
-                builder.add_64bit_uint(int(value))
-            else:
-                print(f"[Device {self.device_id}] Tipo de datos no soportado: {data_type}")
-                return False
+    def attach_store(self, store: TimeSeriesStore) -> None:
+        """
+        Guarda los valores generados en el almacenamiento persistente.
 
-            # Escribir al bloque de datos
-            built_regs = builder.to_registers()
-            if built_regs:
-                self.block.setValues(address, built_regs)
-                return True
+        Args:
+            store: Almacenamiento de la flota (abre el directorio de este dispositivo)
+        """
+        self.store = store.device(self.device_id, self.plan.registers)
 
-        except Exception as e:
-            print(f"[Device {self.device_id}] Error en registro {address}: {e}")
+    def _registers_in_range(self, address: int, count: int) -> np.ndarray:
+        """Devuelve las posiciones del plan de los registros que tocan [address, address + count)."""
+        template = self.template
+        low = np.searchsorted(template.sorted_ends, address, side="right")
+        high = np.searchsorted(template.sorted_starts, address + count, side="left")
+        return template.address_order[low:high]
 
-        return False
+    def refresh_range(self, address: int, count: int = 1) -> int:
+        """
+        Regenera los registros vencidos dentro de un rango de direcciones.
+
+        Args:
+            address: Dirección inicial del rango
+            count: Número de registros de 16 bits del rango
+
+        Returns:
+            Número de registros regenerados
+        """
+        candidates = self._registers_in_range(address, count)
+        if candidates.size == 0:
+            return 0
+
+        with self._lock:
+            current_time = time.time()
+            monotonic_now = time.monotonic()
+            age = monotonic_now - self._generated_at[candidates]
+            # Los valores nunca generados (NaN) también se consideran vencidos
+            stale = candidates[~(age <= self._max_age[candidates])]
+            if stale.size == 0:
+                return 0
+
+            only = np.zeros(len(self.plan), dtype=bool)
+            only[stale] = True
+            for group in self.rate_groups:
+                group.engine.generate(out=self._values, now=current_time, only=only)
+
+            with self.image.write_lock:
+                for group in self.rate_groups:
+                    group.encoder.scatter(self._values, self.image.back, only)
+                self.image.publish()
+            if self.history is not None:
+                self.history.record(current_time, self._values)
+            if self.store is not None:
+                self.store.record(current_time, self._values)
+
+            self._generated_at[stale] = monotonic_now
+            self._last_update = current_time
+            self.lazy_refreshes += 1
+            return int(stale.size)
 
     def get_register_value(self, address: int, data_type: str) -> Any:
         """
         Obtiene el valor actual de un registro específico.
 
+        La lectura usa la instantánea publicada y no espera a la generación.
+
         Args:
             address: Dirección del registro
             data_type: Tipo de datos del registro
@@ -168,81 +343,111 @@ class MeterDataGenerator:
         Returns:
             Valor decodificado del registro
         """
-        with self._lock:
-            try:
-                return self._decode_register_value(address, data_type)
-            except Exception as e:
-                return f"Error: {e}"
+        try:
+            return self._decode_register_value(address, data_type)
+        except Exception as e:
+            return f"Error: {e}"
 
-    def _decode_register_value(self, address: int, data_type: str) -> Any:
+    def _decode_register_value(
+        self, address: int, data_type: str, snapshot: Optional[np.ndarray] = None
+    ) -> Any:
         """
         Decodifica un valor de registro según su tipo de datos.
 
         Args:
             address: Dirección del registro
             data_type: Tipo de datos
+            snapshot: Instantánea de la imagen a usar (por defecto, la publicada)
 
         Returns:
             Valor decodificado
         """
+        reg = self.plan.by_address.get(address)
+        if reg is not None and reg.data_type == data_type:
+            codec = reg.codec
+        elif data_type in CODEC_REGISTRY:
+            codec = CODEC_REGISTRY[data_type]
+        else:
+            return "Tipo desconocido"
+
+        if snapshot is None:
+            snapshot = self.image.front
+
         try:
-            if data_type in ["FLOAT32", "4Q_FP_PF"]:
-                regs = self.block.getValues(address, 2)
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    regs, byteorder=Endian.BIG, wordorder=Endian.LITTLE
-                )
-                return decoder.decode_32bit_float()
-            elif data_type == "INT16":
-                regs = self.block.getValues(address, 1)
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    regs, byteorder=Endian.BIG, wordorder=Endian.LITTLE
-                )
-                return decoder.decode_16bit_int()
-            elif data_type == "INT16U":
-                regs = self.block.getValues(address, 1)
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    regs, byteorder=Endian.BIG, wordorder=Endian.LITTLE
-                )
-                return decoder.decode_16bit_uint()
-            elif data_type == "INT64":
-                regs = self.block.getValues(address, 4)
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    regs, byteorder=Endian.BIG, wordorder=Endian.LITTLE
-                )
-                return decoder.decode_64bit_int()
-            elif data_type == "DATETIME":
-                regs = self.block.getValues(address, 4)
-                decoder = BinaryPayloadDecoder.fromRegisters(
-                    regs, byteorder=Endian.BIG, wordorder=Endian.LITTLE
-                )
-                timestamp = decoder.decode_64bit_uint()
-                return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-            else:
-                return "Tipo desconocido"
-        except (ValueError, IndexError) as e:
+            words = self.image.gather(snapshot, address, codec.width).tolist()
+            return codec.to_display(codec.decode(words))
+        except (ValueError, IndexError, struct.error) as e:
             raise ValueError(f"Error decodificando {data_type} en dirección {address}: {e}")
         except Exception as e:
             raise Exception(f"Error inesperado: {e}")
 
-    def print_all_registers(self) -> None:
-        """Imprime los valores de todos los registros en formato legible."""
-        print(
-            f"[Device ID {self.device_id} - {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}] Valores de registros:"
-        )
-        print("=" * 80)
+    def format_registers(
+        self, snapshot: Optional[np.ndarray] = None, timestamp: Optional[datetime] = None
+    ) -> str:
+        """
+        Formatea los valores de todos los registros en formato legible.
 
-        for reg_info in self.register_definitions:
-            address = reg_info["address"]
-            data_type = reg_info["data_type"]
-            description = reg_info["description"]
+        Args:
+            snapshot: Instantánea de la imagen a decodificar (por defecto, la publicada)
+            timestamp: Hora a mostrar en el encabezado (por defecto, la actual)
+
+        Returns:
+            Texto de varias líneas
+        """
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+        lines = [
+            f"[Device ID {self.device_id} - {timestamp.strftime('%Y-%m-%d %H:%M:%S')}] Valores de registros:",
+            "=" * 80,
+        ]
+
+        # Una sola instantánea para que todos los valores sean consistentes entre sí
+        if snapshot is None:
+            snapshot = self.image.front
+        for reg in self.plan.registers:
+            address = reg.address
+            data_type = reg.data_type
+            description = reg.description
 
             try:
-                value = self._decode_register_value(address, data_type)
-                print(f"Registro {address:4d} ({data_type:8s}): {value} ({description})")
+                value = self._decode_register_value(address, data_type, snapshot)
+                lines.append(f"Registro {address:4d} ({data_type:8s}): {value} ({description})")
             except Exception as e:
-                print(f"Registro {address:4d} ({data_type:8s}): Error leyendo registro - {e}")
+                lines.append(f"Registro {address:4d} ({data_type:8s}): Error leyendo registro - {e}")
+
+        lines.append("=" * 80)
+        return "\n".join(lines)
+
+    def register_dump(self) -> RegisterDump:
+        """
+        Captura los valores publicados para decodificarlos más tarde (ej: al escribir el log).
 
-        print("=" * 80)
+        Returns:
+            Volcado con una copia de la instantánea actual
+        """
+        return RegisterDump(self, self.image.front.copy(), datetime.now(timezone.utc))
+
+    def print_all_registers(self) -> None:
+        """Imprime los valores de todos los registros en formato legible."""
+        print(self.format_registers())
+
+    def memory_footprint(self) -> int:
+        """
+        Estima los bytes propios del dispositivo (sin contar la plantilla compartida).
+
+        Returns:
+            Bytes de la imagen de registros y de los buffers de trabajo
+        """
+        arrays = [
+            self.image.front,
+            self.image.back,
+            self._values,
+            self._generated_at,
+            self._max_age,
+        ]
+        arrays.extend(group.words for group in self.rate_groups)
+        history = self.history.memory_footprint() if self.history is not None else 0
+        return sum(array.nbytes for array in arrays) + history
 
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -253,7 +458,24 @@ class MeterDataGenerator:
         """
         return {
             "device_id": self.device_id,
+            "template": self.template.name,
             "total_registers": len(self.register_definitions),
-            "last_update": self._last_update,
+            # La imagen también registra publicaciones hechas en otro proceso
+            "last_update": max(self._last_update, self.image.published_at),
             "update_interval": self.update_interval,
+            "epoch": self.epoch,
+            "lazy_ttl": self.lazy_ttl,
+            "lazy_refreshes": self.lazy_refreshes,
+            "catch_up": self.scheduler.catch_up,
+            "phase": self.phase,
+            "missed_cycles": self.scheduler.missed,
+            "history_rows": len(self.history) if self.history is not None else None,
+            "store": self.store.get_statistics() if self.store is not None else None,
+            "rate_groups": [
+                {
+                    "period": None if math.isinf(group.period) else group.period,
+                    "registers": group.encoder.count,
+                }
+                for group in self.rate_groups
+            ],
         }
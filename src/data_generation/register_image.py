@@ -0,0 +1,241 @@
+"""
+Imagen de registros con doble buffer.
+
+La generación escribe en el buffer trasero y lo publica con un único cambio de
+referencia; los lectores (servidor Modbus, interfaz web) toman la referencia
+del buffer frontal sin bloquearse y nunca ven una actualización a medias.
+"""
+
+import threading
+import time
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SpanLayout:
+    """
+    Correspondencia entre direcciones de registro y posiciones de un buffer compacto.
+
+    Los rangos ``(address, length)`` se ordenan y se unen si se solapan o son
+    contiguos; cada uno ocupa posiciones consecutivas del buffer. El layout es
+    inmutable y se comparte entre todos los dispositivos de una plantilla.
+    """
+
+    def __init__(self, spans: Sequence[Tuple[int, int]]):
+        """
+        Inicializa el layout.
+
+        Args:
+            spans: Rangos ``(address, length)`` a almacenar
+        """
+        merged = []
+        for address, length in sorted(spans):
+            if length <= 0:
+                continue
+            if merged and address <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], address + length)
+            else:
+                merged.append([address, address + length])
+
+        self.starts = np.array([start for start, _ in merged], dtype=np.int64)
+        self.ends = np.array([end for _, end in merged], dtype=np.int64)
+        lengths = self.ends - self.starts
+        self.offsets = np.cumsum(lengths) - lengths
+        #: Número de palabras almacenadas
+        self.size = int(lengths.sum())
+
+    @classmethod
+    def dense(cls, size: int, base_address: int = 0) -> "SpanLayout":
+        """Crea un layout que cubre todo el rango ``[base_address, base_address + size)``."""
+        return cls([(base_address, size)])
+
+    @property
+    def spans(self) -> Tuple[Tuple[int, int], ...]:
+        """Rangos almacenados como ``(address, length)``."""
+        return tuple((int(start), int(end - start)) for start, end in zip(self.starts, self.ends))
+
+    def position(self, address: int, count: int = 1) -> Optional[int]:
+        """
+        Devuelve la posición en el buffer de un rango contenido en un solo tramo.
+
+        Args:
+            address: Dirección inicial
+            count: Número de registros
+
+        Returns:
+            Posición de ``address`` en el buffer, o None si el rango no está
+            completamente almacenado en un tramo
+        """
+        index = int(np.searchsorted(self.starts, address, side="right")) - 1
+        if index < 0 or address + count > self.ends[index]:
+            return None
+        return int(self.offsets[index] + address - self.starts[index])
+
+    def positions(self, addresses: np.ndarray) -> np.ndarray:
+        """
+        Traduce un arreglo de direcciones a posiciones del buffer.
+
+        Args:
+            addresses: Direcciones de registro
+
+        Returns:
+            Posiciones correspondientes (-1 para direcciones no almacenadas)
+        """
+        addresses = np.asarray(addresses, dtype=np.int64)
+        if not self.starts.size:
+            return np.full(addresses.shape, -1, dtype=np.intp)
+        index = np.maximum(np.searchsorted(self.starts, addresses, side="right") - 1, 0)
+        inside = (addresses >= self.starts[index]) & (addresses < self.ends[index])
+        result = self.offsets[index] + addresses - self.starts[index]
+        return np.where(inside, result, -1).astype(np.intp)
+
+    def overlaps(self, address: int, count: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Recorre las partes almacenadas de un rango de direcciones.
+
+        Args:
+            address: Dirección inicial
+            count: Número de registros
+
+        Yields:
+            Tuplas ``(índice dentro del rango, posición en el buffer, longitud)``
+        """
+        end = address + count
+        low = int(np.searchsorted(self.ends, address, side="right"))
+        high = int(np.searchsorted(self.starts, end, side="left"))
+        for index in range(low, high):
+            start = max(address, int(self.starts[index]))
+            stop = min(end, int(self.ends[index]))
+            position = int(self.offsets[index]) + start - int(self.starts[index])
+            yield start - address, position, stop - start
+
+
+class RegisterImage:
+    """
+    Imagen de registros de 16 bits con buffer frontal y trasero.
+
+    Un buffer publicado no vuelve a modificarse: al publicar, el buffer trasero
+    pasa a ser el frontal y se crea un nuevo buffer trasero a partir de él. Así,
+    un lector que conserva una referencia al buffer frontal siempre tiene una
+    instantánea consistente, aunque la generación continúe.
+
+    Las direcciones fuera del layout se leen como cero y las escrituras en
+    ellas se descartan, igual que los registros reservados de un medidor real.
+    """
+
+    def __init__(self, size: int, base_address: int = 0, layout: Optional[SpanLayout] = None):
+        """
+        Inicializa la imagen.
+
+        Args:
+            size: Tamaño del espacio de direcciones (en registros de 16 bits)
+            base_address: Dirección del primer registro
+            layout: Rangos almacenados (por defecto, todo el espacio de direcciones)
+        """
+        self.base_address = base_address
+        self.size = size
+        self.layout = layout if layout is not None else SpanLayout.dense(size, base_address)
+        self._front = np.zeros(self.layout.size, dtype=np.uint16)
+        self._back = self._front.copy()
+        self._published_at = 0.0
+        self._version = 0
+        # Instantánea codificada en big-endian: (buffer frontal, bytes)
+        self._encoded: Optional[Tuple[object, memoryview]] = None
+        #: Serializa a los escritores (generación y escrituras Modbus)
+        self.write_lock = threading.Lock()
+
+    @property
+    def front(self) -> np.ndarray:
+        """Instantánea publicada (no debe modificarse)."""
+        return self._front
+
+    @property
+    def back(self) -> np.ndarray:
+        """Buffer de trabajo; solo debe modificarse con ``write_lock`` tomado."""
+        return self._back
+
+    @property
+    def version(self) -> int:
+        """Número de publicaciones realizadas."""
+        return self._version
+
+    @property
+    def published_at(self) -> float:
+        """Instante (time.time) de la última publicación, o 0 si no hubo ninguna."""
+        return self._published_at
+
+    def publish(self) -> None:
+        """Publica el buffer trasero como nueva instantánea (requiere ``write_lock``)."""
+        published = self._back
+        self._back = published.copy()
+        self._front = published
+        self._published_at = time.time()
+        self._version += 1
+
+    def encoded(self) -> memoryview:
+        """
+        Devuelve la instantánea publicada con cada palabra en big-endian (orden Modbus).
+
+        Se calcula una vez por publicación y se reutiliza en todas las lecturas
+        hasta la siguiente; las posiciones coinciden con las de ``front`` (dos
+        bytes por registro).
+
+        Returns:
+            Bytes de solo lectura de la instantánea
+        """
+        front = self._front
+        cached = self._encoded
+        if cached is None or cached[0] is not front:
+            cached = (front, memoryview(front.astype(">u2").tobytes()))
+            self._encoded = cached
+        return cached[1]
+
+    def write(self, address: int, values: Sequence[int]) -> None:
+        """
+        Escribe valores y los publica de inmediato.
+
+        Args:
+            address: Dirección del primer registro
+            values: Valores de 16 bits a escribir
+        """
+        values = np.asarray(values, dtype=np.uint16)
+        with self.write_lock:
+            back = self.back
+            for index, position, length in self.layout.overlaps(address, len(values)):
+                back[position : position + length] = values[index : index + length]
+            self.publish()
+
+    def read(self, address: int, count: int = 1) -> np.ndarray:
+        """
+        Lee un rango de la instantánea publicada.
+
+        Args:
+            address: Dirección del primer registro
+            count: Número de registros
+
+        Returns:
+            Copia de los registros solicitados
+        """
+        return self.gather(self._front, address, count)
+
+    def gather(self, snapshot: np.ndarray, address: int, count: int = 1) -> np.ndarray:
+        """
+        Lee un rango de direcciones de una instantánea.
+
+        Args:
+            snapshot: Buffer de la imagen (ej: ``front`` tomado previamente)
+            address: Dirección del primer registro
+            count: Número de registros
+
+        Returns:
+            Copia de los registros solicitados (cero en direcciones no almacenadas)
+        """
+        position = self.layout.position(address, count)
+        if position is not None:
+            return snapshot[position : position + count].copy()
+
+        words = np.zeros(count, dtype=np.uint16)
+        for index, position, length in self.layout.overlaps(address, count):
+            words[index : index + length] = snapshot[position : position + length]
+        return words
@@ -70,4 +70,10 @@ def validate_register_definition(register: Dict[str, Any]) -> bool:
     if not isinstance(register["address"], int) or register["address"] < 0:
         return False
 
+    # Validar período de regeneración opcional
+    if "period" in register:
+        period = register["period"]
+        if isinstance(period, bool) or not isinstance(period, (int, float)) or period <= 0:
+            return False
+
     return True
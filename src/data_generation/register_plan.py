@@ -0,0 +1,167 @@
+"""
+Plan de registros compilado a partir de una tabla de registros.
+
+El plan se construye una sola vez al cargar la tabla: resuelve el generador,
+el codec, la dirección destino y el ancho en palabras de cada registro, de
+modo que cada ciclo de generación solo ejecuta el cálculo de valores.
+"""
+
+import math
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.config.settings import DEFAULT_CONFIG
+from src.data_generation.batch_engine import BATCH_KERNEL_REGISTRY
+from src.data_generation.codec import DataTypeCodec, get_codec
+from src.data_generation.generators import DataGenerator, get_generator
+
+
+@dataclass(frozen=True)
+class CompiledRegister:
+    """Registro compilado, listo para generar y codificar."""
+
+    address: int
+    data_type: str
+    description: str
+    codec: DataTypeCodec
+    gen_type: Optional[str] = None
+    generator: Optional[DataGenerator] = None
+    params: Tuple[Any, ...] = ()
+    #: Período de regeneración en segundos (None: intervalo del dispositivo, inf: una vez)
+    period: Optional[float] = None
+    #: Categoría y unidad de la tabla de registros (ej: "current", "A")
+    category: Optional[str] = None
+    unit: Optional[str] = None
+
+    @property
+    def width(self) -> int:
+        """Número de palabras de 16 bits que ocupa el registro."""
+        return self.codec.width
+
+    @property
+    def slice(self) -> slice:
+        """Rango de direcciones que ocupa el registro."""
+        return slice(self.address, self.address + self.codec.width)
+
+
+@dataclass(frozen=True)
+class RegisterPlan:
+    """Plan inmutable con todos los registros compilados de una tabla."""
+
+    registers: Tuple[CompiledRegister, ...]
+    by_address: Mapping[int, CompiledRegister]
+    errors: Mapping[int, str]
+
+    def __len__(self) -> int:
+        return len(self.registers)
+
+    @property
+    def generated(self) -> Tuple[CompiledRegister, ...]:
+        """Registros que tienen un generador asociado."""
+        return tuple(reg for reg in self.registers if reg.generator is not None)
+
+
+def _resolve_period(
+    reg_def: Dict[str, Any], gen_type: Optional[str], category_periods: Mapping[str, float]
+) -> Optional[float]:
+    """
+    Resuelve el período de regeneración de un registro.
+
+    Prioridad: campo ``period`` del registro, período de su ``category`` y, para
+    generadores ``fixed``, una sola generación. En otro caso se usa el intervalo
+    de actualización del dispositivo (None).
+    """
+    if "period" in reg_def:
+        period = reg_def["period"]
+    elif reg_def.get("category") in category_periods:
+        period = category_periods[reg_def["category"]]
+    elif gen_type == "fixed":
+        return math.inf
+    else:
+        return None
+
+    if isinstance(period, bool) or not isinstance(period, (int, float)) or period <= 0:
+        raise ValueError(f"Período inválido: {period!r} (debe ser un número positivo)")
+    return float(period)
+
+
+def compile_register_plan(
+    register_definitions: List[Dict[str, Any]],
+    category_periods: Optional[Mapping[str, float]] = None,
+) -> RegisterPlan:
+    """
+    Compila las definiciones de registros en un plan inmutable.
+
+    Los registros con tipo de datos no soportado se excluyen del plan; los que
+    tienen un generador o período inválido se mantienen (pueden leerse) pero sin
+    generador. En ambos casos el motivo queda en ``RegisterPlan.errors`` indexado
+    por dirección.
+
+    Args:
+        register_definitions: Lista de definiciones (formato de load_register_table)
+        category_periods: Períodos de regeneración por categoría de registro
+
+    Returns:
+        Plan de registros compilado
+    """
+    if category_periods is None:
+        category_periods = DEFAULT_CONFIG.category_periods
+
+    registers: List[CompiledRegister] = []
+    errors: Dict[int, str] = {}
+
+    for reg_def in register_definitions:
+        address = reg_def["address"]
+
+        try:
+            codec = get_codec(reg_def["data_type"])
+        except ValueError as e:
+            errors[address] = str(e)
+            continue
+
+        gen_type = None
+        generator = None
+        params: Tuple[Any, ...] = ()
+        period = None
+        gen_info = reg_def.get("generation")
+
+        if gen_info:
+            try:
+                gen_type = gen_info.get("type", "fixed")
+                generator = get_generator(gen_type)
+                params = tuple(gen_info.get("params", []))
+
+                kernel = BATCH_KERNEL_REGISTRY.get(gen_type)
+                if kernel is not None:
+                    if len(params) < kernel.param_count:
+                        raise ValueError(
+                            f"Generador '{gen_type}' requiere {kernel.param_count} parámetros, recibió {len(params)}"
+                        )
+                    params = tuple(float(p) for p in params[: kernel.param_count])
+
+                period = _resolve_period(reg_def, gen_type, category_periods)
+            except (ValueError, TypeError) as e:
+                errors[address] = str(e)
+                gen_type, generator, params, period = None, None, (), None
+
+        registers.append(
+            CompiledRegister(
+                address=address,
+                data_type=reg_def["data_type"],
+                description=reg_def.get("description", ""),
+                codec=codec,
+                gen_type=gen_type,
+                generator=generator,
+                params=params,
+                period=period,
+                category=reg_def.get("category"),
+                unit=reg_def.get("unit"),
+            )
+        )
+
+    return RegisterPlan(
+        registers=tuple(registers),
+        by_address=MappingProxyType({reg.address: reg for reg in registers}),
+        errors=MappingProxyType(errors),
+    )
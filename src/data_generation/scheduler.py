@@ -0,0 +1,219 @@
+"""
+Planificador por plazos para grupos de registros con distinta frecuencia.
+"""
+
+import heapq
+import math
+import time
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.config.settings import CATCH_UP_POLICIES, STAGGER_POLICIES
+
+# Ciclos atrasados que la política "burst" recupera; con más atraso (ej: tras
+# suspender el equipo) se comporta como "skip"
+MAX_BURST_CYCLES = 100
+
+
+def aligned_deadline(period: float, now: float, wall_now: Optional[float] = None) -> float:
+    """
+    Calcula un plazo que coincide con un múltiplo de ``period`` en la hora de pared.
+
+    Ej: con período 60 el plazo cae en el próximo segundo 0 de un minuto.
+
+    Args:
+        period: Período en segundos
+        now: Tiempo actual del reloj del planificador (ej: time.monotonic())
+        wall_now: Hora de pared actual (por defecto, time.time())
+
+    Returns:
+        Plazo en el reloj del planificador
+    """
+    if period <= 0 or math.isinf(period):
+        return now
+    if wall_now is None:
+        wall_now = time.time()
+    return now + (-wall_now) % period
+
+
+class DeadlineScheduler:
+    """
+    Planificador basado en un heap de plazos absolutos.
+
+    Cada clave tiene un período; ``pop_due`` devuelve solo las claves cuyo plazo
+    venció y las reprograma, de modo que el costo por ciclo depende de cuántos
+    grupos vencen y no de cuántos existen. Un período infinito significa que la
+    clave se ejecuta una sola vez.
+
+    Los plazos son absolutos y se calculan desde el plazo anterior, no desde el
+    momento de la ejecución, por lo que no acumulan deriva. El reloj lo aporta
+    el llamador y debe ser monótono (``time.monotonic()``). Cuando una clave se
+    atrasa más de un período, ``catch_up`` decide qué hacer con los ciclos
+    perdidos:
+
+    - ``skip``: se ejecuta una vez y los perdidos se descartan; el próximo
+      plazo es el siguiente de la grilla original (conserva la fase).
+    - ``coalesce``: se ejecuta una vez y la grilla se reinicia desde ahora.
+    - ``burst``: se ejecuta una vez por cada ciclo perdido en llamadas
+      sucesivas (hasta MAX_BURST_CYCLES; con más atraso, como ``skip``).
+    """
+
+    def __init__(self, catch_up: str = "skip"):
+        """
+        Inicializa el planificador.
+
+        Args:
+            catch_up: Política para los ciclos perdidos (ver CATCH_UP_POLICIES)
+        """
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Política de recuperación desconocida: {catch_up}")
+        self.catch_up = catch_up
+        self._heap: List[Tuple[float, int, Hashable, float]] = []
+        self._counter = 0
+        # Desfase del segundo plazo de cada entrada (por contador; ver ``add``)
+        self._first_steps: Dict[int, float] = {}
+        # Ciclos perdidos (descartados o agrupados) desde el inicio
+        self.missed = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(
+        self, key: Hashable, period: float, first_deadline: float = 0.0, phase: float = 0.0
+    ) -> None:
+        """
+        Agrega una clave periódica.
+
+        Args:
+            key: Identificador de la tarea
+            period: Período en segundos (math.inf para ejecutar una sola vez)
+            first_deadline: Plazo de la primera ejecución (por defecto, inmediato)
+            phase: Desfase de la grilla en segundos (0 <= phase < period): la
+                segunda ejecución ocurre ``phase`` segundos después de la
+                primera en lugar de un período después
+        """
+        if period < 0:
+            raise ValueError(f"El período debe ser positivo: {period}")
+        self._counter += 1
+        if 0 < phase < period:
+            self._first_steps[self._counter] = phase
+        heapq.heappush(self._heap, (first_deadline, self._counter, key, period))
+
+    def next_deadline(self) -> Optional[float]:
+        """Devuelve el plazo más próximo, o None si no hay tareas pendientes."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[Hashable]:
+        """
+        Extrae las claves vencidas y las reprograma según ``catch_up``.
+
+        Args:
+            now: Tiempo actual (mismo reloj que los plazos)
+
+        Returns:
+            Claves cuyo plazo es menor o igual a ``now``
+        """
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            expired.append(heapq.heappop(self._heap))
+
+        due = []
+        for deadline, counter, key, period in expired:
+            due.append(key)
+            if math.isinf(period):
+                continue
+            step = self._first_steps.pop(counter, period) if self._first_steps else period
+            next_deadline = self._reschedule(deadline + step, period, now)
+            heapq.heappush(self._heap, (next_deadline, counter, key, period))
+        return due
+
+    def _reschedule(self, next_deadline: float, period: float, now: float) -> float:
+        """Ajusta el plazo siguiente de la grilla aplicando la política de recuperación."""
+        if next_deadline > now:
+            return next_deadline
+        if period <= 0:
+            # Período cero: vence una vez por llamada
+            return now
+
+        # Puntos de la grilla que ya pasaron
+        missed = int((now - next_deadline) // period) + 1
+        if self.catch_up == "burst" and missed <= MAX_BURST_CYCLES:
+            # Vuelve a vencer de inmediato hasta alcanzar la grilla
+            return next_deadline
+
+        self.missed += missed
+        if self.catch_up == "coalesce":
+            return now + period
+        # skip (o burst con demasiado atraso): siguiente punto de la grilla
+        return next_deadline + missed * period
+
+
+def stagger_phase(policy: str, index: int, count: int, device_id: int) -> float:
+    """
+    Calcula la fracción del período en que se desfasan los ciclos de un dispositivo.
+
+    Args:
+        policy: "none" (todos en fase), "even" (repartidos uniformemente según
+            su posición en la flota) o "hash" (según un hash del unit ID,
+            estable aunque cambie el tamaño de la flota)
+        index: Posición del dispositivo en la flota
+        count: Número de dispositivos de la flota
+        device_id: Unit ID del dispositivo
+
+    Returns:
+        Fracción en [0, 1)
+    """
+    if policy not in STAGGER_POLICIES:
+        raise ValueError(f"Política de desfase desconocida: {policy}")
+    if policy == "even":
+        return index / count if count > 1 else 0.0
+    if policy == "hash":
+        return zlib.crc32(device_id.to_bytes(4, "little")) / 2**32
+    return 0.0
+
+
+class DeviceQueue:
+    """
+    Cola de dispositivos ordenada por su próximo plazo.
+
+    Permite que el loop de actualización visite solo los dispositivos que
+    vencieron en lugar de recorrer toda la flota en cada despertar (con ciclos
+    desfasados, el loop despierta una vez por dispositivo y por intervalo).
+    """
+
+    def __init__(self, deadlines: Iterable[Optional[float]]):
+        """
+        Inicializa la cola.
+
+        Args:
+            deadlines: Próximo plazo de cada dispositivo, por posición (None: sin plazos)
+        """
+        self._heap = [(d, i) for i, d in enumerate(deadlines) if d is not None]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_deadline(self) -> Optional[float]:
+        """Devuelve el plazo más próximo, o None si ningún dispositivo tiene plazos."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[int]:
+        """
+        Extrae los dispositivos vencidos; deben volver a agregarse con ``push``.
+
+        Args:
+            now: Tiempo actual (mismo reloj que los plazos)
+
+        Returns:
+            Posiciones de los dispositivos, en orden de vencimiento
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def push(self, index: int, deadline: Optional[float]) -> None:
+        """Agrega un dispositivo con su próximo plazo (se ignora si es None)."""
+        if deadline is not None:
+            heapq.heappush(self._heap, (deadline, index))
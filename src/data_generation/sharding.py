@@ -0,0 +1,299 @@
+"""
+Generación de datos repartida en procesos trabajadores.
+
+Los dispositivos se reparten en fragmentos (shards); cada fragmento tiene un
+proceso que genera sus registros y los escribe en un segmento de memoria
+compartida. El proceso principal (servidor Modbus) solo lee esas imágenes, por
+lo que la generación no compite por el GIL con la atención de peticiones.
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.logging_setup import get_logger, setup_logging, shutdown_logging
+from src.config.settings import REGISTER_ADDRESS_SPACE
+from src.data_generation.device_template import DeviceTemplate
+from src.data_generation.meter_generator import MeterDataGenerator
+from src.data_generation.register_loader import load_register_table
+from src.data_generation.scheduler import DeviceQueue, stagger_phase
+from src.data_generation.shared_image import SharedRegisterImage
+
+# Cabecera de cada segmento: ciclos, segundos de trabajo, duración del último
+# ciclo y último latido del proceso (float64)
+_SHARD_HEADER_FIELDS = ("cycles", "busy_seconds", "last_cycle_seconds", "heartbeat")
+_SHARD_HEADER_BYTES = 8 * len(_SHARD_HEADER_FIELDS)
+
+logger = get_logger("worker")
+
+
+@dataclass
+class ShardSpec:
+    """Descripción (serializable) de un fragmento para su proceso trabajador."""
+
+    index: int
+    shm_name: str
+    update_interval: float
+    verbose: bool
+    register_tables_dir: str
+    catch_up: str = "skip"
+    align_ticks: bool = False
+    # (device_id, archivo de plantilla, offset de la imagen en el segmento, desfase)
+    devices: List[Tuple[int, str, int, float]] = field(default_factory=list)
+
+
+def _shard_header(buffer: memoryview) -> np.ndarray:
+    """Vista de la cabecera de estadísticas de un segmento."""
+    return np.ndarray((len(_SHARD_HEADER_FIELDS),), dtype=np.float64, buffer=buffer)
+
+
+def run_shard(spec: ShardSpec, commands: Any) -> None:
+    """
+    Bucle principal de un proceso trabajador.
+
+    Genera los registros de los dispositivos del fragmento según sus plazos y,
+    mientras espera, atiende los comandos recibidos: ``(posición, address,
+    values)`` escribe valores en la imagen de un dispositivo (escrituras de
+    clientes Modbus) y ``None`` detiene el proceso.
+
+    Args:
+        spec: Descripción del fragmento
+        commands: Cola de comandos del proceso principal
+    """
+    setup_logging()
+    shm = shared_memory.SharedMemory(name=spec.shm_name)
+    try:
+        header = _shard_header(shm.buf)
+        templates: Dict[str, DeviceTemplate] = {}
+        generators = []
+        for device_id, filename, offset, phase in spec.devices:
+            if filename not in templates:
+                # Los errores de carga ya se informaron en el proceso principal
+                path = os.path.join(spec.register_tables_dir, filename)
+                try:
+                    definitions = load_register_table(path)
+                except Exception:
+                    definitions = []
+                templates[filename] = DeviceTemplate(filename, definitions)
+            template = templates[filename]
+            image = SharedRegisterImage(REGISTER_ADDRESS_SPACE, template.layout, shm.buf, offset)
+            generators.append(
+                MeterDataGenerator(
+                    device_id=device_id,
+                    update_interval=spec.update_interval,
+                    template=template,
+                    image=image,
+                    catch_up=spec.catch_up,
+                    align_ticks=spec.align_ticks,
+                    phase=phase,
+                )
+            )
+
+        pending = DeviceQueue(g.next_deadline() for g in generators)
+        while True:
+            start_time = time.perf_counter()
+            for position in pending.pop_due(time.monotonic()):
+                generator = generators[position]
+                if generator.generate_registers() and spec.verbose:
+                    logger.info(generator.register_dump())
+                pending.push(position, generator.next_deadline())
+
+            elapsed = time.perf_counter() - start_time
+            header[0] += 1
+            header[1] += elapsed
+            header[2] = elapsed
+            header[3] = time.time()
+
+            wake_time = pending.next_deadline()
+            timeout = spec.update_interval if wake_time is None else wake_time - time.monotonic()
+            timeout = min(max(timeout, 0.0), spec.update_interval)
+
+            # Atender comandos hasta el próximo plazo
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    command = commands.get(timeout=max(deadline - time.monotonic(), 0.0))
+                except queue.Empty:
+                    break
+                if command is None:
+                    return
+                position, address, values = command
+                generators[position].image.write(address, values)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_logging()
+        try:
+            shm.close()
+        except BufferError:
+            # Aún hay vistas NumPy del segmento; se libera al terminar el proceso
+            pass
+
+
+class ShardedGeneration:
+    """
+    Pool de procesos generadores con imágenes de registros en memoria compartida.
+
+    Los dispositivos se asignan a los fragmentos en ciclo. Cada fragmento tiene
+    un segmento de memoria compartida con las imágenes de sus dispositivos, que
+    el proceso principal expone al servidor Modbus mediante ``image``.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        devices: List[Tuple[int, str, DeviceTemplate]],
+        update_interval: float,
+        verbose: bool = False,
+        register_tables_dir: str = "",
+        catch_up: str = "skip",
+        align_ticks: bool = False,
+        stagger: str = "none",
+    ):
+        """
+        Reserva la memoria compartida de los fragmentos.
+
+        Args:
+            workers: Número de procesos trabajadores
+            devices: Dispositivos como ``(device_id, archivo de plantilla, plantilla)``
+            update_interval: Intervalo de actualización en segundos
+            verbose: Si los trabajadores imprimen los valores generados
+            register_tables_dir: Directorio de las tablas de registros
+            catch_up: Política para los ciclos perdidos (ver DeadlineScheduler)
+            align_ticks: Alinear los ciclos a la hora de pared
+            stagger: Reparto de los ciclos de los dispositivos en el intervalo
+                (ver ``stagger_phase``; usa la posición en toda la flota)
+        """
+        workers = max(1, min(workers, len(devices)))
+        self.specs: List[ShardSpec] = []
+        self.segments: List[shared_memory.SharedMemory] = []
+        self._images: List[SharedRegisterImage] = []
+        self._queues: List[Any] = []
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        # "spawn" evita heredar hilos y locks del proceso principal (y funciona en Windows)
+        self._context = multiprocessing.get_context("spawn")
+
+        assignments: List[List[Tuple[int, int, str, DeviceTemplate]]] = [[] for _ in range(workers)]
+        for index, (device_id, filename, template) in enumerate(devices):
+            assignments[index % workers].append((index, device_id, filename, template))
+
+        images: Dict[int, SharedRegisterImage] = {}
+        for shard_index, assigned in enumerate(assignments):
+            size = _SHARD_HEADER_BYTES + sum(
+                SharedRegisterImage.nbytes(template.layout) for *_, template in assigned
+            )
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            shm.buf[:size] = bytes(size)
+            commands = self._context.Queue()
+            spec = ShardSpec(
+                index=shard_index,
+                shm_name=shm.name,
+                update_interval=update_interval,
+                verbose=verbose,
+                register_tables_dir=register_tables_dir,
+                catch_up=catch_up,
+                align_ticks=align_ticks,
+            )
+
+            offset = _SHARD_HEADER_BYTES
+            for position, (index, device_id, filename, template) in enumerate(assigned):
+                image = SharedRegisterImage(
+                    REGISTER_ADDRESS_SPACE, template.layout, shm.buf, offset
+                )
+                image.write_forwarder = self._forwarder(commands, position)
+                images[index] = image
+                phase = stagger_phase(stagger, index, len(devices), device_id)
+                spec.devices.append((device_id, filename, offset, phase))
+                offset += SharedRegisterImage.nbytes(template.layout)
+
+            self.specs.append(spec)
+            self.segments.append(shm)
+            self._queues.append(commands)
+
+        self._images = [images[index] for index in range(len(devices))]
+
+    @staticmethod
+    def _forwarder(commands: Any, position: int):
+        """Crea la función que reenvía las escrituras de un dispositivo a su trabajador."""
+
+        def forward(address: int, values: List[int]) -> None:
+            commands.put((position, address, values))
+
+        return forward
+
+    def image(self, index: int) -> SharedRegisterImage:
+        """
+        Devuelve la imagen (lado lector) del dispositivo ``index``.
+
+        Args:
+            index: Posición del dispositivo en la lista recibida
+
+        Returns:
+            Imagen en memoria compartida
+        """
+        return self._images[index]
+
+    def start(self) -> None:
+        """Inicia los procesos trabajadores."""
+        for spec, commands in zip(self.specs, self._queues):
+            process = self._context.Process(
+                target=run_shard,
+                args=(spec, commands),
+                name=f"vpm-shard-{spec.index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene los trabajadores y libera la memoria compartida."""
+        for commands, process in zip(self._queues, self._processes):
+            if process.is_alive():
+                commands.put(None)
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        for shm in self.segments:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                shm.close()
+            except BufferError:
+                # Los generadores aún tienen vistas del segmento; se libera con ellas
+                pass
+
+    def get_statistics(self) -> List[Dict[str, Any]]:
+        """
+        Obtiene estadísticas de cada fragmento.
+
+        Returns:
+            Lista con dispositivos, estado y contadores de cada trabajador
+        """
+        stats = []
+        for position, (spec, shm) in enumerate(zip(self.specs, self.segments)):
+            process = self._processes[position] if position < len(self._processes) else None
+            header = dict(zip(_SHARD_HEADER_FIELDS, _shard_header(shm.buf).tolist()))
+            stats.append(
+                {
+                    "shard": spec.index,
+                    "pid": process.pid if process else None,
+                    "alive": bool(process and process.is_alive()),
+                    "devices": len(spec.devices),
+                    "cycles": int(header["cycles"]),
+                    "busy_seconds": header["busy_seconds"],
+                    "last_cycle_seconds": header["last_cycle_seconds"],
+                    "heartbeat": header["heartbeat"],
+                }
+            )
+        return stats
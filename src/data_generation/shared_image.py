@@ -0,0 +1,140 @@
+"""
+Imágenes de registros en memoria compartida entre procesos.
+
+Un proceso generador escribe las imágenes de sus dispositivos en un segmento de
+``multiprocessing.shared_memory`` y el proceso del servidor Modbus las lee
+directamente desde ese segmento, sin mensajes ni copias intermedias.
+"""
+
+import time
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from src.data_generation.register_image import RegisterImage, SpanLayout
+
+# Cabecera por imagen: versión publicada (uint64) e instante de publicación (float64)
+_HEADER_BYTES = 16
+
+
+class SharedRegisterImage(RegisterImage):
+    """
+    Imagen de registros con sus dos buffers en memoria compartida.
+
+    Los buffers ocupan dos posiciones fijas y la versión publicada indica cuál es
+    el frontal (``version % 2``). Como un buffer publicado se reutiliza dos
+    publicaciones después, las lecturas siguen un protocolo seqlock: copian el
+    rango pedido y reintentan si la versión cambió mientras leían. Por eso
+    ``front`` devuelve una copia consistente en lugar del buffer compartido.
+
+    Solo el proceso propietario (el generador) debe escribir. En los demás
+    procesos, ``write`` delega en ``write_forwarder`` si está asignado (ej: para
+    reenviar las escrituras de clientes Modbus al proceso propietario).
+    """
+
+    def __init__(
+        self,
+        size: int,
+        layout: SpanLayout,
+        buffer: memoryview,
+        offset: int = 0,
+        base_address: int = 0,
+    ):
+        """
+        Inicializa la imagen sobre un segmento de memoria compartida.
+
+        Args:
+            size: Tamaño del espacio de direcciones (en registros de 16 bits)
+            layout: Rangos almacenados
+            buffer: Memoria del segmento compartido (ej: ``SharedMemory.buf``)
+            offset: Posición de la imagen dentro del segmento (múltiplo de 8)
+            base_address: Dirección del primer registro
+        """
+        super().__init__(size, base_address, SpanLayout([]))
+        self.layout = layout
+        header = np.ndarray((2,), dtype=np.uint64, buffer=buffer, offset=offset)
+        self._version = header[0:1]
+        self._published_at = header[1:2].view(np.float64)
+        self._slots = np.ndarray(
+            (2, layout.size), dtype=np.uint16, buffer=buffer, offset=offset + _HEADER_BYTES
+        )
+        self.write_forwarder: Optional[Callable[[int, Sequence[int]], object]] = None
+
+    @staticmethod
+    def nbytes(layout: SpanLayout) -> int:
+        """Bytes que ocupa en el segmento una imagen con ``layout`` (alineados a 8)."""
+        size = _HEADER_BYTES + 2 * layout.size * 2
+        return (size + 7) // 8 * 8
+
+    @property
+    def version(self) -> int:
+        """Número de publicaciones realizadas."""
+        return int(self._version[0])
+
+    @property
+    def published_at(self) -> float:
+        """Instante (time.time) de la última publicación, o 0 si no hubo ninguna."""
+        return float(self._published_at[0])
+
+    @property
+    def front(self) -> np.ndarray:
+        """Copia consistente de la instantánea publicada."""
+        return self._consistent_read(lambda words: words.copy())
+
+    @property
+    def back(self) -> np.ndarray:
+        """Buffer de trabajo; solo el proceso propietario lo modifica, con ``write_lock``."""
+        return self._slots[(self.version + 1) % 2]
+
+    def publish(self) -> None:
+        """Publica el buffer trasero y lo copia al nuevo buffer trasero (requiere ``write_lock``)."""
+        version = self.version + 1
+        self._published_at[0] = time.time()
+        self._version[0] = version
+        self._slots[(version + 1) % 2] = self._slots[version % 2]
+
+    def encoded(self) -> memoryview:
+        """Instantánea publicada en big-endian, en caché por versión (ver ``RegisterImage``)."""
+        while True:
+            version = self.version
+            cached = self._encoded
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            data = self._slots[version % 2].astype(">u2").tobytes()
+            if self.version == version:
+                self._encoded = (version, memoryview(data))
+                return self._encoded[1]
+
+    def write(self, address: int, values: Sequence[int]) -> None:
+        """
+        Escribe valores y los publica, o los reenvía al proceso propietario.
+
+        Args:
+            address: Dirección del primer registro
+            values: Valores de 16 bits a escribir
+        """
+        if self.write_forwarder is not None:
+            self.write_forwarder(address, list(values))
+        else:
+            super().write(address, values)
+
+    def read(self, address: int, count: int = 1) -> np.ndarray:
+        """
+        Lee un rango de la instantánea publicada directamente del segmento compartido.
+
+        Args:
+            address: Dirección del primer registro
+            count: Número de registros
+
+        Returns:
+            Copia de los registros solicitados
+        """
+        return self._consistent_read(lambda words: self.gather(words, address, count))
+
+    def _consistent_read(self, read: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """Aplica ``read`` al buffer frontal y reintenta si hubo una publicación durante la lectura."""
+        while True:
+            version = self.version
+            result = read(self._slots[version % 2])
+            if self.version == version:
+                return result
@@ -0,0 +1,570 @@
+"""
+Almacenamiento persistente de los valores generados, con niveles de agregación.
+
+Cada dispositivo tiene un directorio con un archivo mapeado en memoria
+(``np.memmap``) por nivel:
+
+- ``raw``: una fila por generación (como máximo una cada ``resolution``
+  segundos) con el valor de cada registro.
+- ``1m`` y ``1h``: una fila por minuto y por hora con el mínimo, el máximo y
+  el promedio de cada registro, y la cantidad de muestras agregadas.
+
+Los valores se guardan en float32, salvo los enteros de más de una palabra
+(timestamps, contadores de energía; ver ``wide_columns``), que van en un
+bloque float64 aparte para conservarse exactos.
+
+Los archivos se escriben solo agregando filas; al llegar a su capacidad (la
+retención de cada nivel) se sobrescriben las más antiguas. Cada campo ocupa
+un bloque contiguo del archivo, de modo que las consultas leen solo las
+horas y la columna del registro pedido.
+
+El thread de generación solo copia la fila a una cola (``DeviceStore.record``);
+un thread escritor la vacía cada ``flush_interval`` segundos y escribe el lote
+en todos los niveles. Al cerrar se guardan también los intervalos de agregación
+incompletos, que se retoman al volver a abrir el almacenamiento. Las horas
+de cada nivel nunca retroceden: si el reloj retrocede, las filas se descartan
+hasta que vuelva a superar la última hora guardada (también entre ejecuciones).
+"""
+
+import json
+import math
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config.logging_setup import get_logger
+from src.data_generation.history import downsample_minmax, downsample_rollup, wide_columns
+
+logger = get_logger("store")
+
+# Niveles de agregación: nombre y segundos por fila (0: sin agregar)
+STORE_TIERS = (("raw", 0), ("1m", 60), ("1h", 3600))
+TIER_NAMES = tuple(name for name, _ in STORE_TIERS)
+
+# Retención (segundos) de los niveles agregados; la del nivel raw es configurable
+ROLLUP_RETENTION = {"1m": 30 * 86400, "1h": 365 * 86400}
+
+# Segundos entre dos escrituras del thread escritor
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# Filas pendientes por dispositivo antes de descartar las más antiguas
+MAX_PENDING_ROWS = 10000
+
+_MAGIC = b"VPMTS002"
+# Magia, capacidad, bytes por fila y filas escritas desde la creación
+_HEADER = np.dtype(
+    [("magic", "S8"), ("capacity", "<u8"), ("row_bytes", "<u8"), ("total", "<u8")]
+)
+_HEADER_SIZE = 64
+
+
+class _RingFile:
+    """Archivo mapeado en memoria con un buffer circular de filas, un bloque por campo."""
+
+    def __init__(
+        self, path: str, fields: Sequence[Tuple[str, str, Optional[int]]], capacity: int
+    ):
+        """
+        Abre o crea el archivo.
+
+        Args:
+            path: Ruta del archivo
+            fields: Nombre, tipo NumPy y columnas (None: escalar) de cada campo
+            capacity: Filas guardadas como máximo
+
+        Raises:
+            ValueError: Si el archivo existe con otra capacidad u otro formato
+        """
+        self.path = path
+        self.capacity = capacity
+        blocks = []
+        offset = _HEADER_SIZE
+        row_bytes = 0
+        for name, dtype, columns in fields:
+            shape = (capacity,) if columns is None else (capacity, columns)
+            size = int(np.dtype(dtype).itemsize * (1 if columns is None else columns))
+            blocks.append((name, dtype, shape, offset))
+            row_bytes += size
+            # Bloques alineados a 8 bytes
+            offset += -(-size * capacity // 8) * 8
+
+        if not os.path.exists(path):
+            header = np.zeros(1, dtype=_HEADER)
+            header["magic"], header["capacity"], header["row_bytes"] = _MAGIC, capacity, row_bytes
+            with open(path, "wb") as f:
+                f.write(header.tobytes())
+                # Archivo disperso: el espacio se ocupa a medida que se escriben filas
+                f.truncate(offset)
+
+        self._map = np.memmap(path, dtype=np.uint8, mode="r+")
+        self.header = self._map[: _HEADER.itemsize].view(_HEADER)
+        if (
+            len(self._map) != offset
+            or self.header["magic"][0] != _MAGIC
+            or int(self.header["capacity"][0]) != capacity
+            or int(self.header["row_bytes"][0]) != row_bytes
+        ):
+            raise ValueError(f"{path} tiene otra retención o formato; use otro directorio")
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, dtype, shape, start in blocks:
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            self.arrays[name] = self._map[start : start + size].view(dtype).reshape(shape)
+
+    def newest(self) -> Optional[float]:
+        """Hora de la fila más reciente (None si no hay filas)."""
+        if not len(self):
+            return None
+        return float(self.arrays["t"][(self.total - 1) % self.capacity])
+
+    @property
+    def total(self) -> int:
+        """Filas escritas desde la creación (incluye las ya sobrescritas)."""
+        return int(self.header["total"][0])
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def append(self, batch: Dict[str, np.ndarray]) -> None:
+        """Agrega filas (un arreglo por campo, en orden cronológico)."""
+        count = len(batch["t"])
+        total = self.total
+        # Solo las últimas ``capacity`` filas del lote sobreviven
+        skip = max(count - self.capacity, 0)
+        row = (total + skip) % self.capacity
+        first = min(count - skip, self.capacity - row)
+        for name, array in self.arrays.items():
+            values = batch[name][skip:]
+            array[row : row + first] = values[:first]
+            array[: len(values) - first] = values[first:]
+        self.header["total"] = total + count
+
+    def last(self) -> Dict[str, np.ndarray]:
+        """Copia de cada campo de la última fila."""
+        row = (self.total - 1) % self.capacity
+        return {name: np.array(array[row]) for name, array in self.arrays.items()}
+
+    def replace_last(self, row: Dict[str, np.ndarray]) -> None:
+        """Reescribe la última fila en su lugar (sin cambiar ``total`` ni el orden)."""
+        index = (self.total - 1) % self.capacity
+        for name, array in self.arrays.items():
+            array[index] = row[name]
+
+    def window(self, start: Optional[float], end: Optional[float]) -> np.ndarray:
+        """
+        Filas de una ventana de tiempo, en orden cronológico.
+
+        Returns:
+            Índices de las filas (incluye los extremos de la ventana)
+        """
+        count = len(self)
+        first = self.total - count
+        order = (np.arange(first, self.total) % self.capacity).astype(np.intp)
+        times = self.arrays["t"][order]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = count if end is None else int(np.searchsorted(times, end, side="right"))
+        return order[lo:hi]
+
+    def oldest(self) -> Optional[float]:
+        """Hora de la fila más antigua (None si no hay filas)."""
+        if not len(self):
+            return None
+        return float(self.arrays["t"][(self.total - len(self)) % self.capacity])
+
+    def flush(self) -> None:
+        """Escribe las páginas modificadas en disco."""
+        self._map.flush()
+
+    def disk_usage(self) -> int:
+        """Bytes del archivo (tamaño lógico; el archivo es disperso)."""
+        return len(self._map)
+
+
+class _Columns:
+    """Reparte las columnas de un dispositivo entre un bloque float32 y uno float64."""
+
+    def __init__(self, registers: Sequence):
+        wide = wide_columns(registers)
+        self.count = len(registers)
+        self.narrow = np.flatnonzero(~wide)
+        self.wide = np.flatnonzero(wide)
+
+    def fields(self, name: str) -> List[Tuple[str, str, int]]:
+        """Campos de ``_RingFile`` de un valor: ``name`` (float32) y ``name64`` (float64)."""
+        return [(name, "<f4", len(self.narrow)), (f"{name}64", "<f8", len(self.wide))]
+
+    def split(self, name: str, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """Separa valores (..., columnas) en los dos campos de ``fields``."""
+        return {
+            name: values[..., self.narrow].astype(np.float32),
+            f"{name}64": values[..., self.wide].astype(np.float64),
+        }
+
+    def join(self, name: str, row: Dict[str, np.ndarray]) -> np.ndarray:
+        """Reúne los dos campos de una fila en un arreglo float64 de todas las columnas."""
+        values = np.empty(self.count)
+        values[self.narrow] = row[name]
+        values[self.wide] = row[f"{name}64"]
+        return values
+
+    def locate(self, index: int) -> Tuple[str, int]:
+        """Sufijo del campo (``""`` o ``"64"``) y posición de una columna."""
+        if index in self.wide:
+            return "64", int(np.searchsorted(self.wide, index))
+        return "", int(np.searchsorted(self.narrow, index))
+
+
+class _Rollup:
+    """Agregación por intervalos de ``seconds`` segundos sobre un ``_RingFile``."""
+
+    def __init__(self, ring: _RingFile, seconds: int, columns: _Columns):
+        self.ring = ring
+        self.seconds = seconds
+        self.columns = columns
+        self.bucket: Optional[float] = None
+        self.count = 0
+        self.min = np.full(columns.count, np.nan)
+        self.max = np.full(columns.count, np.nan)
+        self.sum = np.zeros(columns.count)
+        # True si el intervalo en curso ya tiene fila en el archivo: se reescribe
+        # en su lugar, de modo que ``total`` y el orden de las filas no cambian
+        self.stored = False
+        # Retomar la última fila, que puede ser el intervalo guardado incompleto al
+        # cerrar (si estaba completo, se reescribe igual al llegar el siguiente)
+        if len(ring):
+            last = ring.last()
+            self.stored = True
+            self.bucket = float(last["t"])
+            self.count = int(last["count"])
+            self.min = columns.join("min", last)
+            self.max = columns.join("max", last)
+            self.sum = columns.join("avg", last) * self.count
+
+    def add(self, times: np.ndarray, values: np.ndarray) -> None:
+        """Agrega filas crudas; escribe los intervalos que se completaron."""
+        buckets = np.floor(times / self.seconds) * self.seconds
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        counts = np.diff(np.append(starts, len(times)))
+        mins = np.fmin.reduceat(values, starts, axis=0)
+        maxs = np.fmax.reduceat(values, starts, axis=0)
+        sums = np.add.reduceat(values, starts, axis=0)
+
+        replaced = None
+        closed = []
+        for index, bucket in enumerate(buckets[starts]):
+            if self.bucket is not None and bucket != self.bucket:
+                if self.stored:
+                    replaced, self.stored = self._row(), False
+                else:
+                    closed.append(self._row())
+                self.bucket = None
+            if self.bucket is None:
+                self.bucket, self.count = bucket, int(counts[index])
+                self.min, self.max, self.sum = mins[index], maxs[index], sums[index]
+            else:
+                self.count += int(counts[index])
+                self.min = np.fmin(self.min, mins[index])
+                self.max = np.fmax(self.max, maxs[index])
+                self.sum = self.sum + sums[index]
+        if replaced is not None:
+            self.ring.replace_last(replaced)
+        if closed:
+            self.ring.append({name: np.stack([row[name] for row in closed]) for name in closed[0]})
+
+    def close(self) -> None:
+        """Guarda el intervalo en curso aunque esté incompleto."""
+        if self.bucket is None:
+            return
+        row = self._row()
+        if self.stored:
+            self.ring.replace_last(row)
+        else:
+            self.ring.append({name: np.asarray(value)[None] for name, value in row.items()})
+            self.stored = True
+
+    def _row(self) -> Dict[str, np.ndarray]:
+        """Fila del intervalo en curso."""
+        return {
+            "t": np.float64(self.bucket),
+            "count": np.uint32(self.count),
+            **self.columns.split("min", self.min),
+            **self.columns.split("max", self.max),
+            **self.columns.split("avg", self.sum / self.count),
+        }
+
+
+class DeviceStore:
+    """Niveles de almacenamiento de un dispositivo y su cola de filas pendientes."""
+
+    def __init__(
+        self, directory: str, registers: Sequence, raw_capacity: int, resolution: float
+    ):
+        """
+        Abre o crea el almacenamiento de un dispositivo.
+
+        Args:
+            directory: Directorio del dispositivo
+            registers: Registros del plan (ver RegisterPlan.registers), en orden de columna
+            raw_capacity: Filas del nivel raw
+            resolution: Segundos mínimos entre dos filas del nivel raw
+
+        Raises:
+            ValueError: Si el directorio guarda otros registros u otra retención
+        """
+        os.makedirs(directory, exist_ok=True)
+        addresses = [reg.address for reg in registers]
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                if json.load(f)["addresses"] != addresses:
+                    raise ValueError(f"{directory} guarda otros registros; use otro directorio")
+        else:
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"addresses": addresses, "resolution": resolution}, f)
+
+        self.directory = directory
+        self.resolution = resolution
+        # Campo (sufijo) y posición de cada registro
+        self._split = _Columns(registers)
+        self.columns: Dict[int, Tuple[str, int]] = {
+            address: self._split.locate(index) for index, address in enumerate(addresses)
+        }
+        # Los enteros se guardan truncados, como los codifica la imagen
+        self._integer = np.array([reg.codec.integer for reg in registers], dtype=bool)
+        self.raw = _RingFile(
+            os.path.join(directory, "raw.bin"),
+            [("t", "<f8", None)] + self._split.fields("value"),
+            raw_capacity,
+        )
+        self.rollups: Dict[str, _Rollup] = {}
+        for name, seconds in STORE_TIERS[1:]:
+            ring = _RingFile(
+                os.path.join(directory, f"{name}.bin"),
+                [("t", "<f8", None), ("count", "<u4", None)]
+                + self._split.fields("min")
+                + self._split.fields("max")
+                + self._split.fields("avg"),
+                ROLLUP_RETENTION[name] // seconds,
+            )
+            self.rollups[name] = _Rollup(ring, seconds, self._split)
+
+        self._pending: Deque[Tuple[float, np.ndarray]] = deque(maxlen=MAX_PENDING_ROWS)
+        # Las horas no retroceden ni entre ejecuciones: continuar desde la última guardada
+        newest = self.raw.newest()
+        self._last_record = -math.inf if newest is None else newest
+        self.dropped = 0
+        # Escritura (thread escritor) frente a consultas (loop de la interfaz web)
+        self._lock = threading.Lock()
+
+    def record(self, timestamp: float, values: np.ndarray) -> bool:
+        """
+        Encola una fila si pasaron ``resolution`` segundos desde la anterior.
+
+        Se llama desde el thread de generación: solo copia los valores. Las
+        filas anteriores a la última encolada (el reloj retrocedió) se descartan.
+
+        Args:
+            timestamp: Hora de la generación (time.time)
+            values: Valores de todos los registros, alineados con el plan
+
+        Returns:
+            True si se encoló la fila
+        """
+        if timestamp < self._last_record or timestamp - self._last_record < self.resolution:
+            return False
+        self._last_record = timestamp
+        row = values.astype(np.float64)
+        if self._integer.any():
+            row[self._integer] = np.trunc(row[self._integer])
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append((timestamp, row))
+        return True
+
+    def flush(self) -> int:
+        """
+        Escribe las filas pendientes en todos los niveles.
+
+        Returns:
+            Filas escritas
+        """
+        rows = []
+        while self._pending:
+            rows.append(self._pending.popleft())
+        if not rows:
+            return 0
+        times = np.array([timestamp for timestamp, _ in rows], dtype=np.float64)
+        values = np.stack([row for _, row in rows])
+        with self._lock:
+            self.raw.append({"t": times, **self._split.split("value", values)})
+            for rollup in self.rollups.values():
+                rollup.add(times, values)
+        return len(rows)
+
+    def close(self) -> None:
+        """Escribe lo pendiente, guarda los intervalos en curso y sincroniza los archivos."""
+        self.flush()
+        with self._lock:
+            for rollup in self.rollups.values():
+                rollup.close()
+            for ring in self._rings():
+                ring.flush()
+
+    def _rings(self) -> List[_RingFile]:
+        return [self.raw] + [rollup.ring for rollup in self.rollups.values()]
+
+    def choose_tier(self, start: Optional[float]) -> str:
+        """Nivel más detallado cuya retención cubre desde ``start``."""
+        for name, ring in zip(TIER_NAMES, self._rings()):
+            oldest = ring.oldest()
+            if oldest is not None and (start is None or start >= oldest):
+                return name
+        return TIER_NAMES[-1]
+
+    def query(
+        self,
+        address: int,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        tier: str = "auto",
+        points: int = 500,
+    ) -> Dict:
+        """
+        Consulta un registro en una ventana de tiempo, reducido a ``points`` intervalos.
+
+        Args:
+            address: Dirección del registro
+            start: Hora inicial en segundos Unix (incluida; None: desde la más antigua)
+            end: Hora final (incluida; None: hasta la más reciente)
+            tier: Nivel (ver TIER_NAMES), o "auto" para elegirlo según ``start``
+            points: Intervalos como máximo
+
+        Returns:
+            Nivel usado, filas leídas y hora, mínimo, máximo y promedio de cada intervalo
+
+        Raises:
+            KeyError: Si el registro no está en el almacenamiento
+            ValueError: Si el nivel no existe
+        """
+        suffix, column = self.columns[address]
+        if tier != "auto" and tier not in TIER_NAMES:
+            raise ValueError(f"Nivel desconocido: {tier}")
+        with self._lock:
+            if tier == "auto":
+                tier = self.choose_tier(start)
+            if tier == "raw":
+                rows = self.raw.window(start, end)
+                arrays = self.raw.arrays
+                values = arrays[f"value{suffix}"][rows, column].astype(np.float64)
+                series = downsample_minmax(arrays["t"][rows], values, points)
+            else:
+                ring = self.rollups[tier].ring
+                rows = ring.window(start, end)
+                arrays = ring.arrays
+                series = downsample_rollup(
+                    arrays["t"][rows],
+                    arrays[f"min{suffix}"][rows, column].astype(np.float64),
+                    arrays[f"max{suffix}"][rows, column].astype(np.float64),
+                    arrays[f"avg{suffix}"][rows, column].astype(np.float64),
+                    arrays["count"][rows],
+                    points,
+                )
+        return {"tier": tier, "rows": len(rows), **series}
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Filas guardadas por nivel, filas pendientes y descartadas, y bytes en disco."""
+        stats = {name: len(ring) for name, ring in zip(TIER_NAMES, self._rings())}
+        stats.update(
+            pending=len(self._pending),
+            dropped=self.dropped,
+            disk_bytes=sum(ring.disk_usage() for ring in self._rings()),
+        )
+        return stats
+
+
+class TimeSeriesStore:
+    """Almacenamiento de la flota: un ``DeviceStore`` por dispositivo y el thread escritor."""
+
+    def __init__(
+        self,
+        directory: str,
+        retention: float,
+        resolution: float = 1.0,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """
+        Inicializa el almacenamiento (los dispositivos se abren con ``device``).
+
+        Args:
+            directory: Directorio raíz (un subdirectorio por dispositivo)
+            retention: Segundos que se conservan en el nivel raw
+            resolution: Segundos mínimos entre dos filas del nivel raw
+            flush_interval: Segundos entre dos escrituras del thread escritor
+        """
+        if retention <= 0 or resolution <= 0:
+            raise ValueError("La retención y la resolución deben ser mayores que 0")
+        self.directory = directory
+        self.resolution = resolution
+        self.raw_capacity = max(int(math.ceil(retention / resolution)), 1)
+        self.flush_interval = flush_interval
+        self.devices: Dict[int, DeviceStore] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def device(self, device_id: int, registers: Sequence) -> DeviceStore:
+        """
+        Abre (o crea) el almacenamiento de un dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            registers: Registros del plan, en orden de columna
+        """
+        store = DeviceStore(
+            os.path.join(self.directory, f"device_{device_id}"),
+            registers,
+            self.raw_capacity,
+            self.resolution,
+        )
+        self.devices[device_id] = store
+        return store
+
+    def start(self) -> None:
+        """Arranca el thread escritor."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vpm-store", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """Escribe las filas pendientes de todos los dispositivos."""
+        written = 0
+        for device_id, store in list(self.devices.items()):
+            try:
+                written += store.flush()
+            except Exception as e:
+                logger.error("Error guardando los valores del dispositivo %s: %s", device_id, e)
+        return written
+
+    def close(self) -> None:
+        """Detiene el thread escritor y cierra todos los dispositivos."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for store in self.devices.values():
+            store.close()
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Totales de ``DeviceStore.get_statistics`` de todos los dispositivos."""
+        totals: Dict[str, int] = {"devices": len(self.devices)}
+        for store in self.devices.values():
+            for name, value in store.get_statistics().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
@@ -0,0 +1,570 @@
+"""
+Prueba de carga del servidor Modbus con clientes TCP asíncronos.
+
+Inicia ``ModbusServerManager`` en localhost (en un proceso aparte, para que el
+costo de los clientes no se mida como costo del servidor), lanza N clientes
+concurrentes que leen los rangos definidos por las tablas de registros y
+reporta peticiones por segundo y latencias p50/p95/p99 por función Modbus.
+
+Con ``--generation`` mide en cambio el loop de actualización sin servidor ni
+clientes: frecuencia de actualización lograda por dispositivo, uso de CPU del
+proceso y duración y jitter de los ciclos. Sirve para verificar los modos de
+alta frecuencia (ej: ``-t 10ms`` para 100 Hz).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pymodbus
+from pymodbus.client import AsyncModbusTcpClient
+
+from src.config.cli_parser import parse_interval
+from src.config.settings import (
+    DEFAULT_CONFIG,
+    DEFAULT_TEMPLATES,
+    MAX_UNIT_ID,
+    MIN_UPDATE_INTERVAL,
+    STAGGER_POLICIES,
+)
+from src.data_generation.device_template import DeviceTemplate
+from src.data_generation.register_loader import load_register_table
+
+# Máximo de registros por lectura según la especificación Modbus
+MAX_READ_COUNT = 0x7D
+
+# Segundos que se espera la detención ordenada del servidor antes de forzarla
+SERVER_STOP_TIMEOUT = 30.0
+
+# Funciones Modbus soportadas por la prueba de carga
+FUNCTION_NAMES = {3: "read_holding_registers", 4: "read_input_registers"}
+
+
+@dataclass
+class BenchmarkConfig:
+    """Parámetros de una prueba de carga."""
+
+    devices: int = 1
+    templates: List[str] = field(default_factory=lambda: list(DEFAULT_TEMPLATES))
+    clients: int = 10
+    duration: float = 10.0
+    warmup: float = 1.0
+    function_codes: List[int] = field(default_factory=lambda: [3, 4])
+    max_count: int = MAX_READ_COUNT
+    host: str = "127.0.0.1"
+    port: int = 15020
+    update_interval: float = 1
+    workers: int = 0
+    lazy: bool = False
+    fast_read: bool = False
+    response_cache: int = 0
+    stagger: str = DEFAULT_CONFIG.stagger
+
+
+@dataclass
+class ReadTarget:
+    """Lectura que repiten los clientes: unit ID, dirección (del cliente) y cantidad."""
+
+    port: int
+    unit_id: int
+    address: int
+    count: int
+
+
+def summarize_latencies(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Resume las latencias de una función Modbus.
+
+    Args:
+        latencies: Latencias de las peticiones exitosas, en segundos
+        elapsed: Duración de la medición en segundos
+
+    Returns:
+        Peticiones por segundo y latencias (ms): media, p50, p95, p99 y máxima
+    """
+    if not latencies:
+        return {"requests": 0, "requests_per_second": 0.0}
+
+    values = np.asarray(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(values.max()),
+    }
+
+
+def build_targets(config: BenchmarkConfig) -> List[ReadTarget]:
+    """
+    Calcula las lecturas de la prueba a partir de las tablas de registros.
+
+    Cada dispositivo lee cada rango contiguo de su plantilla en bloques de
+    hasta ``max_count`` registros. Los unit IDs y puertos siguen el mismo
+    reparto que el servidor en modo flota.
+
+    Args:
+        config: Parámetros de la prueba
+
+    Returns:
+        Lista de lecturas
+    """
+    layouts = {}
+    for filename in config.templates:
+        if filename not in layouts:
+            path = os.path.join(DEFAULT_CONFIG.register_tables_dir, filename)
+            layouts[filename] = DeviceTemplate(filename, load_register_table(path)).layout
+
+    targets = []
+    units_per_endpoint = MAX_UNIT_ID
+    for index in range(config.devices):
+        endpoint, offset = divmod(index, units_per_endpoint)
+        layout = layouts[config.templates[index % len(config.templates)]]
+        for start, length in layout.spans:
+            for address in range(start, start + length, config.max_count):
+                count = min(config.max_count, start + length - address)
+                # El servidor suma 1 a la dirección pedida (zero_mode=False)
+                targets.append(ReadTarget(config.port + endpoint, 1 + offset, address - 1, count))
+    return targets
+
+
+def _run_server(config: BenchmarkConfig, stop: Any) -> None:
+    """
+    Ejecuta el simulador en el proceso hijo (sin la salida de cada actualización).
+
+    El proceso no es daemon para que ``--workers`` pueda crear sus procesos
+    generadores; termina cuando el padre activa ``stop``, pasando por
+    ``shutdown`` para detener los trabajadores y liberar la memoria compartida.
+    """
+    from src.modbus.server import ModbusServerManager
+
+    args = SimpleNamespace(
+        protocol="tcp",
+        host=config.host,
+        port=config.port,
+        unit_id=1,
+        slave_id=1,
+        devices=config.devices,
+        templates=config.templates,
+        update_interval=config.update_interval,
+        verbose=False,
+        lazy=config.lazy,
+        lazy_ttl=None,
+        workers=config.workers,
+        fast_read=config.fast_read,
+        response_cache=config.response_cache,
+        stagger=config.stagger,
+    )
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(_serve_until(ModbusServerManager(args), stop))
+
+
+async def _serve_until(manager: Any, stop: Any) -> None:
+    """Sirve hasta que se active ``stop`` (o el servidor termine) y lo detiene ordenadamente."""
+    serve = asyncio.create_task(manager.serve())
+    waiter = asyncio.get_running_loop().run_in_executor(None, stop.wait)
+    await asyncio.wait({serve, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    # Libera el thread que espera si el servidor terminó por su cuenta
+    stop.set()
+    # Un shutdown durante la inicialización no detiene lo que arranque después: reintentar
+    while not serve.done():
+        await manager.shutdown()
+        await asyncio.wait({serve}, timeout=0.5)
+    await serve
+
+
+def _wait_for_port(host: str, port: int, timeout: float, process: Any = None) -> None:
+    """
+    Espera a que el servidor acepte conexiones.
+
+    Raises:
+        TimeoutError: Si no acepta conexiones en ``timeout`` segundos
+        RuntimeError: Si el proceso del servidor termina antes
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection((host, port), timeout=0.5):
+            return
+        if process is not None and not process.is_alive():
+            raise RuntimeError(
+                f"El servidor terminó antes de aceptar conexiones (código {process.exitcode})"
+            )
+        time.sleep(0.1)
+    raise TimeoutError(f"El servidor no aceptó conexiones en {host}:{port}")
+
+
+async def _client_worker(
+    config: BenchmarkConfig,
+    targets: List[ReadTarget],
+    start_at: float,
+    stop_at: float,
+    latencies: Dict[int, List[float]],
+    errors: Dict[int, int],
+) -> None:
+    """Cliente que repite sus lecturas hasta ``stop_at`` y registra las latencias."""
+    client = AsyncModbusTcpClient(config.host, port=targets[0].port)
+    await client.connect()
+    try:
+        step = 0
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            target = targets[step % len(targets)]
+            function_code = config.function_codes[step % len(config.function_codes)]
+            step += 1
+
+            read = getattr(client, FUNCTION_NAMES[function_code])
+            sent = time.perf_counter()
+            try:
+                response = await read(target.address, target.count, slave=target.unit_id)
+                failed = response.isError()
+            except Exception:
+                failed = True
+            received = time.perf_counter()
+
+            # Las peticiones del calentamiento no se cuentan
+            if sent < start_at:
+                continue
+            if failed:
+                errors[function_code] += 1
+            else:
+                latencies[function_code].append(received - sent)
+    finally:
+        client.close()
+
+
+async def run_load(config: BenchmarkConfig, targets: List[ReadTarget]) -> Dict[str, Any]:
+    """
+    Ejecuta los clientes contra un servidor ya iniciado.
+
+    Args:
+        config: Parámetros de la prueba
+        targets: Lecturas a repetir (ver ``build_targets``)
+
+    Returns:
+        Resultados por función Modbus y totales
+    """
+    # Cada cliente se conecta a un solo puerto y recorre las lecturas de ese puerto
+    by_port: Dict[int, List[ReadTarget]] = {}
+    for target in targets:
+        by_port.setdefault(target.port, []).append(target)
+    ports = sorted(by_port)
+
+    latencies: Dict[int, List[float]] = {fc: [] for fc in config.function_codes}
+    errors: Dict[int, int] = {fc: 0 for fc in config.function_codes}
+    start_at = time.perf_counter() + config.warmup
+    stop_at = start_at + config.duration
+
+    workers = []
+    for index in range(config.clients):
+        port_targets = by_port[ports[index % len(ports)]]
+        # Desfasar los clientes para que no lean todos el mismo rango a la vez
+        offset = (index // len(ports)) % len(port_targets)
+        rotated = port_targets[offset:] + port_targets[:offset]
+        workers.append(_client_worker(config, rotated, start_at, stop_at, latencies, errors))
+    await asyncio.gather(*workers)
+
+    results: Dict[str, Any] = {"function_codes": {}}
+    total_requests = 0
+    for function_code in config.function_codes:
+        summary = summarize_latencies(latencies[function_code], config.duration)
+        summary["errors"] = errors[function_code]
+        results["function_codes"][str(function_code)] = summary
+        total_requests += summary["requests"]
+    results["requests"] = total_requests
+    results["requests_per_second"] = total_requests / config.duration
+    results["errors"] = sum(errors.values())
+    return results
+
+
+def run_benchmark(config: BenchmarkConfig) -> Dict[str, Any]:
+    """
+    Inicia el simulador, ejecuta la prueba de carga y lo detiene.
+
+    Args:
+        config: Parámetros de la prueba
+
+    Returns:
+        Resultados con la configuración y el entorno de la medición
+    """
+    targets = build_targets(config)
+    if not targets:
+        raise ValueError("Las plantillas no definen registros para leer")
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    server = context.Process(target=_run_server, args=(config, stop))
+    server.start()
+    try:
+        _wait_for_port(config.host, config.port, timeout=60, process=server)
+        results = asyncio.run(run_load(config, targets))
+    finally:
+        stop.set()
+        server.join(timeout=SERVER_STOP_TIMEOUT)
+        if server.is_alive():
+            server.terminate()
+            server.join(timeout=5)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "pymodbus": pymodbus.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": asdict(config),
+        "targets": len(targets),
+        "results": results,
+    }
+
+
+async def _measure_generation(manager: Any, config: BenchmarkConfig) -> Dict[str, Any]:
+    """Ejecuta el loop de actualización de ``manager`` y mide el intervalo de medición."""
+    manager._running = True
+    loop_task = asyncio.create_task(manager._update_registers_loop())
+    try:
+        await asyncio.sleep(config.warmup)
+        epochs = [generator.epoch for generator in manager.generators]
+        ticks = manager.timings.ticks.total
+        overruns = manager.timings.overruns
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+
+        await asyncio.sleep(config.duration)
+
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        updates = [g.epoch - start for g, start in zip(manager.generators, epochs)]
+        timing = manager.timings.get_statistics()
+        ticks = manager.timings.ticks.total - ticks
+        overruns = manager.timings.overruns - overruns
+    finally:
+        manager._running = False
+        loop_task.cancel()
+        await asyncio.gather(loop_task, return_exceptions=True)
+
+    def milliseconds(summary: Dict[str, Any], name: str) -> Optional[float]:
+        value = summary[name]
+        return None if value is None else value * 1000.0
+
+    return {
+        "target_hz": 1.0 / config.update_interval,
+        "updates_per_second": float(np.mean(updates)) / wall if updates else 0.0,
+        "min_updates_per_second": min(updates) / wall if updates else 0.0,
+        "ticks_per_second": ticks / wall,
+        "cpu_percent": 100.0 * cpu / wall,
+        "tick_p99_ms": milliseconds(timing["tick"], "p99"),
+        "tick_max_ms": milliseconds(timing["tick"], "max"),
+        "jitter_p99_ms": milliseconds(timing["jitter"], "p99"),
+        "overruns": overruns,
+    }
+
+
+def run_generation_benchmark(config: BenchmarkConfig) -> Dict[str, Any]:
+    """
+    Mide el loop de actualización en este proceso (sin servidor Modbus).
+
+    Args:
+        config: Parámetros de la prueba (dispositivos, plantillas, intervalo,
+            calentamiento y duración)
+
+    Returns:
+        Resultados con la configuración y el entorno de la medición
+    """
+    from src.modbus.server import ModbusServerManager
+
+    args = SimpleNamespace(
+        protocol="tcp",
+        host=config.host,
+        port=config.port,
+        unit_id=1,
+        slave_id=1,
+        devices=config.devices,
+        templates=config.templates,
+        update_interval=config.update_interval,
+        verbose=False,
+        stagger=config.stagger,
+    )
+    manager = ModbusServerManager(args)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        manager.initialize_generators()
+        if not manager.generators:
+            raise ValueError("No se pudieron inicializar los dispositivos")
+        results = asyncio.run(_measure_generation(manager, config))
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": asdict(config),
+        "registers": sum(len(g.register_definitions) for g in manager.generators),
+        "results": results,
+    }
+
+
+def print_generation_report(report: Dict[str, Any]) -> None:
+    """Imprime los resultados de una medición del loop de actualización."""
+    config = report["config"]
+    results = report["results"]
+
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.2f} ms"
+
+    print("=" * 60)
+    print("⏱️  Virtual Power Meter - Medición del loop de actualización")
+    print("=" * 60)
+    print(
+        f"📊 Dispositivos: {config['devices']} | Registros: {report['registers']} | "
+        f"Intervalo: {config['update_interval'] * 1000:g} ms ({results['target_hz']:.1f} Hz)"
+    )
+    print(
+        f"🔄 Actualizaciones: {results['updates_per_second']:.1f}/s por dispositivo "
+        f"(mínimo {results['min_updates_per_second']:.1f}/s)"
+    )
+    print(
+        f"🧮 CPU: {results['cpu_percent']:.1f}% de un núcleo | "
+        f"ciclo p99 {ms(results['tick_p99_ms'])} | jitter p99 {ms(results['jitter_p99_ms'])} | "
+        f"excedidos {results['overruns']}"
+    )
+    print("=" * 60)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Imprime los resultados de una prueba de carga."""
+    config = report["config"]
+    results = report["results"]
+    print("=" * 60)
+    print("📈 Virtual Power Meter - Prueba de carga Modbus")
+    print("=" * 60)
+    print(
+        f"📊 Dispositivos: {config['devices']} | Clientes: {config['clients']} | "
+        f"Duración: {config['duration']}s | Lecturas distintas: {report['targets']}"
+    )
+    print(
+        f"🚀 Total: {results['requests_per_second']:.0f} peticiones/s ({results['errors']} errores)"
+    )
+    for function_code, summary in results["function_codes"].items():
+        if not summary["requests"]:
+            print(f"  FC{function_code}: sin respuestas ({summary['errors']} errores)")
+            continue
+        print(
+            f"  FC{function_code}: {summary['requests_per_second']:.0f} peticiones/s | "
+            f"p50 {summary['p50_ms']:.2f} ms | p95 {summary['p95_ms']:.2f} ms | "
+            f"p99 {summary['p99_ms']:.2f} ms | errores {summary['errors']}"
+        )
+    print("=" * 60)
+
+
+def save_report(report: Dict[str, Any], path: str) -> None:
+    """Guarda los resultados en un archivo JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Crea el parser de argumentos de la prueba de carga."""
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(
+        description="Virtual Power Meter - Prueba de carga del servidor Modbus TCP"
+    )
+    parser.add_argument("-d", "--devices", type=int, default=defaults.devices)
+    parser.add_argument(
+        "-T",
+        "--templates",
+        type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+        default=defaults.templates,
+        help="Plantillas de registros separadas por coma",
+    )
+    parser.add_argument("-c", "--clients", type=int, default=defaults.clients)
+    parser.add_argument("-D", "--duration", type=float, default=defaults.duration)
+    parser.add_argument("--warmup", type=float, default=defaults.warmup)
+    parser.add_argument(
+        "-f",
+        "--function-codes",
+        type=lambda value: [int(fc) for fc in value.split(",")],
+        default=defaults.function_codes,
+        help="Funciones Modbus separadas por coma (3, 4)",
+    )
+    parser.add_argument(
+        "--max-count",
+        type=int,
+        default=defaults.max_count,
+        help="Máximo de registros por lectura",
+    )
+    parser.add_argument("-p", "--port", type=int, default=defaults.port)
+    parser.add_argument(
+        "-t", "--update-interval", type=parse_interval, default=defaults.update_interval
+    )
+    parser.add_argument("-w", "--workers", type=int, default=defaults.workers)
+    parser.add_argument("--lazy", action="store_true")
+    parser.add_argument("--fast-read", action="store_true")
+    parser.add_argument("--response-cache", type=int, default=defaults.response_cache)
+    parser.add_argument("--stagger", choices=STAGGER_POLICIES, default=defaults.stagger)
+    parser.add_argument(
+        "--generation",
+        action="store_true",
+        help="Medir solo el loop de actualización (frecuencia lograda y CPU), sin clientes",
+    )
+    parser.add_argument("-o", "--output", help="Archivo JSON donde guardar los resultados")
+    return parser
+
+
+def parse_benchmark_arguments(argv: Optional[List[str]] = None) -> Tuple[BenchmarkConfig, Any]:
+    """
+    Parsea y valida los argumentos de la prueba de carga.
+
+    Returns:
+        Tupla (configuración, argumentos parseados)
+
+    Raises:
+        ValueError: Si algún argumento es inválido
+    """
+    args = create_argument_parser().parse_args(argv)
+    unknown = set(args.function_codes) - set(FUNCTION_NAMES)
+    if unknown:
+        raise ValueError(f"Funciones Modbus no soportadas: {sorted(unknown)}")
+    if args.clients < 1 or args.duration <= 0:
+        raise ValueError("--clients debe ser al menos 1 y --duration mayor que 0")
+    if args.update_interval < MIN_UPDATE_INTERVAL:
+        raise ValueError(f"--update-interval debe ser al menos {MIN_UPDATE_INTERVAL * 1000:g} ms")
+    if not 1 <= args.max_count <= MAX_READ_COUNT:
+        raise ValueError(f"--max-count debe estar entre 1 y {MAX_READ_COUNT}")
+
+    config = BenchmarkConfig(
+        devices=args.devices,
+        templates=args.templates,
+        clients=args.clients,
+        duration=args.duration,
+        warmup=args.warmup,
+        function_codes=args.function_codes,
+        max_count=args.max_count,
+        port=args.port,
+        update_interval=args.update_interval,
+        workers=args.workers,
+        lazy=args.lazy,
+        fast_read=args.fast_read,
+        response_cache=args.response_cache,
+        stagger=args.stagger,
+    )
+    return config, args
@@ -0,0 +1,90 @@
+"""
+Bloques de datos Modbus respaldados por imágenes de registros.
+"""
+
+from typing import Callable, List, Optional
+
+from pymodbus.datastore.store import BaseModbusDataBlock
+
+from src.data_generation.register_image import RegisterImage
+
+
+class RegisterImageDataBlock(BaseModbusDataBlock):
+    """
+    Bloque de datos compatible con pymodbus que sirve lecturas desde una
+    ``RegisterImage``.
+
+    Las lecturas toman la instantánea publicada sin bloquearse; las escrituras
+    de clientes Modbus se aplican al buffer trasero y se publican de inmediato.
+    Todo el espacio de direcciones de la imagen es válido, aunque solo se
+    almacenan los rangos de su layout (el resto se lee como cero).
+
+    Si se asigna ``on_read``, se invoca con ``(address, count)`` antes de cada
+    lectura, lo que permite generar los valores bajo demanda.
+    """
+
+    def __init__(self, image: RegisterImage):
+        """
+        Inicializa el bloque de datos.
+
+        Args:
+            image: Imagen de registros a exponer
+        """
+        self.image = image
+        self.address = image.base_address
+        self.default_value = 0
+        self.on_read: Optional[Callable[[int, int], object]] = None
+
+    def validate(self, address: int, count: int = 1) -> bool:
+        """Verifica que el rango solicitado esté dentro de la imagen."""
+        start = address - self.address
+        return start >= 0 and count >= 0 and start + count <= self.image.size
+
+    @property
+    def epoch(self) -> int:
+        """Número de publicaciones de la imagen (cambia con cada actualización)."""
+        return self.image.version
+
+    def prepare(self, address: int, count: int = 1) -> None:
+        """Invoca ``on_read`` (si está asignado) antes de leer un rango."""
+        if self.on_read is not None:
+            self.on_read(address, count)
+
+    def getValues(self, address: int, count: int = 1) -> List[int]:
+        """Devuelve los valores de la instantánea publicada."""
+        self.prepare(address, count)
+        return self.image.read(address, count).tolist()
+
+    def getEncoded(self, address: int, count: int = 1) -> Optional[memoryview]:
+        """
+        Devuelve los registros pedidos ya codificados en big-endian, sin copiarlos.
+
+        A diferencia de ``getValues``, no invoca ``on_read``: el llamador debe
+        usar ``prepare`` antes.
+
+        Args:
+            address: Dirección del primer registro
+            count: Número de registros
+
+        Returns:
+            Vista de ``2 * count`` bytes de la instantánea publicada, o None si
+            el rango no está completamente almacenado en un tramo del layout
+            (en ese caso debe usarse ``image.read``)
+        """
+        position = self.image.layout.position(address, count)
+        if position is None:
+            return None
+        return self.image.encoded()[2 * position : 2 * (position + count)]
+
+    def setValues(self, address: int, values) -> None:
+        """Escribe valores en la imagen y los publica."""
+        if not isinstance(values, list):
+            values = [values]
+        self.image.write(address, values)
+
+    def reset(self) -> None:
+        """Restablece todos los registros a cero."""
+        self.image.write(self.address, [self.default_value] * self.image.size)
+
+    def __iter__(self):
+        return enumerate(self.image.read(self.address, self.image.size).tolist(), self.address)
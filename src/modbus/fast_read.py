@@ -0,0 +1,244 @@
+"""
+Atención rápida de lecturas de registros (funciones 3 y 4).
+
+Las peticiones Read Holding Registers y Read Input Registers se responden
+copiando los bytes directamente de la instantánea codificada de la imagen de
+registros (ver ``RegisterImageDataBlock.getEncoded``), sin construir listas de
+valores ni volver a codificarlos. Los contextos cuyos bloques no son imágenes
+de registros siguen el camino normal de pymodbus.
+
+Opcionalmente, las respuestas codificadas se guardan en una caché LRU por
+``(unit_id, función, dirección, cantidad)``, válida mientras no cambie la
+época (número de publicaciones) de la imagen del dispositivo.
+"""
+
+import struct
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from pymodbus.pdu import ModbusExceptions, ModbusResponse
+from pymodbus.register_read_message import (
+    ReadHoldingRegistersRequest,
+    ReadInputRegistersRequest,
+)
+
+from src.modbus.datastore import RegisterImageDataBlock
+
+# Máximo de registros por lectura según la especificación Modbus
+MAX_READ_COUNT = 0x7D
+
+
+class EncodedRegistersResponse(ModbusResponse):
+    """Respuesta de lectura de registros cuyo contenido ya está codificado."""
+
+    def __init__(
+        self,
+        function_code: int,
+        payload: Optional[memoryview] = None,
+        slave: int = 0,
+        encoded: Optional[bytes] = None,
+        **kwargs,
+    ):
+        """
+        Inicializa la respuesta.
+
+        Args:
+            function_code: Función Modbus de la petición (3 o 4)
+            payload: Registros codificados en big-endian (2 bytes por registro)
+            slave: Unit ID del dispositivo
+            encoded: Respuesta ya codificada completa (ej: tomada de la caché);
+                si se indica, ``payload`` se ignora
+        """
+        super().__init__(slave, **kwargs)
+        self.function_code = function_code
+        if encoded is not None:
+            self.payload = memoryview(encoded)[1:]
+            self._encoded = encoded
+        elif payload is not None:
+            self.payload = payload
+
+    def encode(self) -> bytes:
+        """Codifica la respuesta: número de bytes seguido de los registros."""
+        if self._encoded is None:
+            self._encoded = bytes((len(self.payload),)) + self.payload
+        return self._encoded
+
+    def decode(self, data: bytes) -> None:
+        """Decodifica una respuesta de lectura de registros."""
+        self.payload = memoryview(bytes(data[1 : 1 + data[0]]))
+
+    @property
+    def payload(self) -> memoryview:
+        """Registros codificados en big-endian."""
+        return self._payload
+
+    @payload.setter
+    def payload(self, payload: memoryview) -> None:
+        self._payload = payload
+        self._encoded = None
+
+    @property
+    def registers(self) -> List[int]:
+        """Valores de los registros (para trazas y compatibilidad)."""
+        return list(struct.unpack(f">{len(self.payload) // 2}H", self.payload))
+
+    @registers.setter
+    def registers(self, values: List[int]) -> None:
+        self.payload = memoryview(struct.pack(f">{len(values)}H", *values))
+
+
+class ResponseCache:
+    """
+    Caché LRU de respuestas de lectura codificadas.
+
+    Cada entrada guarda la época de la imagen con la que se generó; una entrada
+    con otra época se considera inválida y se reemplaza en la siguiente lectura.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_entries: Número máximo de respuestas guardadas
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, epoch: int) -> Optional[bytes]:
+        """
+        Busca una respuesta vigente.
+
+        Args:
+            key: Clave de la petición
+            epoch: Época actual de la imagen del dispositivo
+
+        Returns:
+            Respuesta codificada, o None si no hay una para esta época
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != epoch:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, epoch: int, encoded: bytes) -> None:
+        """
+        Guarda una respuesta y descarta la menos usada si se supera el máximo.
+
+        Args:
+            key: Clave de la petición
+            epoch: Época de la imagen con la que se generó la respuesta
+            encoded: Respuesta codificada
+        """
+        self._entries[key] = (epoch, encoded)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Devuelve el tamaño y los contadores de la caché."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _fast_execute(
+    request: Any, context: Any, store: str, cache: Optional[ResponseCache]
+) -> Optional[ModbusResponse]:
+    """
+    Atiende una lectura desde la instantánea codificada, si es posible.
+
+    Args:
+        request: Petición de lectura (función 3 o 4)
+        context: Contexto del dispositivo (ModbusSlaveContext)
+        store: Clave del bloque de datos en el contexto ("h" o "i")
+        cache: Caché de respuestas (opcional)
+
+    Returns:
+        Respuesta, o None si la petición debe seguir el camino normal
+    """
+    if not 1 <= request.count <= MAX_READ_COUNT:
+        return request.doException(ModbusExceptions.IllegalValue)
+
+    block = getattr(context, "store", {}).get(store)
+    if not isinstance(block, RegisterImageDataBlock):
+        return None
+
+    # ModbusSlaveContext desplaza las direcciones en uno salvo en zero_mode
+    address = request.address if context.zero_mode else request.address + 1
+    if not block.validate(address, request.count):
+        return request.doException(ModbusExceptions.IllegalAddress)
+
+    # La generación bajo demanda puede publicar y cambiar la época
+    block.prepare(address, request.count)
+    if cache is not None:
+        key = (request.slave_id, request.function_code, request.address, request.count)
+        epoch = block.epoch
+        encoded = cache.get(key, epoch)
+        if encoded is not None:
+            return EncodedRegistersResponse(request.function_code, encoded=encoded)
+
+    payload = block.getEncoded(address, request.count)
+    if payload is None:
+        # El rango cruza huecos del layout: se leen (como cero) y se codifican
+        payload = memoryview(block.image.read(address, request.count).astype(">u2").tobytes())
+    response = EncodedRegistersResponse(request.function_code, payload)
+
+    if cache is not None:
+        cache.put(key, epoch, response.encode())
+    return response
+
+
+class FastReadHoldingRegistersRequest(ReadHoldingRegistersRequest):
+    """Read Holding Registers (función 3) atendida desde la instantánea codificada."""
+
+    #: Caché de respuestas compartida por las peticiones de un servidor
+    cache: Optional[ResponseCache] = None
+
+    def execute(self, context: Any) -> ModbusResponse:
+        response = _fast_execute(self, context, "h", self.cache)
+        return response if response is not None else super().execute(context)
+
+
+class FastReadInputRegistersRequest(ReadInputRegistersRequest):
+    """Read Input Registers (función 4) atendida desde la instantánea codificada."""
+
+    #: Caché de respuestas compartida por las peticiones de un servidor
+    cache: Optional[ResponseCache] = None
+
+    def execute(self, context: Any) -> ModbusResponse:
+        response = _fast_execute(self, context, "i", self.cache)
+        return response if response is not None else super().execute(context)
+
+
+# Peticiones a registrar en el decodificador del servidor
+FAST_READ_FUNCTIONS = [FastReadHoldingRegistersRequest, FastReadInputRegistersRequest]
+
+
+def install_fast_read(server: Any, cache: Optional[ResponseCache] = None) -> None:
+    """
+    Registra los manejadores rápidos de las funciones 3 y 4 en un servidor pymodbus.
+
+    Args:
+        server: Servidor asíncrono (ModbusTcpServer, ModbusSerialServer, ...)
+        cache: Caché de respuestas del servidor (opcional)
+    """
+    for function in FAST_READ_FUNCTIONS:
+        if cache is not None:
+            # Subclase propia del servidor para que sus peticiones usen su caché
+            function = type(function.__name__, (function,), {"cache": cache})
+        server.decoder.register(function)
@@ -0,0 +1,266 @@
+"""
+Métricas de peticiones del servidor Modbus en formato de texto Prometheus.
+
+Los contadores se actualizan en el camino de cada petición (en el loop asyncio
+del servidor, sin locks): peticiones e histograma de latencia por endpoint,
+unit ID y función, excepciones Modbus por código, conexiones TCP activas y
+bytes recibidos/enviados. ``ServerMetrics.render`` genera el texto que expone
+``/metrics`` en la interfaz web o el exportador HTTP independiente
+(``serve_metrics``).
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymodbus.server.async_io import ModbusServerRequestHandler
+
+# Límites superiores (segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+# Tipo de contenido del formato de texto de Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _RequestSeries:
+    """Contadores de las peticiones de un endpoint, unit ID y función."""
+
+    __slots__ = ("count", "total_seconds", "buckets", "exceptions")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        # Un contador por bucket más el de +Inf (no acumulados)
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        # Excepciones Modbus por código
+        self.exceptions: Dict[int, int] = {}
+
+
+class ServerMetrics:
+    """Contadores e histogramas de las peticiones atendidas por los servidores Modbus."""
+
+    def __init__(self):
+        """Inicializa las métricas en cero."""
+        # (endpoint, unit_id, función) -> contadores
+        self._series: Dict[Tuple[str, int, int], _RequestSeries] = {}
+        self.connections_active = 0
+        self.connections_total = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+
+    def observe(
+        self,
+        endpoint: str,
+        unit_id: int,
+        function_code: int,
+        seconds: float,
+        exception_code: Optional[int] = None,
+    ) -> None:
+        """
+        Registra una petición atendida.
+
+        Args:
+            endpoint: Puerto TCP o puerto serial del servidor
+            unit_id: Unit ID de la petición
+            function_code: Función Modbus de la petición
+            seconds: Tiempo de atención (ejecución, codificación y envío)
+            exception_code: Código de la excepción Modbus respondida, si hubo
+        """
+        key = (endpoint, unit_id, function_code)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _RequestSeries()
+        series.count += 1
+        series.total_seconds += seconds
+        series.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if exception_code is not None:
+            series.exceptions[exception_code] = series.exceptions.get(exception_code, 0) + 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Resume las métricas (para ``get_server_stats``).
+
+        Returns:
+            Totales de peticiones, excepciones, conexiones y bytes
+        """
+        series = list(self._series.values())
+        return {
+            "requests": sum(s.count for s in series),
+            "exceptions": sum(sum(s.exceptions.values()) for s in series),
+            "connections_active": self.connections_active,
+            "connections_total": self.connections_total,
+            "bytes_received": self.bytes_received,
+            "bytes_sent": self.bytes_sent,
+        }
+
+    def render(self) -> str:
+        """
+        Genera las métricas en formato de texto Prometheus.
+
+        Returns:
+            Texto de exposición (ver ``CONTENT_TYPE``)
+        """
+        series = sorted(self._series.items())
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(key: Tuple[str, int, int], **extra: Any) -> str:
+            endpoint, unit_id, function_code = key
+            pairs = [
+                f'endpoint="{endpoint}"',
+                f'unit_id="{unit_id}"',
+                f'function_code="{function_code}"',
+            ]
+            pairs += [f'{name}="{value}"' for name, value in extra.items()]
+            return "{" + ",".join(pairs) + "}"
+
+        header("vpm_modbus_requests_total", "counter", "Peticiones Modbus atendidas")
+        for key, s in series:
+            lines.append(f"vpm_modbus_requests_total{labels(key)} {s.count}")
+
+        header(
+            "vpm_modbus_request_duration_seconds",
+            "histogram",
+            "Tiempo de atención de las peticiones Modbus",
+        )
+        for key, s in series:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                cumulative += count
+                lines.append(
+                    f"vpm_modbus_request_duration_seconds_bucket{labels(key, le=bound)} "
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"vpm_modbus_request_duration_seconds_bucket{labels(key, le='+Inf')} {s.count}"
+            )
+            lines.append(f"vpm_modbus_request_duration_seconds_sum{labels(key)} {s.total_seconds}")
+            lines.append(f"vpm_modbus_request_duration_seconds_count{labels(key)} {s.count}")
+
+        header("vpm_modbus_exceptions_total", "counter", "Respuestas de excepción Modbus")
+        for key, s in series:
+            for code, count in sorted(s.exceptions.items()):
+                lines.append(
+                    f"vpm_modbus_exceptions_total{labels(key, exception_code=code)} {count}"
+                )
+
+        header("vpm_modbus_connections_active", "gauge", "Conexiones de clientes abiertas")
+        lines.append(f"vpm_modbus_connections_active {self.connections_active}")
+        header("vpm_modbus_connections_total", "counter", "Conexiones de clientes aceptadas")
+        lines.append(f"vpm_modbus_connections_total {self.connections_total}")
+        header("vpm_modbus_received_bytes_total", "counter", "Bytes recibidos de los clientes")
+        lines.append(f"vpm_modbus_received_bytes_total {self.bytes_received}")
+        header("vpm_modbus_sent_bytes_total", "counter", "Bytes enviados a los clientes")
+        lines.append(f"vpm_modbus_sent_bytes_total {self.bytes_sent}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRequestHandler(ModbusServerRequestHandler):
+    """Manejador de conexión de pymodbus que registra sus peticiones en ``ServerMetrics``."""
+
+    def __init__(self, owner: Any, metrics: ServerMetrics):
+        """
+        Inicializa el manejador.
+
+        Args:
+            owner: Servidor pymodbus que aceptó la conexión
+            metrics: Métricas donde registrar la actividad
+        """
+        super().__init__(owner)
+        self.metrics = metrics
+        # Puerto TCP, o nombre del puerto serial en RTU
+        host, port = owner.comm_params.source_address[:2]
+        self.endpoint = str(port or host)
+        self._connected = False
+        self._response: Any = None
+
+    def callback_connected(self) -> None:
+        super().callback_connected()
+        if not self._connected:
+            self._connected = True
+            self.metrics.connections_active += 1
+            self.metrics.connections_total += 1
+
+    def callback_disconnected(self, call_exc: Optional[Exception]) -> None:
+        if self._connected:
+            self._connected = False
+            self.metrics.connections_active -= 1
+        super().callback_disconnected(call_exc)
+
+    def data_received(self, data: bytes) -> None:
+        self.metrics.bytes_received += len(data)
+        super().data_received(data)
+
+    def send(self, data: bytes, addr: Optional[tuple] = None) -> None:
+        self.metrics.bytes_sent += len(data)
+        super().send(data, addr)
+
+    def server_send(self, message: Any, addr: Any, **kwargs) -> None:
+        self._response = message
+        super().server_send(message, addr, **kwargs)
+
+    def execute(self, request: Any, *addr) -> None:
+        start = time.perf_counter()
+        self._response = None
+        super().execute(request, *addr)
+        elapsed = time.perf_counter() - start
+
+        response = self._response
+        exception_code = None
+        if response is not None and response.function_code & 0x80:
+            exception_code = getattr(response, "exception_code", None)
+        self.metrics.observe(
+            self.endpoint, request.slave_id, request.function_code, elapsed, exception_code
+        )
+
+
+def install_metrics(server: Any, metrics: ServerMetrics) -> None:
+    """
+    Registra la actividad de las conexiones de un servidor pymodbus en ``metrics``.
+
+    Args:
+        server: Servidor asíncrono (ModbusTcpServer, ModbusSerialServer, ...)
+        metrics: Métricas compartidas por los servidores del simulador
+    """
+    server.callback_new_connection = lambda: MetricsRequestHandler(server, metrics)
+
+
+async def serve_metrics(metrics: ServerMetrics, host: str, port: int) -> None:
+    """
+    Exportador HTTP mínimo: responde ``GET /metrics`` hasta ser cancelado.
+
+    Args:
+        metrics: Métricas a exponer
+        host: Dirección donde escuchar
+        port: Puerto HTTP
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            # Descartar las cabeceras de la petición
+            while (await reader.readline()).strip():
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] in ("GET", "HEAD") and parts[1] == "/metrics":
+                status, content_type, body = "200 OK", CONTENT_TYPE, metrics.render().encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"Not Found\n"
+            head = (
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+            ).encode()
+            writer.write(head if parts and parts[0] == "HEAD" else head + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,199 @@
+"""
+Perfilado bajo demanda del simulador en ejecución.
+
+El servidor Modbus, la tarea de actualización y la interfaz web comparten un
+mismo loop asyncio (un solo thread), de modo que activar ``cProfile`` en ese
+thread durante unos segundos captura el costo de la generación y de la
+atención de peticiones sin reiniciar el simulador. ``tracemalloc`` captura de
+forma análoga las asignaciones de memoria hechas durante la ventana.
+
+Solo puede haber una captura activa a la vez (``ProfilerBusy``). Los procesos
+trabajadores (``--workers``) no se incluyen.
+"""
+
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import tracemalloc
+from typing import Optional
+
+# Duración máxima (segundos) de una captura bajo demanda
+MAX_CAPTURE_SECONDS = 300
+
+# Criterios de orden admitidos en el resumen de texto
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+# Marcos de pila guardados por asignación en las capturas de memoria
+TRACEMALLOC_FRAMES = 10
+
+_capture_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Ya hay una captura de perfil o de memoria en curso."""
+
+
+def validate_seconds(seconds: float) -> float:
+    """
+    Valida la duración de una captura.
+
+    Raises:
+        ValueError: Si no está entre 0 (excluido) y MAX_CAPTURE_SECONDS
+    """
+    if not 0 < seconds <= MAX_CAPTURE_SECONDS:
+        raise ValueError(f"La duración debe estar entre 0 y {MAX_CAPTURE_SECONDS} segundos")
+    return seconds
+
+
+def validate_stats_options(sort: str, limit: int) -> None:
+    """
+    Valida las opciones del resumen de texto de un perfil (antes de capturarlo).
+
+    Raises:
+        ValueError: Si el orden no está en PROFILE_SORT_KEYS o ``limit`` no es positivo
+    """
+    if sort not in PROFILE_SORT_KEYS:
+        raise ValueError(f"Orden desconocido: {sort} (opciones: {', '.join(PROFILE_SORT_KEYS)})")
+    if limit <= 0:
+        raise ValueError("limit debe ser mayor que 0")
+
+
+class ProfileSession:
+    """Perfil ``cProfile`` del thread actual, exclusivo entre capturas."""
+
+    def __init__(self):
+        self.profile: Optional[cProfile.Profile] = None
+        self._active = False
+
+    def start(self) -> None:
+        """
+        Activa el perfilado del thread que llama.
+
+        Raises:
+            ProfilerBusy: Si ya hay otra captura en curso
+        """
+        if not _capture_lock.acquire(blocking=False):
+            raise ProfilerBusy("Ya hay una captura de perfil en curso")
+        self.profile = cProfile.Profile()
+        try:
+            self.profile.enable()
+            self._active = True
+        except ValueError:
+            # Otra herramienta de perfilado activa en el intérprete
+            _capture_lock.release()
+            self.profile = None
+            raise ProfilerBusy("Hay otra herramienta de perfilado activa") from None
+
+    def stop(self) -> None:
+        """Detiene el perfilado y libera la captura (idempotente)."""
+        if not self._active:
+            return
+        self.profile.disable()
+        self._active = False
+        _capture_lock.release()
+
+    def stats_bytes(self) -> bytes:
+        """Estadísticas en el formato de ``pstats`` (para ``pstats.Stats`` o snakeviz)."""
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)
+
+    def stats_text(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """
+        Resumen legible de las funciones más costosas.
+
+        Args:
+            sort: Criterio de orden (ver PROFILE_SORT_KEYS)
+            limit: Funciones listadas
+
+        Raises:
+            ValueError: Si las opciones no son válidas (ver validate_stats_options)
+        """
+        validate_stats_options(sort, limit)
+        output = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def dump(self, path: str) -> None:
+        """Escribe las estadísticas en ``path`` (formato ``pstats``)."""
+        self.profile.dump_stats(path)
+
+
+async def capture_profile(seconds: float) -> ProfileSession:
+    """
+    Perfila el loop asyncio actual durante ``seconds`` segundos.
+
+    Raises:
+        ProfilerBusy: Si ya hay una captura en curso
+        ValueError: Si la duración no es válida
+    """
+    validate_seconds(seconds)
+    session = ProfileSession()
+    session.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        session.stop()
+    return session
+
+
+async def capture_allocations(seconds: float, limit: int = 25) -> str:
+    """
+    Captura las asignaciones de memoria hechas durante ``seconds`` segundos.
+
+    Si ``tracemalloc`` no estaba activo se activa solo durante la captura, y
+    se informan las líneas que más memoria retienen de lo asignado en la
+    ventana; si ya estaba activo se informa la diferencia respecto del inicio.
+
+    Args:
+        seconds: Duración de la captura
+        limit: Líneas de código listadas
+
+    Returns:
+        Resumen de texto
+
+    Raises:
+        ProfilerBusy: Si ya hay una captura en curso
+        ValueError: Si la duración no es válida
+    """
+    validate_seconds(seconds)
+    if not _capture_lock.acquire(blocking=False):
+        raise ProfilerBusy("Ya hay una captura de memoria en curso")
+    try:
+        was_tracing = tracemalloc.is_tracing()
+        baseline = tracemalloc.take_snapshot() if was_tracing else None
+        if not was_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            await asyncio.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        _capture_lock.release()
+
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline, "lineno")
+        title = f"Diferencia de memoria en {seconds:g} s (top {limit})"
+    else:
+        stats = snapshot.statistics("lineno")
+        title = f"Memoria retenida de lo asignado en {seconds:g} s (top {limit})"
+
+    lines = [
+        title,
+        f"Memoria trazada: {current / 1024:.1f} KiB (pico {peak / 1024:.1f} KiB)",
+        "",
+    ]
+    lines.extend(str(stat) for stat in stats[:limit])
+    return "\n".join(lines) + "\n"
@@ -2,17 +2,45 @@
 Servidor Modbus mejorado con mejor manejo de errores y logging.
 """
 
+import asyncio
 import os
 import time
-import threading
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from pymodbus.server import StartTcpServer, StartSerialServer
+from pymodbus.server import ModbusSerialServer, ModbusTcpServer
+from pymodbus.server.async_io import ModbusBaseServer
 from pymodbus.datastore import ModbusSlaveContext, ModbusServerContext
 
+from src.config.logging_setup import get_logger, setup_logging
+from src.data_generation.device_template import DeviceTemplate
+from src.data_generation.loop_timing import GenerationTimings
 from src.data_generation.meter_generator import MeterDataGenerator
-from src.config.settings import REGISTER_FILES
+from src.data_generation.scheduler import DeviceQueue, stagger_phase
+from src.data_generation.sharding import ShardedGeneration
+from src.data_generation.store import TimeSeriesStore
+from src.modbus.fast_read import ResponseCache, install_fast_read
+from src.modbus.metrics import ServerMetrics, install_metrics, serve_metrics
+from src.modbus.profiling import ProfileSession
+from src.config.settings import DEFAULT_CONFIG, DEFAULT_TEMPLATES, MAX_UNIT_ID
+
+# A partir de este número de dispositivos se informa un resumen en lugar de cada uno
+FLEET_LOG_LIMIT = 10
+
+# Dispositivos generados entre cada cesión del loop a las peticiones Modbus
+GENERATION_YIELD_EVERY = 50
+
+# Separación máxima (segundos) entre despertares del loop de actualización: con
+# los ciclos desfasados, los dispositivos que vencen dentro de esta ventana se
+# generan juntos (como máximo 1/20 del intervalo)
+MAX_WAKE_SPACING = 0.005
+
+# Modo verbose: cada dispositivo se vuelca como máximo una vez por intervalo (y no
+# más de una vez por segundo), y la flota completa como máximo 10 veces por segundo
+VERBOSE_MIN_DUMP_INTERVAL = 1.0
+VERBOSE_MAX_DUMPS_PER_SECOND = 10
+
+logger = get_logger("server")
 
 
 class ModbusServerManager:
@@ -29,90 +57,251 @@ class ModbusServerManager:
         """
         self.args = args
         self.generators: List[MeterDataGenerator] = []
-        self._update_thread = None
+        self.templates: Dict[str, DeviceTemplate] = {}
+        # Dispositivos por puerto TCP (una sola entrada con clave None en RTU)
+        self.endpoints: Dict[Optional[int], List[MeterDataGenerator]] = {}
+        self.startup_seconds = 0.0
+        # Procesos generadores (solo con --workers; si no, se genera en un thread)
+        self.shards: Optional[ShardedGeneration] = None
+        # Almacenamiento persistente de los valores generados (solo con --store)
+        self.store: Optional[TimeSeriesStore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._servers: List[ModbusBaseServer] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Future] = None
+        # Cachés de respuestas de lectura (una por servidor, con --response-cache)
+        self.response_caches: List[ResponseCache] = []
+        # Métricas de peticiones de todos los servidores (ver /metrics)
+        self.metrics = ServerMetrics()
+        # Duración, jitter y costo por dispositivo del loop de actualización
+        self.timings = GenerationTimings(args.update_interval)
+        # Muestreo del modo verbose: próximo volcado permitido por dispositivo y global
+        self._next_dump_at: Dict[int, float] = {}
+        self._next_any_dump_at = 0.0
         self._running = False
 
     def initialize_generators(self) -> None:
-        """Inicializa los generadores de datos para los dispositivos."""
+        """
+        Inicializa los generadores de datos para los dispositivos.
+
+        Cada archivo de plantilla se carga y compila una sola vez; los
+        dispositivos se asignan a las plantillas en ciclo y comparten su plan.
+        """
+        start_time = time.perf_counter()
+
         if self.args.protocol == "tcp":
             base_device_id = self.args.unit_id
         else:
             base_device_id = self.args.slave_id
 
-        from src.config.settings import DEFAULT_CONFIG
-
         config_dir = DEFAULT_CONFIG.register_tables_dir
+        template_files = getattr(self.args, "templates", None) or DEFAULT_TEMPLATES
 
-        # Crear generador para el primer dispositivo
-        try:
-            register_filename = REGISTER_FILES.get(1, "register_table_PM21XX.json")
-            register_file = os.path.join(config_dir, register_filename)
-            generator1 = MeterDataGenerator(
-                device_id=base_device_id,
-                register_file=register_file,
+        for filename in template_files:
+            if filename not in self.templates:
+                self.templates[filename] = DeviceTemplate.from_file(
+                    os.path.join(config_dir, filename)
+                )
+
+        devices = []
+        for index in range(self.args.devices):
+            register_filename = template_files[index % len(template_files)]
+            device_id, port = self._device_address(base_device_id, index)
+            devices.append((device_id, port, register_filename))
+
+        catch_up = getattr(self.args, "catch_up", DEFAULT_CONFIG.catch_up)
+        align_ticks = getattr(self.args, "align_ticks", False)
+        stagger = getattr(self.args, "stagger", DEFAULT_CONFIG.stagger)
+        workers = getattr(self.args, "workers", 0)
+        if workers:
+            # Las imágenes viven en memoria compartida y las escriben los trabajadores
+            self.shards = ShardedGeneration(
+                workers,
+                [(device_id, name, self.templates[name]) for device_id, _, name in devices],
                 update_interval=self.args.update_interval,
+                verbose=self.args.verbose,
+                register_tables_dir=config_dir,
+                catch_up=catch_up,
+                align_ticks=align_ticks,
+                stagger=stagger,
             )
-            self.generators.append(generator1)
-            print(f"✓ Dispositivo {base_device_id} inicializado con {register_filename}")
-        except Exception as e:
-            print(f"✗ Error inicializando dispositivo {base_device_id}: {e}")
 
-        # Crear generador para el segundo dispositivo si se solicita
-        if self.args.devices == 2:
+        log_each_device = self.args.devices <= FLEET_LOG_LIMIT
+        history = 0 if workers else getattr(self.args, "history", 0)
+        history_resolution = getattr(
+            self.args, "history_resolution", DEFAULT_CONFIG.history_resolution
+        )
+        store_dir = None if workers else getattr(self.args, "store", None)
+        if store_dir:
+            self.store = TimeSeriesStore(
+                store_dir,
+                retention=getattr(self.args, "store_retention", DEFAULT_CONFIG.store_retention)
+                * 3600,
+                resolution=getattr(self.args, "store_resolution", DEFAULT_CONFIG.store_resolution),
+            )
+        for index, (device_id, port, register_filename) in enumerate(devices):
             try:
-                register_filename = REGISTER_FILES.get(2, "register_table_generic.json")
-                register_file = os.path.join(config_dir, register_filename)
-                generator2 = MeterDataGenerator(
-                    device_id=base_device_id + 1,
-                    register_file=register_file,
+                generator = MeterDataGenerator(
+                    device_id=device_id,
                     update_interval=self.args.update_interval,
+                    template=self.templates[register_filename],
+                    image=self.shards.image(index) if self.shards else None,
+                    catch_up=catch_up,
+                    align_ticks=align_ticks,
+                    phase=stagger_phase(stagger, index, len(devices), device_id),
                 )
-                self.generators.append(generator2)
-                print(f"✓ Dispositivo {base_device_id + 1} inicializado con {register_filename}")
+                if history:
+                    generator.enable_history(history, history_resolution)
+                if self.store:
+                    generator.attach_store(self.store)
+                self.generators.append(generator)
+                self.endpoints.setdefault(port, []).append(generator)
+                if log_each_device:
+                    print(f"✓ Dispositivo {device_id} inicializado con {register_filename}")
             except Exception as e:
-                print(f"✗ Error inicializando dispositivo {base_device_id + 1}: {e}")
+                print(f"✗ Error inicializando dispositivo {device_id}: {e}")
+
+        self.startup_seconds = time.perf_counter() - start_time
+        if not log_each_device:
+            print(
+                f"✓ Flota de {len(self.generators)} dispositivos inicializada en "
+                f"{self.startup_seconds:.2f}s ({self._bytes_per_device()} bytes/dispositivo, "
+                f"{len(self.endpoints)} endpoints)"
+            )
+
+    def _device_address(self, base_device_id: int, index: int) -> Tuple[Optional[int], int]:
+        """
+        Calcula el unit ID y el puerto TCP del dispositivo ``index`` de la flota.
 
-    def _update_registers_thread(self) -> None:
-        """Función que se ejecuta en un thread separado para actualizar los registros."""
-        print(f"[INFO] Thread de actualización iniciado (intervalo: {self.args.update_interval}s)")
+        Los unit IDs van de ``base_device_id`` a MAX_UNIT_ID; en TCP los
+        dispositivos siguientes continúan en el puerto siguiente.
+
+        Returns:
+            Tupla (device_id, port); port es None en RTU
+        """
+        if self.args.protocol != "tcp":
+            return base_device_id + index, None
+
+        units_per_endpoint = max(1, MAX_UNIT_ID - base_device_id + 1)
+        endpoint, offset = divmod(index, units_per_endpoint)
+        return base_device_id + offset, self.args.port + endpoint
+
+    def _bytes_per_device(self) -> int:
+        """Promedio de bytes propios por dispositivo (sin plantillas compartidas)."""
+        if not self.generators:
+            return 0
+        total = sum(generator.memory_footprint() for generator in self.generators)
+        return total // len(self.generators)
+
+    def _should_dump(self, position: int, now: float) -> bool:
+        """Decide si se vuelcan los registros del dispositivo ``position`` (modo verbose)."""
+        if now < self._next_any_dump_at or now < self._next_dump_at.get(position, 0.0):
+            return False
+        self._next_any_dump_at = now + 1.0 / VERBOSE_MAX_DUMPS_PER_SECOND
+        self._next_dump_at[position] = now + max(
+            self.args.update_interval, VERBOSE_MIN_DUMP_INTERVAL
+        )
+        return True
+
+    async def _update_registers_loop(self) -> None:
+        """
+        Tarea asyncio que regenera los registros según los plazos de cada dispositivo.
+
+        Cada despertar visita solo los dispositivos vencidos (``DeviceQueue``):
+        con los ciclos desfasados (``--stagger``) la flota se reparte en muchos
+        despertares pequeños a lo largo del intervalo. Los mensajes van al
+        logger (escrito por un thread aparte); en modo verbose se vuelcan
+        muestras de los dispositivos (ver ``_should_dump``), no todos.
+        """
+        logger.info(
+            "[INFO] Tarea de actualización iniciada (intervalo: %ss)", self.args.update_interval
+        )
+
+        # Plazo previsto del próximo ciclo (para medir el jitter)
+        intended_start: Optional[float] = None
+        pending: Optional[DeviceQueue] = None
+        wake_spacing = min(MAX_WAKE_SPACING, self.args.update_interval / 20)
 
         while self._running:
             try:
-                start_time = time.time()
+                if pending is None:
+                    pending = DeviceQueue(g.next_deadline() for g in self.generators)
 
-                for generator in self.generators:
+                # Los plazos de los dispositivos están en el reloj monótono
+                start_time = time.monotonic()
+                tick_start = time.perf_counter()
+
+                for index, position in enumerate(pending.pop_due(start_time), 1):
+                    generator = self.generators[position]
+                    device_start = time.perf_counter()
                     success = generator.generate_registers()
+                    if success:
+                        self.timings.record_device(
+                            generator.device_id, time.perf_counter() - device_start
+                        )
+
+                    if self.args.verbose and success and self._should_dump(position, start_time):
+                        # La decodificación ocurre en el thread del logger
+                        logger.info(generator.register_dump())
+                    pending.push(position, generator.next_deadline())
+
+                    # Ceder el loop periódicamente para no demorar las peticiones Modbus
+                    if index % GENERATION_YIELD_EVERY == 0:
+                        await asyncio.sleep(0)
+
+                # Registrar la duración del ciclo y su retraso respecto del plazo previsto
+                processing_time = time.perf_counter() - tick_start
+                jitter = None if intended_start is None else max(start_time - intended_start, 0.0)
+                if self.timings.record_tick(processing_time, jitter):
+                    logger.warning(
+                        "[WARNING] Actualización tardó %.2fs (más que el intervalo de %ss)",
+                        processing_time,
+                        self.args.update_interval,
+                    )
 
-                    if self.args.verbose and success:
-                        generator.print_all_registers()
-                        print()  # Línea en blanco para separar dispositivos
+                # Dormir hasta el próximo plazo de cualquier dispositivo (como máximo un intervalo)
+                wake_time = pending.next_deadline()
+                if wake_time is None:
+                    wake_time = start_time + self.args.update_interval
+                wake_time = max(wake_time, start_time + wake_spacing)
+                wake_time = min(wake_time, time.monotonic() + self.args.update_interval)
+                intended_start = wake_time
 
-                # Calcular tiempo de procesamiento
-                processing_time = time.time() - start_time
-                remaining_time = max(0, self.args.update_interval - processing_time)
-
-                if remaining_time > 0:
-                    time.sleep(remaining_time)
-                else:
-                    print(
-                        f"[WARNING] Actualización tardó {processing_time:.2f}s (más que el intervalo de {self.args.update_interval}s)"
-                    )
+                await asyncio.sleep(max(wake_time - time.monotonic(), 0))
 
             except Exception as e:
-                print(f"[ERROR] Error en thread de actualización: {e}")
+                logger.error("[ERROR] Error en tarea de actualización: %s", e)
+                intended_start = None
+                pending = None  # Reconstruir la cola con los plazos actuales
                 if self._running:  # Solo dormir si seguimos ejecutando
-                    time.sleep(self.args.update_interval)
+                    await asyncio.sleep(self.args.update_interval)
+
+    def _lazy_ttl(self) -> float:
+        """Antigüedad máxima de los valores en modo bajo demanda (por defecto, el intervalo)."""
+        ttl = getattr(self.args, "lazy_ttl", None)
+        return self.args.update_interval if ttl is None else ttl
 
-    def create_modbus_context(self) -> ModbusServerContext:
+    def create_modbus_context(
+        self, generators: Optional[List[MeterDataGenerator]] = None
+    ) -> ModbusServerContext:
         """
         Crea el contexto del servidor Modbus.
 
+        Args:
+            generators: Dispositivos a incluir (por defecto, todos)
+
         Returns:
             Contexto configurado del servidor Modbus
         """
         slaves = {}
+        lazy = getattr(self.args, "lazy", False)
+
+        for generator in self.generators if generators is None else generators:
+            if lazy:
+                # Generar solo el rango que toca cada lectura y solo si está vencido
+                generator.enable_lazy(self._lazy_ttl())
+                generator.block.on_read = generator.refresh_range
 
-        for generator in self.generators:
             slaves[generator.device_id] = ModbusSlaveContext(
                 di=generator.block,  # Discrete Inputs
                 co=generator.block,  # Coils
@@ -133,7 +322,11 @@ class ModbusServerManager:
 
         if self.args.protocol == "tcp":
             print(f"🌐 Host: {self.args.host}")
-            print(f"🔌 Puerto: {self.args.port}")
+            if len(self.endpoints) > 1:
+                ports = sorted(self.endpoints)
+                print(f"🔌 Puertos: {ports[0]}-{ports[-1]} ({len(ports)} endpoints)")
+            else:
+                print(f"🔌 Puerto: {self.args.port}")
             print(f"🏷️  Unit ID base: {self.args.unit_id}")
         else:
             print(f"📡 Puerto serial: {self.args.port_serial}")
@@ -142,6 +335,37 @@ class ModbusServerManager:
 
         print(f"⏱️  Intervalo de actualización: {self.args.update_interval} segundos")
 
+        if self.shards:
+            print(f"🧵 Procesos generadores: {len(self.shards.specs)}")
+
+        if getattr(self.args, "fast_read", False):
+            print("⚡ Lecturas rápidas (funciones 3 y 4) desde la imagen codificada")
+
+        catch_up = getattr(self.args, "catch_up", DEFAULT_CONFIG.catch_up)
+        align = ", alineado a la hora" if getattr(self.args, "align_ticks", False) else ""
+        stagger = getattr(self.args, "stagger", DEFAULT_CONFIG.stagger)
+        print(f"⏲️  Recuperación de ciclos perdidos: {catch_up}{align} | desfase: {stagger}")
+
+        if getattr(self.args, "response_cache", 0):
+            print(f"🗃️  Caché de respuestas: {self.args.response_cache} entradas por servidor")
+
+        metrics_port = getattr(self.args, "metrics_port", None)
+        if metrics_port:
+            print(f"📈 Métricas: http://{self.args.host}:{metrics_port}/metrics")
+
+        history = getattr(self.args, "history", 0)
+        if history:
+            print(f"🕓 Historial en memoria: {history} filas por dispositivo")
+
+        if self.store:
+            print(
+                f"💾 Almacenamiento: {self.store.directory} "
+                f"({self.args.store_retention:g} h sin agregar, agregados por minuto y por hora)"
+            )
+
+        if getattr(self.args, "lazy", False):
+            print(f"💤 Generación bajo demanda (TTL: {self._lazy_ttl()} segundos)")
+
         if self.args.verbose:
             print("📢 Modo: Verbose (mostrando valores de registros)")
         else:
@@ -151,50 +375,56 @@ class ModbusServerManager:
         print(f"🕐 Servidor iniciado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
 
-    def start_server(self) -> None:
-        """Inicia el servidor Modbus."""
-        try:
-            # Inicializar generadores
-            self.initialize_generators()
+    def _prepare(self) -> bool:
+        """
+        Inicializa los generadores y muestra el mensaje de inicio.
 
-            if not self.generators:
-                print("❌ No se pudieron inicializar generadores de dispositivos")
-                print(
-                    "💡 Verificar que existen los archivos de configuración en el directorio 'config/'"
-                )
-                return
-
-            # Verificar que al menos un generador tiene registros
-            valid_generators = [g for g in self.generators if g.register_definitions]
-            if not valid_generators:
-                print("❌ Ningún generador tiene definiciones de registros válidas")
-                print("💡 Verificar el contenido de los archivos JSON de configuración")
-                return
-
-            # Mostrar mensaje de inicio
-            self.print_startup_message()
-
-            # Iniciar thread de actualización
-            self._running = True
-            self._update_thread = threading.Thread(
-                target=self._update_registers_thread, daemon=True
+        Returns:
+            True si hay dispositivos con registros para servir
+        """
+        self.initialize_generators()
+
+        if not self.generators:
+            print("❌ No se pudieron inicializar generadores de dispositivos")
+            print(
+                "💡 Verificar que existen los archivos de configuración en el directorio 'config/'"
             )
-            self._update_thread.start()
+            return False
 
-            # Crear contexto del servidor
-            context = self.create_modbus_context()
+        # Verificar que al menos un generador tiene registros
+        valid_generators = [g for g in self.generators if g.register_definitions]
+        if not valid_generators:
+            print("❌ Ningún generador tiene definiciones de registros válidas")
+            print("💡 Verificar el contenido de los archivos JSON de configuración")
+            return False
 
-            # Iniciar servidor según protocolo
-            if self.args.protocol == "tcp":
-                print(f"🚀 Iniciando servidor Modbus TCP en {self.args.host}:{self.args.port}")
-                StartTcpServer(context=context, address=(self.args.host, self.args.port))
-            else:
-                if not self.args.port_serial:
-                    raise ValueError("Para Modbus RTU se requiere especificar --port-serial")
+        # Mostrar mensaje de inicio
+        self.print_startup_message()
+        return True
+
+    def _create_servers(self) -> List[ModbusBaseServer]:
+        """
+        Crea los servidores Modbus asíncronos (requiere un loop en ejecución).
+
+        Returns:
+            Un servidor por endpoint TCP, o el servidor serial en RTU
+        """
+        if self.args.protocol == "tcp":
+            servers = []
+            # Endpoints adicionales de la flota (más de MAX_UNIT_ID dispositivos)
+            for port in sorted(self.endpoints):
+                context = self.create_modbus_context(self.endpoints[port])
+                servers.append(ModbusTcpServer(context, address=(self.args.host, port)))
+            print(f"🚀 Iniciando servidor Modbus TCP en {self.args.host}:{min(self.endpoints)}")
+        else:
+            if not self.args.port_serial:
+                raise ValueError("Para Modbus RTU se requiere especificar --port-serial")
 
-                print(f"🚀 Iniciando servidor Modbus RTU en {self.args.port_serial}")
-                StartSerialServer(
-                    context=context,
+            context = self.create_modbus_context()
+            print(f"🚀 Iniciando servidor Modbus RTU en {self.args.port_serial}")
+            servers = [
+                ModbusSerialServer(
+                    context,
                     port=self.args.port_serial,
                     baudrate=self.args.baudrate,
                     parity="N",
@@ -202,7 +432,104 @@ class ModbusServerManager:
                     bytesize=8,
                     timeout=1,
                 )
+            ]
+
+        cache_size = getattr(self.args, "response_cache", 0)
+        if getattr(self.args, "fast_read", False) or cache_size:
+            # Lecturas de registros (funciones 3 y 4) servidas desde la imagen codificada
+            # y, opcionalmente, desde una caché de respuestas por servidor
+            for server in servers:
+                cache = ResponseCache(cache_size) if cache_size else None
+                if cache is not None:
+                    self.response_caches.append(cache)
+                install_fast_read(server, cache)
+
+        for server in servers:
+            install_metrics(server, self.metrics)
+        return servers
+
+    async def serve(self) -> None:
+        """
+        Ejecuta el simulador en el loop asyncio actual hasta que se detenga.
+
+        Los servidores Modbus y la tarea de actualización comparten el loop del
+        llamador (ej: el de uvicorn en la interfaz web). La inicialización de los
+        dispositivos se hace en un thread para no bloquear el loop. ``shutdown``
+        o la cancelación de esta corrutina detienen todo.
+        """
+        setup_logging()
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self._prepare):
+            return
+
+        # --profile: perfil de toda la ejecución del loop (servidores y generación)
+        profile_path = getattr(self.args, "profile", None)
+        profile = ProfileSession() if profile_path else None
+        if profile:
+            profile.start()
+
+        self._loop = loop
+        self._stopping = None
+        self._running = True
+        self._servers = self._create_servers()
+        self._tasks = [asyncio.create_task(server.serve_forever()) for server in self._servers]
+
+        metrics_port = getattr(self.args, "metrics_port", None)
+        if metrics_port:
+            self._tasks.append(
+                asyncio.create_task(serve_metrics(self.metrics, self.args.host, metrics_port))
+            )
+
+        # Iniciar la generación: procesos trabajadores o tarea de actualización
+        # (en modo bajo demanda no hace falta)
+        if self.shards:
+            self.shards.start()
+            print(f"[INFO] {len(self.shards.specs)} procesos generadores iniciados")
+        elif not getattr(self.args, "lazy", False):
+            self._tasks.append(asyncio.create_task(self._update_registers_loop()))
+        if self.store:
+            self.store.start()
 
+        try:
+            # Termina con shutdown() o si algún servidor falla (ej: puerto ocupado)
+            done, _ = await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            await self.shutdown()
+            if profile:
+                profile.stop()
+                profile.dump(profile_path)
+                print(f"📊 Perfil guardado en {profile_path} (ver con: python -m pstats)")
+
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    async def shutdown(self) -> None:
+        """Detiene los servidores, la tarea de actualización y los procesos generadores."""
+        # Llamadas concurrentes (ej: stop_server y el final de serve) esperan la misma detención
+        if self._stopping is None:
+            self._stopping = asyncio.ensure_future(self._stop())
+        await asyncio.shield(self._stopping)
+
+    async def _stop(self) -> None:
+        """Realiza la detención (ver ``shutdown``)."""
+        self._running = False
+        for server in self._servers:
+            await server.shutdown()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._servers = []
+        self._tasks = []
+        if self.shards:
+            await asyncio.get_running_loop().run_in_executor(None, self.shards.stop)
+        if self.store:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.close)
+
+    def start_server(self) -> None:
+        """Inicia el servidor Modbus y bloquea hasta que se detenga (ver ``serve``)."""
+        try:
+            asyncio.run(self.serve())
         except KeyboardInterrupt:
             print("\n🛑 Deteniendo servidor...")
             self.stop_server()
@@ -211,12 +538,34 @@ class ModbusServerManager:
             raise
 
     def stop_server(self) -> None:
-        """Detiene el servidor Modbus."""
-        self._running = False
-        if self._update_thread and self._update_thread.is_alive():
-            self._update_thread.join(timeout=5)
+        """
+        Detiene el servidor Modbus desde fuera de su loop.
+
+        Si el loop sigue en ejecución en otro thread, se espera a que ``shutdown``
+        termine; en caso contrario solo se liberan los recursos pendientes.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self.shutdown(), loop)
+            future.result(timeout=5)
+        else:
+            self._running = False
+            if self.shards:
+                self.shards.stop()
+            if self.store:
+                self.store.close()
         print("✅ Servidor detenido correctamente")
 
+    def _response_cache_stats(self) -> Optional[Dict[str, int]]:
+        """Suma los contadores de las cachés de respuestas (None si no hay caché)."""
+        if not self.response_caches:
+            return None
+        totals: Dict[str, int] = {}
+        for cache in self.response_caches:
+            for name, value in cache.get_statistics().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
     def get_server_stats(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas del servidor.
@@ -229,6 +578,19 @@ class ModbusServerManager:
             "devices": self.args.devices,
             "update_interval": self.args.update_interval,
             "verbose": self.args.verbose,
+            "lazy": getattr(self.args, "lazy", False),
+            "fast_read": getattr(self.args, "fast_read", False),
+            "response_cache": self._response_cache_stats(),
+            "requests": self.metrics.get_statistics(),
+            "generation_timing": self.timings.get_statistics(),
+            "fleet": {
+                "templates": list(self.templates),
+                "endpoints": {str(port): len(gens) for port, gens in self.endpoints.items()},
+                "startup_seconds": self.startup_seconds,
+                "bytes_per_device": self._bytes_per_device(),
+            },
+            "workers": self.shards.get_statistics() if self.shards else [],
+            "store": self.store.get_statistics() if self.store else None,
             "generators": [],
         }
 
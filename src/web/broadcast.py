@@ -0,0 +1,246 @@
+"""
+Difusión de mensajes a los clientes WebSocket de la interfaz web.
+
+El recolector publica cada mensaje una sola vez en el ``BroadcastHub`` y
+vuelve enseguida: cada cliente tiene una cola acotada y una tarea escritora
+propia en el loop de la aplicación. Si un navegador lento no alcanza a
+consumir su cola se descartan sus mensajes más antiguos (solo importa el
+estado más reciente), y si un envío no termina en ``send_timeout`` segundos el
+cliente se da por perdido. Así un cliente lento nunca demora al recolector ni
+a los demás clientes.
+
+Cuando los mensajes son incrementales (deltas), perder uno deja al cliente
+desincronizado: un canal con ``resync`` reemplaza sus mensajes pendientes por
+los que devuelve esa función (ej: una instantánea completa) la próxima vez que
+escribe después de un descarte. Los clientes se agrupan por ``key`` (ej: el
+formato de trama), y ``publish_grouped`` genera cada mensaje una sola vez por
+grupo.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Set
+
+# Mensajes pendientes por cliente antes de descartar los más antiguos
+DEFAULT_CLIENT_QUEUE = 8
+
+# Segundos que puede tardar un envío antes de dar el cliente por perdido
+DEFAULT_SEND_TIMEOUT = 10.0
+
+Sender = Callable[[Any], Awaitable[None]]
+Closer = Callable[[], Awaitable[None]]
+Resync = Callable[[], List[Any]]
+
+
+class ClientChannel:
+    """Cola acotada (descarta los mensajes más antiguos) y escritor de un cliente."""
+
+    def __init__(
+        self,
+        send: Sender,
+        queue_size: int = DEFAULT_CLIENT_QUEUE,
+        close: Optional[Closer] = None,
+        key: Hashable = None,
+        resync: Optional[Resync] = None,
+    ):
+        """
+        Inicializa el canal.
+
+        Args:
+            send: Corrutina que envía un mensaje al cliente
+            queue_size: Mensajes pendientes como máximo
+            close: Corrutina que cierra la conexión si el escritor falla
+            key: Grupo del cliente para ``BroadcastHub.publish_grouped``
+            resync: Mensajes que resincronizan al cliente después de un descarte
+        """
+        if queue_size < 1:
+            raise ValueError(f"La cola del cliente debe admitir al menos un mensaje: {queue_size}")
+        self.send = send
+        self.close = close
+        self.key = key
+        self.resync = resync
+        # Se descartaron mensajes (o el cliente es nuevo) y debe resincronizarse
+        self.gap = False
+        self.pending: Deque[Any] = deque(maxlen=queue_size)
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, message: Any) -> bool:
+        """
+        Encola un mensaje sin bloquear.
+
+        Returns:
+            False si para encolarlo se descartó el mensaje pendiente más antiguo
+        """
+        dropped = len(self.pending) == self.pending.maxlen
+        if dropped:
+            self.dropped += 1
+            self.gap = True
+        self.pending.append(message)
+        self._ready.set()
+        return not dropped
+
+    def request_resync(self) -> None:
+        """Pide enviar los mensajes de ``resync`` en lugar de los pendientes."""
+        self.gap = True
+        self._ready.set()
+
+    def _next_messages(self) -> List[Any]:
+        """Siguiente mensaje pendiente, o los de ``resync`` si hubo un descarte."""
+        if self.gap and self.resync is not None:
+            self.gap = False
+            # La resincronización refleja el estado actual: incluye lo pendiente
+            self.pending.clear()
+            return self.resync()
+        self.gap = False
+        return [self.pending.popleft()] if self.pending else []
+
+    async def run(self, send_timeout: float) -> None:
+        """Envía los mensajes pendientes en orden hasta que el canal se cierre o falle."""
+        while not self.closed:
+            await self._ready.wait()
+            self._ready.clear()
+            while (self.pending or self.gap) and not self.closed:
+                for message in self._next_messages():
+                    await asyncio.wait_for(self.send(message), send_timeout)
+                    self.sent += 1
+
+
+class BroadcastHub:
+    """Difunde mensajes a todos los clientes registrados, con contrapresión por cliente."""
+
+    def __init__(
+        self, queue_size: int = DEFAULT_CLIENT_QUEUE, send_timeout: float = DEFAULT_SEND_TIMEOUT
+    ):
+        """
+        Inicializa el hub.
+
+        Args:
+            queue_size: Mensajes pendientes como máximo por cliente
+            send_timeout: Segundos que puede tardar un envío a un cliente
+        """
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.channels: Set[ClientChannel] = set()
+        self.published = 0
+        self.disconnected = 0
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def register(
+        self,
+        send: Sender,
+        close: Optional[Closer] = None,
+        key: Hashable = None,
+        resync: Optional[Resync] = None,
+    ) -> ClientChannel:
+        """
+        Registra un cliente y arranca su escritor (requiere un loop en ejecución).
+
+        Args:
+            send: Corrutina que envía un mensaje al cliente (ej: ``websocket.send_text``)
+            close: Corrutina que cierra la conexión si el cliente se da por perdido
+            key: Grupo del cliente para ``publish_grouped``
+            resync: Mensajes que ponen al día al cliente; se envían al conectarse
+                y después de cada descarte
+
+        Returns:
+            Canal del cliente, para ``unregister``
+        """
+        channel = ClientChannel(send, self.queue_size, close, key, resync)
+        if resync is not None:
+            channel.request_resync()
+        channel.task = asyncio.create_task(channel.run(self.send_timeout))
+        channel.task.add_done_callback(lambda task: self._discard(channel, task))
+        self.channels.add(channel)
+        return channel
+
+    def _discard(self, channel: ClientChannel, task: asyncio.Task) -> None:
+        """Quita un canal cuyo escritor terminó (desconexión, error o demora excesiva)."""
+        if not task.cancelled():
+            task.exception()  # Recuperada: la pérdida del cliente no es un error del hub
+        if channel in self.channels:
+            self.channels.discard(channel)
+            channel.closed = True
+            self.disconnected += 1
+            if channel.close is not None:
+                asyncio.ensure_future(self._close_quietly(channel.close))
+
+    @staticmethod
+    async def _close_quietly(close: Closer) -> None:
+        """Cierra la conexión de un cliente perdido ignorando errores (ya puede estar cerrada)."""
+        try:
+            await close()
+        except Exception:
+            pass
+
+    async def unregister(self, channel: ClientChannel) -> None:
+        """Quita un cliente y detiene su escritor."""
+        self.channels.discard(channel)
+        channel.closed = True
+        if channel.task is not None:
+            channel.task.cancel()
+            await asyncio.gather(channel.task, return_exceptions=True)
+
+    def publish(self, message: Any) -> int:
+        """
+        Encola un mensaje para todos los clientes sin esperar ningún envío.
+
+        Returns:
+            Clientes a los que se encoló el mensaje
+        """
+        self.published += 1
+        for channel in self.channels:
+            channel.offer(message)
+        return len(self.channels)
+
+    def publish_grouped(self, render: Callable[[Hashable], Any]) -> int:
+        """
+        Encola para cada cliente el mensaje de su grupo, generado una vez por grupo.
+
+        Args:
+            render: Genera el mensaje de un grupo a partir de su ``key``
+                (None: nada que enviar a ese grupo)
+
+        Returns:
+            Mensajes distintos generados
+        """
+        self.published += 1
+        messages: Dict[Hashable, Any] = {}
+        for channel in self.channels:
+            if channel.key not in messages:
+                messages[channel.key] = render(channel.key)
+            message = messages[channel.key]
+            if message is not None:
+                channel.offer(message)
+        return len(messages)
+
+    def resync_all(self) -> None:
+        """Pide a todos los clientes resincronizarse (ej: cambió la flota)."""
+        for channel in self.channels:
+            channel.request_resync()
+
+    async def close(self) -> None:
+        """Quita todos los clientes."""
+        for channel in list(self.channels):
+            await self.unregister(channel)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """
+        Obtiene contadores del hub.
+
+        Returns:
+            Clientes conectados, mensajes publicados, enviados y descartados,
+            y clientes perdidos por error o demora
+        """
+        return {
+            "clients": len(self.channels),
+            "published": self.published,
+            "sent": sum(channel.sent for channel in self.channels),
+            "dropped": sum(channel.dropped for channel in self.channels),
+            "disconnected": self.disconnected,
+        }
@@ -0,0 +1,310 @@
+"""
+Flujo de valores de la flota para los clientes WebSocket: instantánea y deltas.
+
+Cada registro de cada dispositivo ocupa una posición fija (``slot``) en un
+arreglo de valores float64. Al conectarse, un cliente recibe el ``layout``
+(qué dispositivo y registro es cada slot, en JSON) y una instantánea con
+todos los valores; después solo recibe los slots que cambiaron.
+
+Los cambios se detectan comparando las palabras publicadas de cada imagen
+con las del ciclo anterior, de modo que solo se decodifican los registros
+que cambiaron: el costo de serializar crece con el volumen de cambios, no
+con el tamaño de la flota.
+
+Formato binario (little-endian), encabezado de ``FRAME_HEADER.size`` bytes:
+tipo de trama (``FRAME_SNAPSHOT`` o ``FRAME_DELTA``), secuencia (uint32),
+timestamp (float64, segundos Unix) y cantidad de valores (uint32). Siguen los
+valores (float64); en los deltas, a continuación, los slots (uint32). Los
+valores quedan alineados a 8 bytes para leerse como ``Float64Array``.
+
+Un cliente suscrito a una parte de la flota (ver ``Selection``) recibe un
+layout con solo sus slots, numerados desde 0 en ese orden, y las tramas usan
+esa numeración local. Los slots y el layout de las últimas
+``MAX_CACHED_SELECTIONS`` selecciones se conservan (LRU), de modo que un
+cliente que cambia de suscripción no hace crecer la memoria del servidor.
+"""
+
+import json
+import struct
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.web.subscriptions import ALL, Selection
+
+# Formatos de trama admitidos por /ws (el layout siempre se envía como JSON)
+STREAM_FORMATS = ("binary", "json")
+
+FRAME_SNAPSHOT = 1
+FRAME_DELTA = 2
+# Tipo, secuencia, timestamp, cantidad (y relleno hasta 24 bytes)
+FRAME_HEADER = struct.Struct("<B3xIdI4x")
+
+Frame = Union[bytes, str]
+
+# Selecciones (además de toda la flota) con slots y layout en caché
+MAX_CACHED_SELECTIONS = 32
+
+
+class _DeviceSlots:
+    """Slots de un dispositivo y la posición de sus palabras en la imagen."""
+
+    __slots__ = ("generator", "registers", "first_slot", "word_index", "starts", "words")
+
+    def __init__(self, generator: Any, first_slot: int):
+        self.generator = generator
+        self.first_slot = first_slot
+        layout = generator.image.layout
+        self.registers = []
+        word_index: List[int] = []
+        starts: List[int] = []
+        for reg in generator.plan.registers:
+            position = layout.position(reg.address, reg.width)
+            if position is None:
+                # Registro fuera de la imagen (no se sirve por Modbus): sin slot
+                continue
+            self.registers.append(reg)
+            starts.append(len(word_index))
+            word_index.extend(range(position, position + reg.width))
+        self.word_index = np.asarray(word_index, dtype=np.intp)
+        self.starts = np.asarray(starts, dtype=np.intp)
+        # Palabras vistas en la última actualización (None: aún no leídas)
+        self.words = None
+
+    def changed(self) -> np.ndarray:
+        """Índices (relativos al dispositivo) de los registros cuyas palabras cambiaron."""
+        words = self.generator.image.front[self.word_index]
+        if self.words is None:
+            changed = np.arange(len(self.registers))
+        elif not len(words):
+            changed = np.empty(0, dtype=np.intp)
+        else:
+            differs = np.logical_or.reduceat(words != self.words, self.starts)
+            changed = np.flatnonzero(differs)
+        self.words = words
+        return changed
+
+    def decode(self, index: int) -> float:
+        """Valor numérico del registro ``index`` según las últimas palabras vistas."""
+        start = self.starts[index]
+        reg = self.registers[index]
+        return float(reg.codec.decode(self.words[start : start + reg.width].tolist()))
+
+
+class FleetStream:
+    """Valores de la flota por slot, con secuencia de actualizaciones y tramas."""
+
+    def __init__(self, generators: Sequence[Any]):
+        """
+        Inicializa el flujo.
+
+        Args:
+            generators: Generadores de la flota (ver ModbusServerManager.generators)
+        """
+        self.generators = list(generators)
+        self.devices: List[_DeviceSlots] = []
+        slot = 0
+        for generator in generators:
+            device = _DeviceSlots(generator, slot)
+            self.devices.append(device)
+            slot += len(device.registers)
+        self.values = np.full(slot, np.nan, dtype=np.float64)
+        self.sequence = 0
+        self.timestamp = 0.0
+
+        # Atributos de cada slot para resolver las selecciones
+        registers = [reg for device in self.devices for reg in device.registers]
+        self.slot_device = np.asarray(
+            [device.generator.device_id for device in self.devices for _ in device.registers],
+            dtype=np.int64,
+        )
+        self.slot_address = np.asarray([reg.address for reg in registers], dtype=np.int64)
+        self.slot_category = np.asarray([reg.category or "" for reg in registers], dtype=object)
+        # Slots (globales, ordenados) y layout de las selecciones usadas hace menos
+        self._selections: "OrderedDict[Selection, np.ndarray]" = OrderedDict()
+        self._layouts: "OrderedDict[Selection, str]" = OrderedDict()
+        self._full_layout: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def update(self) -> np.ndarray:
+        """
+        Lee las imágenes publicadas y actualiza los valores que cambiaron.
+
+        Returns:
+            Slots que cambiaron (vacío si no hubo cambios; la secuencia solo
+            avanza cuando hay cambios)
+        """
+        changed_slots = []
+        for device in self.devices:
+            changed = device.changed()
+            for index in changed:
+                self.values[device.first_slot + index] = device.decode(index)
+            if len(changed):
+                changed_slots.append(changed + device.first_slot)
+        self.timestamp = time.time()
+        if not changed_slots:
+            return np.empty(0, dtype=np.uint32)
+        self.sequence += 1
+        return np.concatenate(changed_slots).astype(np.uint32)
+
+    def select(self, selection: Selection = ALL) -> Optional[np.ndarray]:
+        """
+        Resuelve una selección a sus slots globales (en caché, ver MAX_CACHED_SELECTIONS).
+
+        Returns:
+            Slots ordenados, o None si la selección incluye todos
+        """
+        if selection.is_all:
+            return None
+        cached = _lru_get(self._selections, selection)
+        if cached is not None:
+            return cached
+        mask = np.ones(len(self), dtype=bool)
+        if selection.devices is not None:
+            mask &= np.isin(self.slot_device, list(selection.devices))
+        if selection.categories is not None:
+            mask &= np.isin(self.slot_category, list(selection.categories))
+        if selection.ranges is not None:
+            in_ranges = np.zeros(len(self), dtype=bool)
+            for start, end in selection.ranges:
+                in_ranges |= (self.slot_address >= start) & (self.slot_address <= end)
+            mask &= in_ranges
+        slots = np.flatnonzero(mask).astype(np.uint32)
+        _lru_put(self._selections, selection, slots)
+        return slots
+
+    def layout_frame(self, selection: Selection = ALL) -> str:
+        """
+        Descripción de los slots de una selección (JSON), en el orden de sus tramas.
+
+        Cada slot indica dispositivo, dirección, descripción, tipo, categoría y unidad.
+        """
+        if selection.is_all:
+            if self._full_layout is None:
+                self._full_layout = self._build_layout(None)
+            return self._full_layout
+        layout = _lru_get(self._layouts, selection)
+        if layout is None:
+            layout = self._build_layout(self.select(selection))
+            _lru_put(self._layouts, selection, layout)
+        return layout
+
+    def _build_layout(self, selected: Optional[np.ndarray]) -> str:
+        """Layout JSON de los slots indicados (None: todos)."""
+        positions = range(len(self)) if selected is None else selected.tolist()
+        registers = [(device, reg) for device in self.devices for reg in device.registers]
+        slots = []
+        for position in positions:
+            device, reg = registers[position]
+            slots.append(
+                {
+                    "device": device.generator.device_id,
+                    "address": reg.address,
+                    "description": reg.description,
+                    "data_type": reg.data_type,
+                    "category": reg.category,
+                    "unit": reg.unit,
+                }
+            )
+        return json.dumps({"type": "layout", "slots": slots})
+
+    def snapshot_frame(self, fmt: str = "binary", selection: Selection = ALL) -> Frame:
+        """Trama con todos los valores actuales de una selección."""
+        selected = self.select(selection)
+        values = self.values if selected is None else self.values[selected]
+        if fmt == "binary":
+            header = FRAME_HEADER.pack(FRAME_SNAPSHOT, self.sequence, self.timestamp, len(values))
+            return header + values.astype("<f8").tobytes()
+        return json.dumps(
+            {
+                "type": "snapshot",
+                "seq": self.sequence,
+                "timestamp": self.timestamp,
+                "values": _json_values(values),
+            }
+        )
+
+    def delta_frame(
+        self, slots: np.ndarray, fmt: str = "binary", selection: Selection = ALL
+    ) -> Optional[Frame]:
+        """
+        Trama con los valores de los slots indicados que pertenecen a una selección.
+
+        Args:
+            slots: Slots globales que cambiaron, ordenados (ver ``update``)
+            fmt: Formato de la trama (ver STREAM_FORMATS)
+            selection: Selección del cliente (los slots de la trama son locales a ella)
+
+        Returns:
+            Trama, o None si ningún slot de la selección cambió
+        """
+        selected = self.select(selection)
+        values = self.values[slots]
+        if selected is not None:
+            keep = np.isin(slots, selected)
+            if not keep.any():
+                return None
+            values = values[keep]
+            slots = np.searchsorted(selected, slots[keep]).astype(np.uint32)
+        if fmt == "binary":
+            header = FRAME_HEADER.pack(FRAME_DELTA, self.sequence, self.timestamp, len(slots))
+            return header + values.astype("<f8").tobytes() + slots.astype("<u4").tobytes()
+        return json.dumps(
+            {
+                "type": "delta",
+                "seq": self.sequence,
+                "timestamp": self.timestamp,
+                "slots": slots.tolist(),
+                "values": _json_values(values),
+            }
+        )
+
+    def as_dict(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Valores actuales agrupados por dispositivo y registro (para /api/data).
+
+        Returns:
+            ``{"device_<id>": {"reg_<address>": {address, description, value, data_type}}}``
+        """
+        data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for device in self.devices:
+            device_data = {}
+            for index, reg in enumerate(device.registers):
+                value = self.values[device.first_slot + index]
+                device_data[f"reg_{reg.address}"] = {
+                    "address": reg.address,
+                    "description": reg.description,
+                    "value": None if np.isnan(value) else reg.codec.to_display(_native(reg, value)),
+                    "data_type": reg.data_type,
+                }
+            data[f"device_{device.generator.device_id}"] = device_data
+        return data
+
+
+def _lru_get(cache: "OrderedDict[Hashable, Any]", key: Hashable) -> Any:
+    """Valor en caché (None si no está), marcado como el más reciente."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache: "OrderedDict[Hashable, Any]", key: Hashable, value: Any) -> None:
+    """Guarda un valor y descarta el menos usado si se supera MAX_CACHED_SELECTIONS."""
+    cache[key] = value
+    if len(cache) > MAX_CACHED_SELECTIONS:
+        cache.popitem(last=False)
+
+
+def _native(reg: Any, value: float) -> Any:
+    """Convierte un valor float64 al tipo de su registro (int para los enteros)."""
+    return int(value) if reg.codec.integer else value
+
+
+def _json_values(values: np.ndarray) -> List[Any]:
+    """Valores para JSON (NaN, que no es JSON válido, como null)."""
+    return [None if np.isnan(value) else value for value in values.tolist()]
@@ -0,0 +1,143 @@
+"""
+Suscripciones de los clientes WebSocket a una parte de la flota.
+
+Un cliente elige qué slots recibe enviando mensajes JSON por /ws::
+
+    {"action": "subscribe", "devices": [1, 2], "categories": ["current"],
+     "addresses": [[3000, 3010]]}
+    {"action": "unsubscribe", "categories": ["current"]}
+    {"action": "clear"}
+
+Cada criterio (dispositivos, categorías de la tabla de registros y rangos de
+direcciones inclusivos) es None mientras no se restringe (todos los valores)
+y un conjunto desde la primera suscripción: quitar su último valor deja el
+conjunto vacío, que no incluye ningún slot. Solo ``clear`` vuelve a la
+selección completa. La selección es inmutable y hasheable,
+de modo que los clientes con la misma selección y formato comparten el mismo
+grupo en el ``BroadcastHub`` y cada actualización se serializa una vez por
+selección distinta.
+"""
+
+from typing import Any, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+SUBSCRIPTION_ACTIONS = ("subscribe", "unsubscribe", "clear")
+
+
+class Selection(NamedTuple):
+    """Criterios de selección de slots (None: sin restricción; vacío: ningún slot)."""
+
+    devices: Optional[FrozenSet[int]] = None
+    categories: Optional[FrozenSet[str]] = None
+    ranges: Optional[Tuple[Tuple[int, int], ...]] = None
+
+    @property
+    def is_all(self) -> bool:
+        """True si la selección incluye todos los slots."""
+        return self.devices is None and self.categories is None and self.ranges is None
+
+
+# Selección por defecto de un cliente nuevo
+ALL = Selection()
+
+
+def _int_list(values: Any, field: str) -> List[int]:
+    """Valida una lista de enteros de un mensaje de suscripción."""
+    if not isinstance(values, list) or not all(
+        isinstance(value, int) and not isinstance(value, bool) for value in values
+    ):
+        raise ValueError(f"'{field}' debe ser una lista de enteros")
+    return values
+
+
+def _ranges(values: Any) -> List[Tuple[int, int]]:
+    """Valida una lista de rangos de direcciones [inicio, fin] (inclusivos)."""
+    if not isinstance(values, list):
+        raise ValueError("'addresses' debe ser una lista de rangos [inicio, fin]")
+    ranges = []
+    for item in values:
+        if not isinstance(item, list) or len(item) != 2:
+            raise ValueError(f"Rango de direcciones inválido: {item}")
+        start, end = _int_list(item, "addresses")
+        if start > end:
+            raise ValueError(f"Rango de direcciones inválido: {item}")
+        ranges.append((start, end))
+    return ranges
+
+
+def _merge(
+    current: Optional[Iterable[Any]], values: Optional[List[Any]], add: bool, field: str
+) -> Optional[List[Any]]:
+    """
+    Agrega o quita valores de un criterio conservando el orden y sin duplicados.
+
+    Args:
+        current: Valores del criterio (None: sin restricción)
+        values: Valores del mensaje (None: el mensaje no menciona el criterio)
+        add: True para agregar, False para quitar
+        field: Nombre del criterio en el mensaje, para los errores
+
+    Returns:
+        Nuevos valores (None: sigue sin restricción)
+
+    Raises:
+        ValueError: Si se quitan valores de un criterio sin restricción
+    """
+    if values is None:
+        return None if current is None else list(current)
+    if current is None:
+        if not add:
+            raise ValueError(
+                f"'{field}' no está restringido: suscríbase a valores concretos "
+                "antes de quitarlos"
+            )
+        current = []
+    if add:
+        return list(dict.fromkeys([*current, *values]))
+    return [value for value in current if value not in values]
+
+
+def apply_message(selection: Selection, message: Mapping[str, Any]) -> Selection:
+    """
+    Aplica un mensaje de suscripción a una selección.
+
+    Args:
+        selection: Selección actual del cliente
+        message: Mensaje decodificado (ver el formato en el docstring del módulo)
+
+    Returns:
+        Nueva selección
+
+    Raises:
+        ValueError: Si el mensaje no es válido
+    """
+    if not isinstance(message, Mapping):
+        raise ValueError("El mensaje debe ser un objeto JSON")
+    action = message.get("action")
+    if action not in SUBSCRIPTION_ACTIONS:
+        raise ValueError(
+            f"Acción desconocida: {action} (opciones: {', '.join(SUBSCRIPTION_ACTIONS)})"
+        )
+    if action == "clear":
+        return ALL
+
+    add = action == "subscribe"
+    devices = message.get("devices")
+    if devices is not None:
+        devices = _int_list(devices, "devices")
+    categories = message.get("categories")
+    if categories is not None and (
+        not isinstance(categories, list) or not all(isinstance(c, str) for c in categories)
+    ):
+        raise ValueError("'categories' debe ser una lista de textos")
+    ranges = message.get("addresses")
+    if ranges is not None:
+        ranges = _ranges(ranges)
+
+    devices = _merge(selection.devices, devices, add, "devices")
+    categories = _merge(selection.categories, categories, add, "categories")
+    ranges = _merge(selection.ranges, ranges, add, "addresses")
+    return Selection(
+        devices=None if devices is None else frozenset(devices),
+        categories=None if categories is None else frozenset(categories),
+        ranges=None if ranges is None else tuple(sorted(ranges)),
+    )
@@ -0,0 +1,95 @@
+"""
+Tests unitarios para el motor de generación vectorizada.
+"""
+
+import time
+import unittest
+
+import numpy as np
+
+from src.data_generation.batch_engine import BatchGenerationEngine
+from src.data_generation.register_plan import compile_register_plan
+
+
+class TestBatchGenerationEngine(unittest.TestCase):
+    """Test cases para BatchGenerationEngine."""
+
+    def setUp(self):
+        """Configuración para los tests."""
+        self.registers = [
+            {
+                "address": 0,
+                "data_type": "FLOAT32",
+                "description": "U",
+                "generation": {"type": "uniform", "params": [10.0, 20.0]},
+            },
+            {
+                "address": 2,
+                "data_type": "INT16",
+                "description": "R",
+                "generation": {"type": "randint", "params": [1, 10]},
+            },
+            {
+                "address": 3,
+                "data_type": "DATETIME",
+                "description": "T",
+                "generation": {"type": "timestamp"},
+            },
+            {
+                "address": 7,
+                "data_type": "FLOAT32",
+                "description": "F",
+                "generation": {"type": "fixed", "params": [42.0]},
+            },
+            {
+                "address": 9,
+                "data_type": "FLOAT32",
+                "description": "S",
+                "generation": {"type": "sine", "params": [10.0, 0.0, 0.0, 50.0]},
+            },
+            {
+                "address": 11,
+                "data_type": "FLOAT32",
+                "description": "N",
+                "generation": {"type": "noise", "params": [100.0, 5.0]},
+            },
+            {"address": 13, "data_type": "FLOAT32", "description": "Sin generación"},
+        ]
+
+    def test_groups_by_type(self):
+        """Test agrupación de registros por tipo de generador."""
+        engine = BatchGenerationEngine(compile_register_plan(self.registers), seed=1)
+
+        self.assertEqual(
+            sorted(g.gen_type for g in engine.groups),
+            ["fixed", "noise", "randint", "sine", "timestamp", "uniform"],
+        )
+        self.assertEqual(engine.valid.tolist(), [True] * 6 + [False])
+
+    def test_generate_values_within_ranges(self):
+        """Test valores generados dentro de los rangos configurados."""
+        engine = BatchGenerationEngine(compile_register_plan(self.registers), seed=1)
+        now = time.time()
+        values = engine.generate(now=now)
+
+        self.assertTrue(10.0 <= values[0] <= 20.0)
+        self.assertTrue(1 <= values[1] <= 10)
+        self.assertEqual(values[1], int(values[1]))
+        self.assertEqual(values[2], int(now))
+        self.assertEqual(values[3], 42.0)
+        self.assertAlmostEqual(values[4], 50.0)
+        self.assertTrue(95.0 <= values[5] <= 105.0)
+
+    def test_generate_into_buffer(self):
+        """Test escritura en un buffer preasignado."""
+        engine = BatchGenerationEngine(compile_register_plan(self.registers), seed=1)
+        out = np.full(len(self.registers), -1.0)
+
+        result = engine.generate(out=out)
+
+        self.assertIs(result, out)
+        self.assertEqual(out[6], -1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Tests unitarios para la prueba de carga Modbus.
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+from src.modbus.benchmark import (
+    BenchmarkConfig,
+    _wait_for_port,
+    build_targets,
+    parse_benchmark_arguments,
+    run_benchmark,
+    run_generation_benchmark,
+    save_report,
+    summarize_latencies,
+)
+
+
+class TestBenchmark(unittest.TestCase):
+    """Test cases para la prueba de carga."""
+
+    def test_summarize_latencies(self):
+        """Test de peticiones por segundo y percentiles."""
+        latencies = [i / 1000 for i in range(1, 101)]  # 1..100 ms
+        summary = summarize_latencies(latencies, elapsed=2.0)
+
+        self.assertEqual(summary["requests"], 100)
+        self.assertAlmostEqual(summary["requests_per_second"], 50.0)
+        self.assertAlmostEqual(summary["p50_ms"], 50.5)
+        self.assertAlmostEqual(summary["p99_ms"], 99.01)
+        self.assertAlmostEqual(summary["max_ms"], 100.0)
+        self.assertEqual(summarize_latencies([], 1.0)["requests"], 0)
+
+    def test_targets_follow_layout_and_fleet_addressing(self):
+        """Test de lecturas por tramo del layout, unit ID y puerto de cada dispositivo."""
+        config = BenchmarkConfig(
+            devices=250, templates=["register_table_PM21XX.json"], port=1502, max_count=100
+        )
+        targets = build_targets(config)
+
+        first_device = [t for t in targets if t.port == 1502 and t.unit_id == 1]
+        self.assertTrue(first_device)
+        self.assertTrue(all(t.count <= 100 for t in targets))
+        # Dirección del cliente = dirección de la tabla - 1
+        self.assertEqual(first_device[0].address, 2999)
+
+        # El dispositivo 248 continúa en el puerto siguiente con unit ID 1
+        self.assertEqual({t.unit_id for t in targets if t.port == 1503}, {1, 2, 3})
+
+    def test_parse_arguments(self):
+        """Test de validación de argumentos."""
+        config, args = parse_benchmark_arguments(
+            ["-c", "4", "-f", "3", "-t", "20ms", "--generation", "-o", "out.json"]
+        )
+        self.assertEqual(config.clients, 4)
+        self.assertAlmostEqual(config.update_interval, 0.02)
+        self.assertTrue(args.generation)
+        self.assertEqual(config.function_codes, [3])
+        self.assertEqual(args.output, "out.json")
+
+        with self.assertRaises(ValueError):
+            parse_benchmark_arguments(["-f", "5"])
+        with self.assertRaises(ValueError):
+            parse_benchmark_arguments(["--max-count", "200"])
+
+    def test_short_run(self):
+        """Test de una prueba corta contra el servidor real y del JSON guardado."""
+        config = BenchmarkConfig(clients=2, duration=0.5, warmup=0.2, port=15140, fast_read=True)
+        report = run_benchmark(config)
+
+        results = report["results"]
+        self.assertGreater(results["requests"], 0)
+        self.assertEqual(results["errors"], 0)
+        self.assertIn("p95_ms", results["function_codes"]["3"])
+        self.assertIn("p99_ms", results["function_codes"]["4"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.json")
+            save_report(report, path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["config"]["clients"], 2)
+
+    def test_short_run_with_workers(self):
+        """Test la prueba de carga con --workers (el servidor crea procesos generadores)."""
+        config = BenchmarkConfig(
+            devices=2, clients=2, duration=0.5, warmup=0.2, port=15141, workers=2
+        )
+        report = run_benchmark(config)
+
+        self.assertGreater(report["results"]["requests"], 0)
+        self.assertEqual(report["results"]["errors"], 0)
+
+    def test_wait_for_port_fails_fast_when_server_exits(self):
+        """Test si el proceso del servidor termina no se espera el timeout completo."""
+        process = multiprocessing.get_context("spawn").Process(target=int)
+        process.start()
+        process.join()
+
+        started = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            _wait_for_port("127.0.0.1", 15142, timeout=60, process=process)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_generation_at_100hz(self):
+        """Test del loop de actualización a 100 Hz sin ocupar un núcleo completo."""
+        config = BenchmarkConfig(
+            templates=["register_table_PM21XX.json"], update_interval=0.01, duration=1.0, warmup=0.2
+        )
+        results = run_generation_benchmark(config)["results"]
+
+        self.assertAlmostEqual(results["target_hz"], 100.0)
+        self.assertGreater(results["updates_per_second"], 80.0)
+        self.assertLess(results["cpu_percent"], 100.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Tests unitarios para la difusión a clientes WebSocket.
+"""
+
+import asyncio
+import unittest
+
+from src.web.broadcast import BroadcastHub, ClientChannel
+
+
+class FakeClient:
+    """Cliente que registra los mensajes recibidos; puede bloquearse o fallar."""
+
+    def __init__(self):
+        self.received = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.fail = False
+
+    async def send(self, message):
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("cliente desconectado")
+        self.received.append(message)
+
+
+class TestClientChannel(unittest.TestCase):
+    """Test cases para la cola acotada de un cliente."""
+
+    def test_drop_oldest(self):
+        """Test al llenarse la cola se descartan los mensajes más antiguos."""
+
+        async def send(message):
+            pass
+
+        async def scenario():
+            channel = ClientChannel(send, queue_size=2)
+            results = [channel.offer(n) for n in range(4)]
+            return channel, results
+
+        channel, results = asyncio.run(scenario())
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(list(channel.pending), [2, 3])
+        self.assertEqual(channel.dropped, 2)
+
+    def test_invalid_queue_size(self):
+        """Test cola sin capacidad."""
+        with self.assertRaises(ValueError):
+            ClientChannel(None, queue_size=0)
+
+
+class TestBroadcastHub(unittest.IsolatedAsyncioTestCase):
+    """Test cases para el hub de difusión."""
+
+    async def test_slow_client_does_not_delay_others(self):
+        """Test un cliente bloqueado solo pierde mensajes propios."""
+        hub = BroadcastHub(queue_size=2)
+        fast, slow = FakeClient(), FakeClient()
+        slow.gate.clear()
+        hub.register(fast.send)
+        slow_channel = hub.register(slow.send)
+
+        for n in range(5):
+            hub.publish(n)
+            await asyncio.sleep(0.001)
+
+        self.assertEqual(fast.received, [0, 1, 2, 3, 4])
+        # El primer mensaje quedó en envío; de los pendientes solo los 2 más recientes
+        slow.gate.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(slow.received, [0, 3, 4])
+        self.assertEqual(slow_channel.dropped, 2)
+        await hub.close()
+
+    async def test_failed_client_is_removed(self):
+        """Test un cliente que falla al enviar se quita del hub."""
+        hub = BroadcastHub()
+        client = FakeClient()
+        client.fail = True
+        hub.register(client.send)
+
+        hub.publish("hola")
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(len(hub), 0)
+        self.assertEqual(hub.get_statistics()["disconnected"], 1)
+
+    async def test_stuck_client_times_out(self):
+        """Test un envío que no termina a tiempo desconecta al cliente."""
+        hub = BroadcastHub(send_timeout=0.01)
+        client = FakeClient()
+        client.gate.clear()
+        closed = asyncio.Event()
+
+        async def close():
+            closed.set()
+
+        hub.register(client.send, close)
+
+        hub.publish("hola")
+        await asyncio.wait_for(closed.wait(), 1)
+
+        self.assertEqual(len(hub), 0)
+
+    async def test_unregister(self):
+        """Test un cliente quitado no recibe más mensajes."""
+        hub = BroadcastHub()
+        client = FakeClient()
+        channel = hub.register(client.send)
+        hub.publish(1)
+        await asyncio.sleep(0)
+        await hub.unregister(channel)
+        hub.publish(2)
+        await asyncio.sleep(0)
+
+        self.assertEqual(client.received, [1])
+        self.assertEqual(hub.get_statistics()["published"], 2)
+        self.assertEqual(hub.get_statistics()["disconnected"], 0)
+
+    async def test_resync_on_connect_and_after_drop(self):
+        """Test un cliente nuevo o que perdió mensajes recibe la resincronización."""
+        hub = BroadcastHub(queue_size=1)
+        client = FakeClient()
+        state = {"value": 0}
+        hub.register(client.send, resync=lambda: [("snapshot", state["value"])])
+        await asyncio.sleep(0.01)
+        self.assertEqual(client.received, [("snapshot", 0)])
+
+        client.gate.clear()
+        for value in (1, 2, 3):
+            state["value"] = value
+            hub.publish(("delta", value))
+            await asyncio.sleep(0)
+        client.gate.set()
+        await asyncio.sleep(0.01)
+
+        # El delta en envío llega; los descartados se reemplazan por la instantánea
+        self.assertEqual(client.received[-1], ("snapshot", 3))
+        self.assertNotIn(("delta", 3), client.received)
+        await hub.close()
+
+    async def test_publish_grouped_renders_once_per_key(self):
+        """Test el mensaje se genera una vez por grupo de clientes."""
+        hub = BroadcastHub()
+        clients = [FakeClient() for _ in range(3)]
+        for client, key in zip(clients, ("binary", "binary", "json")):
+            hub.register(client.send, key=key)
+        rendered = []
+
+        def render(key):
+            rendered.append(key)
+            return f"{key}-frame"
+
+        self.assertEqual(hub.publish_grouped(render), 2)
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(sorted(rendered), ["binary", "json"])
+        self.assertEqual([client.received for client in clients][2], ["json-frame"])
+        self.assertEqual(clients[0].received, ["binary-frame"])
+        await hub.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
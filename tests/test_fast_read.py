@@ -0,0 +1,120 @@
+"""
+Tests unitarios para la atención rápida de lecturas de registros.
+"""
+
+import unittest
+
+from pymodbus.datastore import ModbusSlaveContext
+from pymodbus.pdu import ExceptionResponse
+from pymodbus.register_read_message import ReadHoldingRegistersRequest
+
+from src.data_generation.register_image import RegisterImage, SpanLayout
+from src.modbus.datastore import RegisterImageDataBlock
+from src.modbus.fast_read import (
+    EncodedRegistersResponse,
+    FastReadHoldingRegistersRequest,
+    FastReadInputRegistersRequest,
+    ResponseCache,
+)
+
+
+class TestFastRead(unittest.TestCase):
+    """Test cases para las peticiones rápidas de las funciones 3 y 4."""
+
+    def setUp(self):
+        self.image = RegisterImage(5000, layout=SpanLayout([(3000, 4), (3010, 2)]))
+        self.image.write(3000, [1, 2, 0xABCD, 4])
+        self.image.write(3010, [5, 6])
+        self.block = RegisterImageDataBlock(self.image)
+        self.context = ModbusSlaveContext(
+            di=self.block, co=self.block, hr=self.block, ir=self.block
+        )
+
+    def _compare(self, address, count):
+        fast = FastReadHoldingRegistersRequest(address, count).execute(self.context)
+        standard = ReadHoldingRegistersRequest(address, count).execute(self.context)
+        self.assertEqual(fast.encode(), standard.encode())
+        return fast
+
+    def test_matches_standard_encoding(self):
+        """Test bytes idénticos a la respuesta estándar de pymodbus."""
+        response = self._compare(2999, 4)
+
+        self.assertIsInstance(response, EncodedRegistersResponse)
+        self.assertEqual(response.registers, [1, 2, 0xABCD, 4])
+        self.assertEqual(response.function_code, 3)
+
+    def test_range_crossing_gap(self):
+        """Test rango con huecos: las direcciones no almacenadas se leen como cero."""
+        response = self._compare(3001, 10)
+
+        self.assertEqual(response.registers, [0xABCD, 4, 0, 0, 0, 0, 0, 0, 5, 6])
+
+    def test_sees_new_publications(self):
+        """Test la instantánea codificada se renueva al publicar."""
+        self._compare(3009, 2)
+        self.image.write(3011, [9])
+
+        self.assertEqual(self._compare(3009, 2).registers, [5, 9])
+
+    def test_invalid_requests(self):
+        """Test excepciones Modbus para cantidad o dirección inválidas."""
+        too_many = FastReadInputRegistersRequest(0, 200).execute(self.context)
+        out_of_range = FastReadInputRegistersRequest(4999, 2).execute(self.context)
+
+        self.assertIsInstance(too_many, ExceptionResponse)
+        self.assertIsInstance(out_of_range, ExceptionResponse)
+
+    def test_on_read_hook(self):
+        """Test la lectura rápida invoca la generación bajo demanda."""
+        calls = []
+        self.block.on_read = lambda address, count: calls.append((address, count))
+
+        FastReadInputRegistersRequest(2999, 2).execute(self.context)
+
+        self.assertEqual(calls, [(3000, 2)])
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test cases para la caché de respuestas por época."""
+
+    def setUp(self):
+        self.image = RegisterImage(100, layout=SpanLayout([(10, 4)]))
+        self.image.write(10, [1, 2, 3, 4])
+        self.block = RegisterImageDataBlock(self.image)
+        self.context = ModbusSlaveContext(hr=self.block, ir=self.block)
+        self.cache = ResponseCache(max_entries=2)
+        self.request_class = type(
+            "CachedRequest", (FastReadHoldingRegistersRequest,), {"cache": self.cache}
+        )
+
+    def _read(self, address, count):
+        return self.request_class(address, count).execute(self.context)
+
+    def test_hit_until_epoch_changes(self):
+        """Test respuestas reutilizadas hasta la siguiente publicación."""
+        first = self._read(9, 2).encode()
+        second = self._read(9, 2).encode()
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        self.block.setValues(10, [7])
+
+        self.assertEqual(self._read(9, 2).registers, [7, 2])
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_lru_eviction(self):
+        """Test se descarta la respuesta menos usada."""
+        self._read(9, 1)
+        self._read(10, 1)
+        self._read(9, 1)
+        self._read(11, 1)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self._read(9, 1)
+        self.assertEqual(self.cache.hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
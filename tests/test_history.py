@@ -0,0 +1,193 @@
+"""
+Tests unitarios para el historial en memoria y su submuestreo.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.data_generation.history import RegisterHistory, downsample_lttb, downsample_minmax
+from src.data_generation.meter_generator import MeterDataGenerator
+
+
+def _register(address, integer=False, width=1):
+    """Registro mínimo del plan para el historial."""
+    return SimpleNamespace(address=address, codec=SimpleNamespace(integer=integer, width=width))
+
+
+class TestRegisterHistory(unittest.TestCase):
+    """Test cases para RegisterHistory."""
+
+    def setUp(self):
+        self.history = RegisterHistory([_register(1000), _register(1002, integer=True)], 4)
+
+    def test_series_is_chronological_after_wrap(self):
+        """Test al llenarse el buffer se sobrescriben las filas más antiguas."""
+        for second in range(6):
+            self.history.record(float(second), np.array([second * 1.5, second]))
+
+        times, values = self.history.series(1000)
+
+        self.assertEqual(len(self.history), 4)
+        self.assertEqual(times.tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(values.tolist(), [3.0, 4.5, 6.0, 7.5])
+
+    def test_window_is_inclusive(self):
+        """Test la ventana incluye sus extremos."""
+        for second in range(4):
+            self.history.record(float(second), np.array([second, second]))
+
+        times, _ = self.history.series(1000, start=1.0, end=2.0)
+
+        self.assertEqual(times.tolist(), [1.0, 2.0])
+
+    def test_integer_registers_are_truncated(self):
+        """Test los registros enteros se guardan truncados, como en la imagen."""
+        self.history.record(0.0, np.array([2.75, 2.75]))
+
+        self.assertEqual(self.history.series(1000)[1].tolist(), [2.75])
+        self.assertEqual(self.history.series(1002)[1].tolist(), [2.0])
+
+    def test_wide_integers_are_exact(self):
+        """Test los timestamps y contadores de 64 bits no pierden precisión."""
+        history = RegisterHistory(
+            [_register(1000, width=2), _register(1002, integer=True, width=4)], 4
+        )
+        timestamp = 1_700_000_001.0
+
+        history.record(0.0, np.array([timestamp, 2**53 - 1]))
+
+        self.assertNotEqual(history.series(1000)[1][0], timestamp)  # FLOAT32: redondeado
+        self.assertEqual(history.series(1002)[1].tolist(), [2**53 - 1])
+
+    def test_resolution_skips_close_rows(self):
+        """Test no se guardan dos filas a menos de ``resolution`` segundos."""
+        history = RegisterHistory([_register(1000)], 10, resolution=1.0)
+
+        recorded = [history.record(t, np.array([t])) for t in (0.0, 0.5, 1.0, 1.2, 2.5)]
+
+        self.assertEqual(recorded, [True, False, True, False, True])
+        self.assertEqual(history.series(1000)[0].tolist(), [0.0, 1.0, 2.5])
+
+    def test_clock_step_back_keeps_order(self):
+        """Test si el reloj retrocede no se guardan filas desordenadas."""
+        history = RegisterHistory([_register(1000)], 10)
+
+        recorded = [history.record(t, np.array([t])) for t in (10.0, 11.0, 5.0, 11.0, 12.0)]
+
+        self.assertEqual(recorded, [True, True, False, True, True])
+        times, _ = history.series(1000, start=11.0)
+        self.assertEqual(times.tolist(), [11.0, 11.0, 12.0])
+
+    def test_unknown_register_raises(self):
+        """Test un registro fuera del plan lanza KeyError."""
+        with self.assertRaises(KeyError):
+            self.history.series(2000)
+
+    def test_capacity_must_be_positive(self):
+        """Test la capacidad debe ser de al menos una fila."""
+        with self.assertRaises(ValueError):
+            RegisterHistory([_register(1000)], 0)
+
+
+class TestDownsample(unittest.TestCase):
+    """Test cases para downsample_minmax y downsample_lttb."""
+
+    def setUp(self):
+        self.times = np.arange(1000, dtype=np.float64)
+        self.values = np.sin(self.times / 50.0)
+
+    def test_minmax_keeps_extremes(self):
+        """Test cada intervalo conserva su mínimo y su máximo."""
+        values = self.values.copy()
+        values[333] = 10.0
+        values[777] = -10.0
+
+        result = downsample_minmax(self.times, values, 100)
+
+        self.assertEqual(len(result["t"]), 100)
+        self.assertEqual(max(result["max"]), 10.0)
+        self.assertEqual(min(result["min"]), -10.0)
+        self.assertAlmostEqual(np.mean(result["avg"]), values.mean(), places=6)
+
+    def test_lttb_point_count_and_ends(self):
+        """Test LTTB devuelve ``points`` muestras e incluye la primera y la última."""
+        result = downsample_lttb(self.times, self.values, 50)
+
+        self.assertEqual(len(result["t"]), 50)
+        self.assertEqual(result["t"][0], 0.0)
+        self.assertEqual(result["t"][-1], 999.0)
+        self.assertEqual(result["t"], sorted(result["t"]))
+
+    def test_short_series_is_returned_whole(self):
+        """Test una serie con menos muestras que ``points`` no se reduce."""
+        times, values = self.times[:5], self.values[:5]
+
+        self.assertEqual(downsample_lttb(times, values, 10)["t"], times.tolist())
+        self.assertEqual(downsample_minmax(times, values, 10)["avg"], values.tolist())
+
+    def test_nan_is_null(self):
+        """Test los valores NaN se devuelven como None (JSON null)."""
+        result = downsample_minmax(self.times[:2], np.array([np.nan, 1.0]), 10)
+
+        self.assertEqual(result["avg"], [None, 1.0])
+
+
+class TestGeneratorHistory(unittest.TestCase):
+    """Test cases para el historial de MeterDataGenerator."""
+
+    def setUp(self):
+        registers = [
+            {
+                "address": 1000,
+                "data_type": "FLOAT32",
+                "description": "Test Float",
+                "generation": {"type": "uniform", "params": [10.0, 20.0]},
+            },
+            {
+                "address": 1002,
+                "data_type": "INT16",
+                "description": "Test Int",
+                "generation": {"type": "randint", "params": [1, 10]},
+            },
+        ]
+        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+            json.dump(registers, f)
+            self.temp_file = f.name
+        self.generator = MeterDataGenerator(
+            device_id=1, register_file=self.temp_file, update_interval=0
+        )
+
+    def tearDown(self):
+        os.unlink(self.temp_file)
+
+    def test_history_disabled_by_default(self):
+        """Test sin enable_history no se guarda historial."""
+        self.generator.generate_registers()
+
+        self.assertIsNone(self.generator.history)
+        self.assertIsNone(self.generator.get_statistics()["history_rows"])
+
+    def test_generation_records_rows(self):
+        """Test cada generación guarda una fila con los valores publicados."""
+        self.generator.enable_history(10)
+
+        self.generator.generate_registers()
+        self.generator.generate_registers()
+
+        self.assertEqual(len(self.generator.history), 2)
+        floats = self.generator.history.series(1000)[1]
+        integers = self.generator.history.series(1002)[1]
+        self.assertTrue(((floats >= 10.0) & (floats <= 20.0)).all())
+        self.assertTrue(((integers >= 1) & (integers <= 10)).all())
+        self.assertEqual(integers.tolist(), np.trunc(integers).tolist())
+        self.assertEqual(floats[-1], np.float32(self.generator.get_register_value(1000, "FLOAT32")))
+        self.assertEqual(self.generator.get_statistics()["history_rows"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,15 +2,23 @@
 Tests de integración para el simulador completo.
 """
 
+import asyncio
 import unittest
 import tempfile
 import json
 import os
+import pstats
+import shutil
+import time
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
 from src.data_generation.meter_generator import MeterDataGenerator
 from src.data_generation.register_loader import load_register_table, validate_register_definition
+from src.data_generation.device_template import DeviceTemplate
+from src.data_generation.sharding import ShardedGeneration
 from src.config.cli_parser import parse_arguments
+from src.modbus.server import ModbusServerManager
 
 
 class TestRegisterLoader(unittest.TestCase):
@@ -130,6 +138,257 @@ class TestMeterDataGenerator(unittest.TestCase):
         value = generator.get_register_value(1002, "INT16")
         self.assertEqual(value, 100)
 
+    def test_compact_register_image(self):
+        """Test la imagen solo almacena los registros de la tabla."""
+        generator = MeterDataGenerator(device_id=1, register_file=self.temp_file, update_interval=0)
+        generator.generate_registers()
+
+        self.assertEqual(generator.image.front.size, 3)
+        self.assertTrue(generator.block.validate(0, 5000))
+        self.assertEqual(generator.block.getValues(1002, 2), [100, 0])
+        self.assertEqual(generator.block.getValues(999, 2)[0], 0)
+
+    def test_per_register_periods(self):
+        """Test regeneración solo de los grupos de registros vencidos."""
+        registers = [
+            {
+                "address": 1000,
+                "data_type": "FLOAT32",
+                "description": "Rápido",
+                "period": 0.05,
+                "generation": {"type": "uniform", "params": [0.0, 1000.0]},
+            },
+            {
+                "address": 1002,
+                "data_type": "INT16U",
+                "description": "Fijo",
+                "generation": {"type": "fixed", "params": [7]},
+            },
+        ]
+        with open(self.temp_file, "w") as f:
+            json.dump(registers, f)
+
+        generator = MeterDataGenerator(device_id=1, register_file=self.temp_file)
+        self.assertTrue(generator.generate_registers())
+        self.assertFalse(generator.generate_registers())
+
+        # El registro fijo no se regenera: una escritura externa se conserva
+        generator.block.setValues(1002, [9])
+        time.sleep(0.06)
+        self.assertTrue(generator.generate_registers())
+        self.assertEqual(generator.get_register_value(1002, "INT16U"), 9)
+
+        periods = [group["period"] for group in generator.get_statistics()["rate_groups"]]
+        self.assertEqual(periods, [0.05, None])
+
+    def test_lazy_refresh_only_touched_range(self):
+        """Test generación bajo demanda solo del rango leído y solo si está vencido."""
+        generator = MeterDataGenerator(device_id=1, register_file=self.temp_file)
+        generator.enable_lazy(ttl=60)
+        generator.block.on_read = generator.refresh_range
+
+        generator.block.getValues(1002, 1)
+
+        self.assertEqual(generator.get_register_value(1002, "INT16"), 100)
+        self.assertEqual(generator.get_register_value(1000, "FLOAT32"), 0.0)
+
+        # Dentro del TTL no se vuelve a generar
+        self.assertEqual(generator.refresh_range(1000, 3), 1)
+        self.assertEqual(generator.refresh_range(1000, 3), 0)
+        self.assertAlmostEqual(generator.get_register_value(1000, "FLOAT32"), 42.0, delta=0.01)
+
+
+class TestFleet(unittest.TestCase):
+    """Test cases para el modo flota."""
+
+    def _args(self, **overrides):
+        args = dict(
+            protocol="tcp",
+            host="127.0.0.1",
+            port=5020,
+            unit_id=1,
+            slave_id=1,
+            devices=300,
+            update_interval=60,
+            verbose=False,
+            templates=["register_table_PM21XX.json", "register_table_generic.json"],
+        )
+        args.update(overrides)
+        return SimpleNamespace(**args)
+
+    def test_devices_share_templates(self):
+        """Test dispositivos creados desde plantillas compartidas."""
+        manager = ModbusServerManager(self._args())
+        manager.initialize_generators()
+
+        self.assertEqual(len(manager.generators), 300)
+        self.assertEqual(len(manager.templates), 2)
+        self.assertIs(manager.generators[0].plan, manager.generators[2].plan)
+        self.assertIsNot(manager.generators[0].plan, manager.generators[1].plan)
+        self.assertIsNot(
+            manager.generators[0].rate_groups[0].engine.rng,
+            manager.generators[2].rate_groups[0].engine.rng,
+        )
+
+    def test_unit_ids_are_split_across_endpoints(self):
+        """Test reparto de unit IDs en puertos consecutivos."""
+        manager = ModbusServerManager(self._args())
+        manager.initialize_generators()
+
+        self.assertEqual(
+            {port: len(g) for port, g in manager.endpoints.items()}, {5020: 247, 5021: 53}
+        )
+        self.assertEqual(manager.endpoints[5021][0].device_id, 1)
+        self.assertEqual(max(g.device_id for g in manager.generators), 247)
+
+        fleet = manager.get_server_stats()["fleet"]
+        self.assertGreater(fleet["bytes_per_device"], 0)
+        self.assertGreater(fleet["startup_seconds"], 0)
+
+    def test_devices_are_staggered(self):
+        """Test tras la primera generación los dispositivos se reparten en el intervalo."""
+        manager = ModbusServerManager(self._args(devices=4, stagger="even"))
+        manager.initialize_generators()
+
+        for generator in manager.generators:
+            generator.generate_registers()
+        deadlines = [g.next_deadline() for g in manager.generators]
+        offsets = [(deadline - deadlines[0]) % 60 for deadline in deadlines]
+        for offset, expected in zip(offsets, [0, 15, 30, 45]):
+            self.assertAlmostEqual(offset, expected, delta=0.5)
+
+
+class TestAsyncServer(unittest.IsolatedAsyncioTestCase):
+    """Test cases para el servidor en el loop asyncio del llamador."""
+
+    async def test_serve_and_shutdown(self):
+        """Test servidor (lecturas rápidas, caché, métricas, perfil y almacenamiento) y generación en el mismo loop, detención limpia."""
+        from pymodbus.client import AsyncModbusTcpClient
+
+        profile_path = os.path.join(tempfile.mkdtemp(), "vpm.pstats")
+        self.addCleanup(shutil.rmtree, os.path.dirname(profile_path))
+
+        args = SimpleNamespace(
+            protocol="tcp",
+            host="127.0.0.1",
+            port=15120,
+            unit_id=1,
+            slave_id=1,
+            devices=2,
+            update_interval=60,
+            verbose=False,
+            fast_read=True,
+            response_cache=16,
+            profile=profile_path,
+            store=os.path.join(os.path.dirname(profile_path), "store"),
+            store_retention=1.0,
+            store_resolution=1.0,
+        )
+        manager = ModbusServerManager(args)
+        serve_task = asyncio.create_task(manager.serve())
+
+        client = AsyncModbusTcpClient("127.0.0.1", port=15120)
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            if manager.generators and manager.generators[0].image.published_at:
+                await client.connect()
+                if client.connected:
+                    break
+        try:
+            result = await client.read_holding_registers(2999, 2, slave=1)
+            self.assertFalse(result.isError())
+            self.assertEqual(result.registers, manager.generators[0].block.getValues(3000, 2))
+            again = await client.read_holding_registers(2999, 2, slave=1)
+            self.assertEqual(again.registers, result.registers)
+            self.assertEqual(manager.get_server_stats()["response_cache"]["hits"], 1)
+            requests = manager.get_server_stats()["requests"]
+            self.assertEqual(requests["requests"], 2)
+            self.assertEqual(requests["connections_active"], 1)
+            self.assertGreater(requests["bytes_sent"], 0)
+            timing = manager.get_server_stats()["generation_timing"]
+            self.assertGreaterEqual(timing["tick"]["count"], 1)
+        finally:
+            client.close()
+
+        await manager.shutdown()
+        await asyncio.wait_for(serve_task, timeout=5)
+        self.assertFalse(manager._running)
+        self.assertGreater(pstats.Stats(profile_path).total_calls, 0)
+        # Cada dispositivo guardó su primera generación (y su minuto en curso) al detenerse
+        store = manager.store.get_statistics()
+        self.assertEqual(store["devices"], 2)
+        self.assertEqual(store["raw"], 2)
+        self.assertEqual(store["1m"], 2)
+        self.assertEqual(manager.store.devices[1].query(3000, tier="raw")["rows"], 1)
+
+
+class TestShardedGeneration(unittest.TestCase):
+    """Test cases para la generación en procesos trabajadores."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        registers = [
+            {
+                "address": 1000,
+                "data_type": "FLOAT32",
+                "description": "Test Float",
+                "generation": {"type": "fixed", "params": [42.0]},
+            },
+            {
+                "address": 1002,
+                "data_type": "INT16U",
+                "description": "Test Int",
+                "generation": {"type": "fixed", "params": [100]},
+            },
+        ]
+        with open(os.path.join(self.temp_dir.name, "table.json"), "w") as f:
+            json.dump(registers, f)
+        self.template = DeviceTemplate(
+            "table.json", load_register_table(os.path.join(self.temp_dir.name, "table.json"))
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _wait_for(self, condition, timeout=20.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.05)
+        return False
+
+    def test_workers_write_shared_images(self):
+        """Test los trabajadores generan en memoria compartida y reciben escrituras."""
+        shards = ShardedGeneration(
+            2,
+            [(unit, "table.json", self.template) for unit in (1, 2, 3)],
+            update_interval=60,
+            register_tables_dir=self.temp_dir.name,
+        )
+        generators = [
+            MeterDataGenerator(unit, template=self.template, image=shards.image(index))
+            for index, unit in enumerate((1, 2, 3))
+        ]
+        shards.start()
+        try:
+            self.assertTrue(self._wait_for(lambda: all(g.image.version for g in generators)))
+            for generator in generators:
+                self.assertAlmostEqual(
+                    generator.get_register_value(1000, "FLOAT32"), 42.0, delta=0.01
+                )
+
+            # Escritura de un cliente Modbus: se reenvía al trabajador propietario
+            generators[2].block.setValues(1002, [7])
+            self.assertTrue(self._wait_for(lambda: generators[2].block.getValues(1002) == [7]))
+            self.assertEqual(generators[1].block.getValues(1002), [100])
+
+            stats = shards.get_statistics()
+            self.assertEqual([s["devices"] for s in stats], [2, 1])
+            self.assertTrue(all(s["alive"] and s["cycles"] > 0 for s in stats))
+        finally:
+            shards.stop()
+
 
 class TestCLIParser(unittest.TestCase):
     """Test cases para el parser de argumentos CLI."""
@@ -151,6 +410,54 @@ class TestCLIParser(unittest.TestCase):
         self.assertEqual(args.devices, 2)
         self.assertTrue(args.verbose)
 
+    @patch("sys.argv", ["virtual_pm_CLI.py", "--lazy", "--lazy-ttl", "2.5"])
+    def test_lazy_arguments(self):
+        """Test argumentos de generación bajo demanda."""
+        args = parse_arguments()
+        self.assertTrue(args.lazy)
+        self.assertEqual(args.lazy_ttl, 2.5)
+
+    @patch("sys.argv", ["virtual_pm_CLI.py", "--devices", "500", "--templates", "a.json, b.json"])
+    def test_fleet_arguments(self):
+        """Test argumentos del modo flota."""
+        args = parse_arguments()
+        self.assertEqual(args.devices, 500)
+        self.assertEqual(args.templates, ["a.json", "b.json"])
+
+    @patch("sys.argv", ["virtual_pm_CLI.py", "--catch-up", "burst", "--align-ticks"])
+    def test_scheduling_arguments(self):
+        """Test argumentos de recuperación y alineación de ciclos."""
+        args = parse_arguments()
+        self.assertEqual(args.catch_up, "burst")
+        self.assertTrue(args.align_ticks)
+
+    def test_sub_second_intervals(self):
+        """Test intervalos fraccionarios y en milisegundos."""
+        for value, expected in [("0.5", 0.5), ("10ms", 0.01), ("2s", 2.0)]:
+            with self.subTest(value=value), patch("sys.argv", ["vpm", "-t", value]):
+                self.assertAlmostEqual(parse_arguments().update_interval, expected)
+
+        with patch("sys.argv", ["vpm", "-t", "0.1ms"]), self.assertRaises(ValueError):
+            parse_arguments()
+
+    @patch("sys.argv", ["virtual_pm_CLI.py", "--metrics-port", "0"])
+    def test_invalid_metrics_port(self):
+        """Test puerto del exportador de métricas fuera de rango."""
+        with self.assertRaises(ValueError):
+            parse_arguments()
+
+    @patch("sys.argv", ["virtual_pm_CLI.py", "--workers", "2", "--lazy"])
+    def test_workers_incompatible_with_lazy(self):
+        """Test procesos generadores no combinables con generación bajo demanda."""
+        with self.assertRaises(ValueError):
+            parse_arguments()
+
+    @patch("sys.argv", ["virtual_pm_CLI.py", "--devices", "0"])
+    def test_invalid_device_count(self):
+        """Test número de dispositivos fuera de rango."""
+        with self.assertRaises(ValueError):
+            parse_arguments()
+
     @patch("sys.argv", ["virtual_pm_CLI.py", "--protocol", "rtu"])
     def test_rtu_without_serial_port(self):
         """Test protocolo RTU sin puerto serial."""
@@ -0,0 +1,99 @@
+"""
+Tests unitarios para el logging en segundo plano.
+"""
+
+import io
+import json
+import logging
+import os
+import queue
+import tempfile
+import unittest
+
+from src.config.logging_setup import (
+    _DeferredQueueHandler,
+    get_logger,
+    setup_logging,
+    shutdown_logging,
+)
+from src.data_generation.meter_generator import UPDATE_LOG_INTERVAL, MeterDataGenerator
+
+
+class TestBackgroundLogging(unittest.TestCase):
+    """Test cases para la cola de mensajes y su thread escritor."""
+
+    def setUp(self):
+        shutdown_logging()
+        self.output = io.StringIO()
+        setup_logging(stream=self.output)
+
+    def tearDown(self):
+        shutdown_logging()
+
+    def test_messages_are_written_by_listener(self):
+        """Test los mensajes se escriben al vaciar la cola."""
+        get_logger("test").info("hola %s", "mundo")
+        shutdown_logging()
+
+        self.assertEqual(self.output.getvalue(), "hola mundo\n")
+
+    def test_formatting_is_deferred(self):
+        """Test el handler encola el registro sin formatear el mensaje."""
+        calls = []
+
+        class Costly:
+            def __str__(self):
+                calls.append(1)
+                return "volcado"
+
+        records = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(records)
+        handler.handle(logging.makeLogRecord({"msg": Costly()}))
+
+        self.assertEqual(calls, [])
+        self.assertEqual(records.get_nowait().getMessage(), "volcado")
+
+
+class TestUpdateLogRateLimit(unittest.TestCase):
+    """Test cases para el límite de mensajes de actualización por dispositivo."""
+
+    def setUp(self):
+        registers = [
+            {
+                "address": 1000,
+                "data_type": "FLOAT32",
+                "description": "Test Float",
+                "generation": {"type": "fixed", "params": [42.0]},
+            }
+        ]
+        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+            json.dump(registers, f)
+            self.temp_file = f.name
+        self.generator = MeterDataGenerator(device_id=3, register_file=self.temp_file)
+
+    def tearDown(self):
+        os.unlink(self.temp_file)
+
+    def test_updates_are_rate_limited(self):
+        """Test un mensaje por intervalo, informando las actualizaciones omitidas."""
+        with self.assertLogs("vpm.generation", level="INFO") as captured:
+            self.generator._log_update(1, now=100.0)
+            self.generator._log_update(1, now=101.0)
+            self.generator._log_update(1, now=102.0)
+            self.generator._log_update(1, now=100.0 + UPDATE_LOG_INTERVAL)
+
+        self.assertEqual(len(captured.output), 2)
+        self.assertIn("(+2 actualizaciones sin informar)", captured.output[1])
+
+    def test_register_dump_keeps_snapshot(self):
+        """Test el volcado conserva los valores del momento de la captura."""
+        self.generator.generate_registers()
+        dump = self.generator.register_dump()
+        self.generator.block.setValues(1000, [0, 0])
+
+        self.assertIn("42.0", str(dump))
+        self.assertIn("Device ID 3", str(dump))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Tests unitarios para la instrumentación del ciclo de generación.
+"""
+
+import unittest
+
+from src.data_generation.loop_timing import GenerationTimings, RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    """Test cases para el buffer circular de muestras."""
+
+    def test_keeps_latest_samples(self):
+        """Test el buffer sobrescribe las muestras más antiguas."""
+        buffer = RingBuffer(3)
+        for value in range(5):
+            buffer.append(float(value))
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(sorted(buffer.samples()), [2.0, 3.0, 4.0])
+        summary = buffer.summary()
+        self.assertEqual(summary["count"], 5)
+        self.assertEqual(summary["max"], 4.0)
+
+    def test_empty_summary(self):
+        """Test resumen sin muestras."""
+        self.assertIsNone(RingBuffer(3).summary()["p99"])
+
+
+class TestGenerationTimings(unittest.TestCase):
+    """Test cases para la duración, jitter y costo por dispositivo."""
+
+    def test_overruns(self):
+        """Test los ciclos más largos que el intervalo se cuentan como excedidos."""
+        timings = GenerationTimings(interval=1.0, history=8)
+
+        self.assertFalse(timings.record_tick(0.5))
+        self.assertTrue(timings.record_tick(1.5, jitter=0.01))
+
+        stats = timings.get_statistics()
+        self.assertEqual(stats["overruns"], 1)
+        self.assertEqual(stats["last_overrun"], 1.5)
+        self.assertEqual(stats["tick"]["count"], 2)
+        self.assertEqual(stats["jitter"]["count"], 1)
+        self.assertEqual(stats["jitter"]["max"], 0.01)
+
+    def test_slowest_devices(self):
+        """Test dispositivos más costosos sin repetir unit IDs."""
+        timings = GenerationTimings(interval=1.0, history=8)
+        for device_id, cost in [(1, 0.001), (2, 0.005), (2, 0.004), (3, 0.002)]:
+            timings.record_device(device_id, cost)
+
+        slowest = timings.get_statistics()["slowest_devices"]
+        self.assertEqual([d["device_id"] for d in slowest], [2, 3, 1])
+        self.assertEqual(slowest[0]["max"], 0.005)
+
+
+if __name__ == "__main__":
+    unittest.main()
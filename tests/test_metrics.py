@@ -0,0 +1,94 @@
+"""
+Tests unitarios para las métricas de peticiones del servidor Modbus.
+"""
+
+import asyncio
+import unittest
+
+from src.modbus.metrics import LATENCY_BUCKETS, ServerMetrics, serve_metrics
+
+
+class TestServerMetrics(unittest.TestCase):
+    """Test cases para los contadores e histogramas de peticiones."""
+
+    def setUp(self):
+        self.metrics = ServerMetrics()
+
+    def test_observe_counts_per_series(self):
+        """Test contadores separados por endpoint, unit ID y función."""
+        self.metrics.observe("502", 1, 3, 0.0002)
+        self.metrics.observe("502", 1, 3, 0.002)
+        self.metrics.observe("502", 2, 4, 0.02, exception_code=2)
+
+        stats = self.metrics.get_statistics()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["exceptions"], 1)
+
+    def test_render_histogram(self):
+        """Test buckets acumulados, suma y cuenta del histograma."""
+        self.metrics.observe("502", 1, 3, 0.0002)
+        self.metrics.observe("502", 1, 3, 10.0)
+
+        text = self.metrics.render()
+        labels = 'endpoint="502",unit_id="1",function_code="3"'
+        self.assertIn(f"vpm_modbus_requests_total{{{labels}}} 2", text)
+        self.assertIn(f'vpm_modbus_request_duration_seconds_bucket{{{labels},le="0.00025"}} 1', text)
+        self.assertIn(
+            f'vpm_modbus_request_duration_seconds_bucket{{{labels},le="{LATENCY_BUCKETS[-1]}"}} 1',
+            text,
+        )
+        self.assertIn(f'vpm_modbus_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f"vpm_modbus_request_duration_seconds_count{{{labels}}} 2", text)
+
+    def test_render_exceptions_and_connections(self):
+        """Test excepciones por código, conexiones y bytes."""
+        self.metrics.observe("502", 7, 3, 0.001, exception_code=2)
+        self.metrics.connections_active = 1
+        self.metrics.bytes_received = 12
+
+        text = self.metrics.render()
+        self.assertIn(
+            'vpm_modbus_exceptions_total{endpoint="502",unit_id="7",function_code="3",'
+            'exception_code="2"} 1',
+            text,
+        )
+        self.assertIn("vpm_modbus_connections_active 1", text)
+        self.assertIn("vpm_modbus_received_bytes_total 12", text)
+
+
+class TestMetricsExporter(unittest.IsolatedAsyncioTestCase):
+    """Test cases para el exportador HTTP independiente."""
+
+    async def _get(self, port, path):
+        for _ in range(50):
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+
+    async def test_serves_metrics(self):
+        """Test /metrics responde el texto de exposición y otras rutas 404."""
+        metrics = ServerMetrics()
+        metrics.observe("502", 1, 3, 0.001)
+        task = asyncio.create_task(serve_metrics(metrics, "127.0.0.1", 15130))
+        try:
+            response = await self._get(15130, "/metrics")
+            self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+            self.assertIn("text/plain; version=0.0.4", response)
+            self.assertIn(metrics.render(), response)
+
+            missing = await self._get(15130, "/")
+            self.assertTrue(missing.startswith("HTTP/1.1 404"))
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
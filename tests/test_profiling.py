@@ -0,0 +1,98 @@
+"""
+Tests unitarios para el perfilado bajo demanda.
+"""
+
+import asyncio
+import marshal
+import unittest
+
+from src.modbus.profiling import (
+    MAX_CAPTURE_SECONDS,
+    ProfilerBusy,
+    ProfileSession,
+    capture_allocations,
+    capture_profile,
+    validate_stats_options,
+)
+
+
+def _busy_work():
+    return sum(i * i for i in range(10000))
+
+
+class TestProfiling(unittest.IsolatedAsyncioTestCase):
+    """Test cases para las capturas de cProfile y tracemalloc."""
+
+    async def _work_loop(self):
+        while True:
+            _busy_work()
+            await asyncio.sleep(0.01)
+
+    async def test_capture_profile_sees_loop_tasks(self):
+        """Test el perfil incluye las tareas del loop durante la ventana."""
+        worker = asyncio.create_task(self._work_loop())
+        try:
+            session = await capture_profile(0.1)
+        finally:
+            worker.cancel()
+
+        self.assertIn("_work_loop", session.stats_text(limit=100))
+        stats = marshal.loads(session.stats_bytes())
+        self.assertTrue(any(function == "_busy_work" for _, _, function in stats))
+
+    async def test_single_capture_at_a_time(self):
+        """Test una segunda captura simultánea se rechaza."""
+        session = ProfileSession()
+        session.start()
+        try:
+            with self.assertRaises(ProfilerBusy):
+                await capture_profile(0.01)
+            with self.assertRaises(ProfilerBusy):
+                await capture_allocations(0.01)
+        finally:
+            session.stop()
+        session.stop()
+
+        await capture_profile(0.01)
+
+    async def test_invalid_capture(self):
+        """Test duración y orden fuera de rango."""
+        with self.assertRaises(ValueError):
+            await capture_profile(0)
+        with self.assertRaises(ValueError):
+            await capture_allocations(MAX_CAPTURE_SECONDS + 1)
+        session = await capture_profile(0.01)
+        with self.assertRaises(ValueError):
+            session.stats_text(sort="name")
+        with self.assertRaises(ValueError):
+            session.stats_text(limit=0)
+
+    def test_stats_options_are_checked_before_capture(self):
+        """Test el orden y el límite se validan sin capturar (y sin tomar el lock)."""
+        validate_stats_options("tottime", 10)
+        for sort, limit in (("name", 10), ("cumulative", 0)):
+            with self.subTest(sort=sort, limit=limit), self.assertRaises(ValueError):
+                validate_stats_options(sort, limit)
+        session = ProfileSession()
+        session.start()
+        session.stop()
+
+    async def test_capture_allocations(self):
+        """Test el reporte lista las asignaciones retenidas durante la ventana."""
+        retained = []
+
+        async def allocate():
+            for _ in range(20):
+                retained.append(bytearray(64 * 1024))
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(allocate())
+        report = await capture_allocations(0.2, limit=5)
+        await task
+
+        self.assertIn("Memoria retenida", report)
+        self.assertIn("test_profiling.py", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Tests unitarios para la imagen de registros con doble buffer.
+"""
+
+import threading
+import unittest
+
+import numpy as np
+
+from src.data_generation.register_image import RegisterImage, SpanLayout
+from src.data_generation.shared_image import SharedRegisterImage
+from src.modbus.datastore import RegisterImageDataBlock
+
+
+class TestRegisterImage(unittest.TestCase):
+    """Test cases para RegisterImage."""
+
+    def test_back_buffer_is_invisible_until_publish(self):
+        """Test escrituras en el buffer trasero no visibles antes de publicar."""
+        image = RegisterImage(10)
+
+        with image.write_lock:
+            image.back[2:4] = [7, 8]
+            self.assertEqual(image.read(2, 2).tolist(), [0, 0])
+            image.publish()
+
+        self.assertEqual(image.read(2, 2).tolist(), [7, 8])
+
+    def test_published_snapshot_is_never_mutated(self):
+        """Test una instantánea publicada no cambia con publicaciones posteriores."""
+        image = RegisterImage(4)
+        image.write(0, [1, 2, 3, 4])
+        snapshot = image.front
+
+        image.write(0, [9, 9])
+
+        self.assertEqual(snapshot.tolist(), [1, 2, 3, 4])
+        self.assertEqual(image.front.tolist(), [9, 9, 3, 4])
+
+    def test_concurrent_reads_see_consistent_words(self):
+        """Test lectores concurrentes nunca ven un valor a medias."""
+        image = RegisterImage(4)
+        stop = threading.Event()
+        torn = []
+
+        def writer():
+            value = 0
+            while not stop.is_set():
+                value = (value + 1) % 65536
+                with image.write_lock:
+                    image.back[:] = value
+                    image.publish()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            for _ in range(20000):
+                words = image.front
+                if not np.all(words == words[0]):
+                    torn.append(words.tolist())
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertEqual(torn, [])
+
+
+class TestSpanLayout(unittest.TestCase):
+    """Test cases para SpanLayout."""
+
+    def test_spans_are_merged_and_packed(self):
+        """Test unión de rangos solapados o contiguos y posiciones compactas."""
+        layout = SpanLayout([(3036, 4), (3000, 2), (3002, 2), (3038, 4)])
+
+        self.assertEqual(layout.spans, ((3000, 4), (3036, 6)))
+        self.assertEqual(layout.size, 10)
+        self.assertEqual(layout.position(3036, 6), 4)
+        self.assertIsNone(layout.position(3002, 4))
+        self.assertEqual(layout.positions([3000, 3010, 3041]).tolist(), [0, -1, 9])
+
+    def test_overlaps(self):
+        """Test partes almacenadas de un rango que cruza un hueco."""
+        layout = SpanLayout([(10, 2), (20, 2)])
+
+        self.assertEqual(list(layout.overlaps(11, 10)), [(0, 1, 1), (9, 2, 1)])
+        self.assertEqual(list(layout.overlaps(13, 5)), [])
+
+
+class TestSparseRegisterImage(unittest.TestCase):
+    """Test cases para imágenes que solo almacenan algunos rangos."""
+
+    def setUp(self):
+        self.image = RegisterImage(5000, layout=SpanLayout([(3000, 2), (3004, 2)]))
+
+    def test_only_spans_are_stored(self):
+        """Test el buffer solo ocupa los rangos del layout."""
+        self.assertEqual(self.image.front.nbytes, 8)
+
+    def test_gaps_read_as_zero_and_ignore_writes(self):
+        """Test huecos leídos como cero y escrituras en huecos descartadas."""
+        self.image.write(3001, [1, 2, 3, 4, 5])
+
+        self.assertEqual(self.image.read(2999, 8).tolist(), [0, 0, 1, 0, 0, 4, 5, 0])
+        self.assertEqual(self.image.front.tolist(), [0, 1, 4, 5])
+
+
+class TestSharedRegisterImage(unittest.TestCase):
+    """Test cases para imágenes en memoria compartida."""
+
+    def setUp(self):
+        self.layout = SpanLayout([(10, 4)])
+        self.buffer = memoryview(bytearray(SharedRegisterImage.nbytes(self.layout)))
+        self.writer = SharedRegisterImage(100, self.layout, self.buffer)
+        self.reader = SharedRegisterImage(100, self.layout, self.buffer)
+
+    def test_reader_sees_published_writes(self):
+        """Test el lector ve solo lo publicado por el escritor."""
+        with self.writer.write_lock:
+            self.writer.back[:] = [1, 2, 3, 4]
+            self.assertEqual(self.reader.read(10, 4).tolist(), [0, 0, 0, 0])
+            self.writer.publish()
+
+        self.writer.write(12, [9])
+
+        self.assertEqual(self.reader.read(9, 6).tolist(), [0, 1, 2, 9, 4, 0])
+        self.assertEqual(self.reader.version, 2)
+        self.assertGreater(self.reader.published_at, 0)
+
+    def test_front_is_a_stable_copy(self):
+        """Test ``front`` no cambia con publicaciones posteriores."""
+        self.writer.write(10, [5, 5, 5, 5])
+        snapshot = self.reader.front
+
+        self.writer.write(10, [6])
+
+        self.assertEqual(snapshot.tolist(), [5, 5, 5, 5])
+
+    def test_writes_are_forwarded(self):
+        """Test escrituras reenviadas al proceso propietario."""
+        forwarded = []
+        self.reader.write_forwarder = lambda address, values: forwarded.append((address, values))
+
+        self.reader.write(11, [7])
+
+        self.assertEqual(forwarded, [(11, [7])])
+        self.assertEqual(self.reader.version, 0)
+
+
+class TestRegisterImageDataBlock(unittest.TestCase):
+    """Test cases para el bloque de datos compatible con pymodbus."""
+
+    def test_validate_get_and_set(self):
+        """Test interfaz validate/getValues/setValues."""
+        block = RegisterImageDataBlock(RegisterImage(100, base_address=10))
+
+        self.assertTrue(block.validate(10, 100))
+        self.assertFalse(block.validate(9, 1))
+        self.assertFalse(block.validate(100, 11))
+
+        block.setValues(20, [1, 2, 3])
+        block.setValues(23, 4)
+
+        self.assertEqual(block.getValues(20, 4), [1, 2, 3, 4])
+
+    def test_sparse_block_serves_whole_address_space(self):
+        """Test un bloque compacto valida y lee todo el espacio de direcciones."""
+        block = RegisterImageDataBlock(RegisterImage(100, layout=SpanLayout([(50, 2)])))
+        block.setValues(50, [7, 8])
+
+        self.assertTrue(block.validate(0, 100))
+        self.assertFalse(block.validate(99, 2))
+        self.assertEqual(block.getValues(49, 4), [0, 7, 8, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
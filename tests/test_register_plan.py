@@ -0,0 +1,227 @@
+"""
+Tests unitarios para el plan de registros compilado y los codecs.
+"""
+
+import math
+import os
+import unittest
+
+import numpy as np
+from pymodbus.constants import Endian
+from pymodbus.payload import BinaryPayloadBuilder
+
+from src.config.settings import DEFAULT_CONFIG
+from src.data_generation.batch_engine import BatchGenerationEngine
+from src.data_generation.codec import BatchEncoder, get_codec
+from src.data_generation.register_loader import load_register_table
+from src.data_generation.generators import UniformGenerator
+from src.data_generation.register_plan import compile_register_plan
+
+
+class TestDataTypeCodec(unittest.TestCase):
+    """Test cases para los codecs escalares."""
+
+    def _reference_words(self, method: str, value):
+        builder = BinaryPayloadBuilder(byteorder=Endian.BIG, wordorder=Endian.LITTLE)
+        getattr(builder, method)(value)
+        return builder.to_registers()
+
+    def test_matches_binary_payload_builder(self):
+        """Test mismas palabras que BinaryPayloadBuilder(BIG, LITTLE)."""
+        cases = [
+            ("FLOAT32", "add_32bit_float", 230.125),
+            ("4Q_FP_PF", "add_32bit_float", -0.85),
+            ("INT16", "add_16bit_int", -1234),
+            ("INT16U", "add_16bit_uint", 60000),
+            ("INT64", "add_64bit_int", -987654321012),
+            ("DATETIME", "add_64bit_uint", 1760000000),
+        ]
+        for data_type, method, value in cases:
+            with self.subTest(data_type=data_type):
+                codec = get_codec(data_type)
+                words = codec.encode(value)
+                self.assertEqual(words, self._reference_words(method, value))
+                self.assertAlmostEqual(codec.decode(words), value, places=5)
+
+    def test_unsupported_type(self):
+        """Test tipo de datos no soportado."""
+        with self.assertRaises(ValueError):
+            get_codec("INVALID_TYPE")
+
+
+class TestBatchEncoder(unittest.TestCase):
+    """Test cases para el encoder vectorizado."""
+
+    def _scalar_image(self, plan, values, size):
+        image = np.zeros(size, dtype=np.uint16)
+        for reg, value in zip(plan.registers, values):
+            image[reg.slice] = reg.codec.encode(value)
+        return image
+
+    def test_matches_scalar_codec_for_register_tables(self):
+        """Test mismos bytes que la codificación escalar en las tablas incluidas."""
+        for filename in ["register_table_PM21XX.json", "register_table_PM21XX_enhanced.json"]:
+            with self.subTest(filename=filename):
+                path = os.path.join(DEFAULT_CONFIG.register_tables_dir, filename)
+                plan = compile_register_plan(load_register_table(path))
+                values = BatchGenerationEngine(plan, seed=3).generate()
+
+                encoder = BatchEncoder(plan.registers)
+                image = np.zeros(5000, dtype=np.uint16)
+                encoder.write(image, encoder.encode(values))
+
+                np.testing.assert_array_equal(image, self._scalar_image(plan, values, 5000))
+
+    def test_negative_and_truncated_values(self):
+        """Test enteros negativos y valores con decimales."""
+        plan = compile_register_plan(
+            [
+                {"address": 0, "data_type": "INT16", "description": "A"},
+                {"address": 1, "data_type": "INT16U", "description": "B"},
+                {"address": 2, "data_type": "INT64", "description": "C"},
+                {"address": 6, "data_type": "FLOAT32", "description": "D"},
+            ]
+        )
+        values = np.array([-12.7, 65535.0, -5000000000.9, 1.0e-3])
+
+        encoder = BatchEncoder(plan.registers)
+        image = np.zeros(8, dtype=np.uint16)
+        encoder.write(image, encoder.encode(values))
+
+        np.testing.assert_array_equal(image, self._scalar_image(plan, values, 8))
+
+    def test_runs_coalesce_contiguous_registers(self):
+        """Test agrupación de registros contiguos en un solo rango."""
+        plan = compile_register_plan(
+            [
+                {"address": 10, "data_type": "FLOAT32", "description": "A"},
+                {"address": 12, "data_type": "INT16", "description": "B"},
+                {"address": 13, "data_type": "INT64", "description": "C"},
+                {"address": 30, "data_type": "INT16U", "description": "D"},
+            ]
+        )
+
+        encoder = BatchEncoder(plan.registers)
+
+        self.assertEqual(encoder.runs, ((10, 0, 7), (30, 7, 1)))
+        self.assertEqual(encoder.word_count, 8)
+
+    def test_mask_excludes_registers(self):
+        """Test exclusión de registros con la máscara."""
+        plan = compile_register_plan(
+            [
+                {"address": 0, "data_type": "INT16", "description": "A"},
+                {"address": 1, "data_type": "INT16", "description": "B"},
+            ]
+        )
+
+        encoder = BatchEncoder(plan.registers, mask=[False, True])
+
+        self.assertEqual(encoder.runs, ((1, 0, 1),))
+        self.assertEqual(encoder.count, 1)
+
+
+class TestRegisterPlan(unittest.TestCase):
+    """Test cases para compile_register_plan."""
+
+    def test_compile_resolves_generator_and_codec(self):
+        """Test resolución de generador, codec y rango de direcciones."""
+        plan = compile_register_plan(
+            [
+                {
+                    "address": 3000,
+                    "data_type": "INT64",
+                    "description": "Energía",
+                    "generation": {"type": "uniform", "params": [1, 2]},
+                }
+            ]
+        )
+
+        reg = plan.by_address[3000]
+        self.assertIsInstance(reg.generator, UniformGenerator)
+        self.assertEqual(reg.width, 4)
+        self.assertEqual(reg.slice, slice(3000, 3004))
+        self.assertEqual(reg.params, (1.0, 2.0))
+
+    def test_invalid_registers_are_reported(self):
+        """Test registros con tipo o generador inválido."""
+        plan = compile_register_plan(
+            [
+                {"address": 0, "data_type": "INVALID_TYPE", "description": "Tipo"},
+                {
+                    "address": 2,
+                    "data_type": "FLOAT32",
+                    "description": "Parámetros",
+                    "generation": {"type": "uniform", "params": [1.0]},
+                },
+                {
+                    "address": 4,
+                    "data_type": "FLOAT32",
+                    "description": "Generador",
+                    "generation": {"type": "invalid_generator"},
+                },
+            ]
+        )
+
+        self.assertEqual(sorted(plan.errors), [0, 2, 4])
+        self.assertEqual([reg.address for reg in plan.registers], [2, 4])
+        self.assertEqual(plan.generated, ())
+
+    def test_period_resolution(self):
+        """Test resolución del período por registro, categoría y tipo de generador."""
+        plan = compile_register_plan(
+            [
+                {
+                    "address": 0,
+                    "data_type": "FLOAT32",
+                    "description": "Propio",
+                    "period": 0.5,
+                    "category": "voltage",
+                    "generation": {"type": "uniform", "params": [1, 2]},
+                },
+                {
+                    "address": 2,
+                    "data_type": "FLOAT32",
+                    "description": "Categoría",
+                    "category": "voltage",
+                    "generation": {"type": "uniform", "params": [1, 2]},
+                },
+                {
+                    "address": 4,
+                    "data_type": "INT16U",
+                    "description": "Fijo",
+                    "generation": {"type": "fixed", "params": [1]},
+                },
+                {
+                    "address": 5,
+                    "data_type": "INT16U",
+                    "description": "Dispositivo",
+                    "generation": {"type": "randint", "params": [1, 2]},
+                },
+                {
+                    "address": 6,
+                    "data_type": "INT16U",
+                    "description": "Inválido",
+                    "period": -1,
+                    "generation": {"type": "randint", "params": [1, 2]},
+                },
+            ],
+            category_periods={"voltage": 2.0},
+        )
+
+        periods = [reg.period for reg in plan.registers]
+        self.assertEqual(periods, [0.5, 2.0, math.inf, None, None])
+        self.assertIn(6, plan.errors)
+
+    def test_plan_is_immutable(self):
+        """Test inmutabilidad del plan."""
+        plan = compile_register_plan([{"address": 10, "data_type": "INT16", "description": "Test"}])
+
+        with self.assertRaises(AttributeError):
+            plan.registers[0].address = 20
+        with self.assertRaises(TypeError):
+            plan.by_address[20] = plan.registers[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests unitarios para el planificador por plazos.
+"""
+
+import math
+import unittest
+
+from src.data_generation.scheduler import (
+    MAX_BURST_CYCLES,
+    DeadlineScheduler,
+    DeviceQueue,
+    aligned_deadline,
+    stagger_phase,
+)
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    """Test cases para DeadlineScheduler."""
+
+    def test_only_due_keys_are_returned(self):
+        """Test solo se devuelven las claves vencidas."""
+        scheduler = DeadlineScheduler()
+        scheduler.add("rapido", 0.5, first_deadline=10.0)
+        scheduler.add("lento", 5.0, first_deadline=10.0)
+
+        self.assertEqual(sorted(scheduler.pop_due(10.0)), ["lento", "rapido"])
+        self.assertEqual(scheduler.pop_due(10.2), [])
+        self.assertEqual(scheduler.pop_due(10.5), ["rapido"])
+        self.assertEqual(scheduler.next_deadline(), 11.0)
+
+    def test_deadlines_do_not_drift(self):
+        """Test los plazos se calculan desde el plazo anterior."""
+        scheduler = DeadlineScheduler()
+        scheduler.add("a", 1.0, first_deadline=0.0)
+
+        scheduler.pop_due(0.3)
+
+        self.assertEqual(scheduler.next_deadline(), 1.0)
+
+    def test_missed_cycles_are_skipped(self):
+        """Test ciclos perdidos se omiten conservando la grilla (política skip)."""
+        scheduler = DeadlineScheduler()
+        scheduler.add("a", 1.0, first_deadline=0.0)
+
+        self.assertEqual(scheduler.pop_due(5.5), ["a"])
+        self.assertEqual(scheduler.next_deadline(), 6.0)
+        self.assertEqual(scheduler.missed, 5)
+
+    def test_coalesce_restarts_grid(self):
+        """Test política coalesce: un ciclo y la grilla se reinicia desde ahora."""
+        scheduler = DeadlineScheduler(catch_up="coalesce")
+        scheduler.add("a", 1.0, first_deadline=0.0)
+
+        self.assertEqual(scheduler.pop_due(5.5), ["a"])
+        self.assertEqual(scheduler.next_deadline(), 6.5)
+
+    def test_burst_runs_missed_cycles(self):
+        """Test política burst: cada ciclo perdido vence en llamadas sucesivas."""
+        scheduler = DeadlineScheduler(catch_up="burst")
+        scheduler.add("a", 1.0, first_deadline=0.0)
+
+        runs = 0
+        while scheduler.pop_due(3.5):
+            runs += 1
+        self.assertEqual(runs, 4)
+        self.assertEqual(scheduler.next_deadline(), 4.0)
+
+    def test_burst_limit_falls_back_to_skip(self):
+        """Test burst con demasiado atraso se comporta como skip."""
+        scheduler = DeadlineScheduler(catch_up="burst")
+        scheduler.add("a", 1.0, first_deadline=0.0)
+
+        scheduler.pop_due(MAX_BURST_CYCLES + 10.5)
+
+        self.assertEqual(scheduler.next_deadline(), MAX_BURST_CYCLES + 11.0)
+
+    def test_unknown_policy(self):
+        """Test política de recuperación desconocida."""
+        with self.assertRaises(ValueError):
+            DeadlineScheduler(catch_up="never")
+
+    def test_aligned_deadline(self):
+        """Test plazo alineado a múltiplos del período en la hora de pared."""
+        self.assertEqual(aligned_deadline(60.0, now=100.0, wall_now=1_000_000_010.0), 110.0)
+        self.assertEqual(aligned_deadline(60.0, now=100.0, wall_now=1_000_000_020.0), 100.0)
+        self.assertEqual(aligned_deadline(math.inf, now=100.0), 100.0)
+
+    def test_phase_shifts_grid_after_first_run(self):
+        """Test el desfase mueve la grilla sin demorar la primera ejecución."""
+        scheduler = DeadlineScheduler()
+        scheduler.add("a", 1.0, first_deadline=0.0, phase=0.25)
+
+        self.assertEqual(scheduler.pop_due(0.0), ["a"])
+        self.assertEqual(scheduler.next_deadline(), 0.25)
+        scheduler.pop_due(0.25)
+        self.assertEqual(scheduler.next_deadline(), 1.25)
+
+    def test_infinite_period_runs_once(self):
+        """Test período infinito se ejecuta una sola vez."""
+        scheduler = DeadlineScheduler()
+        scheduler.add("fijo", math.inf)
+
+        self.assertEqual(scheduler.pop_due(0.0), ["fijo"])
+        self.assertEqual(scheduler.pop_due(1e9), [])
+        self.assertIsNone(scheduler.next_deadline())
+
+    def test_zero_period_does_not_loop(self):
+        """Test período cero vence una vez por llamada."""
+        scheduler = DeadlineScheduler()
+        scheduler.add("a", 0.0)
+
+        self.assertEqual(scheduler.pop_due(1.0), ["a"])
+        self.assertEqual(scheduler.pop_due(1.0), ["a"])
+
+
+class TestStaggering(unittest.TestCase):
+    """Test cases para el reparto de dispositivos dentro del intervalo."""
+
+    def test_stagger_phase(self):
+        """Test desfases uniformes, por hash y sin desfase."""
+        phases = [stagger_phase("even", index, 4, index + 1) for index in range(4)]
+        self.assertEqual(phases, [0, 0.25, 0.5, 0.75])
+        self.assertEqual(stagger_phase("none", 3, 4, 4), 0.0)
+        phase = stagger_phase("hash", 0, 1, 17)
+        self.assertTrue(0 <= phase < 1)
+        self.assertEqual(phase, stagger_phase("hash", 5, 10, 17))
+        with self.assertRaises(ValueError):
+            stagger_phase("random", 0, 1, 1)
+
+    def test_device_queue_pops_only_due(self):
+        """Test la cola devuelve solo los dispositivos vencidos, en orden."""
+        pending = DeviceQueue([3.0, None, 1.0, 2.0])
+
+        self.assertEqual(len(pending), 3)
+        self.assertEqual(pending.pop_due(2.0), [2, 3])
+        pending.push(2, 5.0)
+        pending.push(3, None)
+        self.assertEqual(pending.next_deadline(), 3.0)
+        self.assertEqual(pending.pop_due(10.0), [0, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+"""
+Tests unitarios para el almacenamiento persistente con niveles de agregación.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+from src.data_generation import store as store_module
+from src.data_generation.meter_generator import MeterDataGenerator
+from src.data_generation.store import TimeSeriesStore
+
+
+def _register(address, integer=False, width=1):
+    """Registro mínimo del plan para el almacenamiento."""
+    return SimpleNamespace(address=address, codec=SimpleNamespace(integer=integer, width=width))
+
+
+REGISTERS = [_register(1000), _register(1002, integer=True)]
+
+# Inicio de una hora, para que los intervalos sean predecibles
+BASE = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """Test cases para TimeSeriesStore y DeviceStore."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _open(self, retention=3600.0, resolution=1.0):
+        store = TimeSeriesStore(self.directory, retention=retention, resolution=resolution)
+        return store, store.device(1, REGISTERS)
+
+    def _record(self, device, seconds, value=lambda second: second):
+        for second in seconds:
+            device.record(BASE + second, np.array([value(second), value(second) + 0.5]))
+
+    def test_record_is_queued_until_flush(self):
+        """Test record solo encola; flush escribe el lote."""
+        store, device = self._open()
+        self._record(device, range(10))
+
+        self.assertEqual(device.get_statistics()["pending"], 10)
+        self.assertEqual(device.get_statistics()["raw"], 0)
+        self.assertEqual(store.flush(), 10)
+        self.assertEqual(device.get_statistics()["raw"], 10)
+        store.close()
+
+    def test_resolution_skips_close_rows(self):
+        """Test no se encolan dos filas a menos de ``resolution`` segundos."""
+        store, device = self._open(resolution=2.0)
+
+        recorded = [device.record(BASE + t, np.zeros(2)) for t in (0, 1, 2, 3.5, 4)]
+
+        self.assertEqual(recorded, [True, False, True, False, True])
+        store.close()
+
+    def test_raw_query_and_integer_truncation(self):
+        """Test la consulta raw devuelve la ventana y los enteros truncados."""
+        store, device = self._open()
+        self._record(device, range(10))
+        store.flush()
+
+        result = device.query(1000, start=BASE + 2, end=BASE + 4, tier="raw")
+        self.assertEqual(result["tier"], "raw")
+        self.assertEqual(result["t"], [BASE + 2, BASE + 3, BASE + 4])
+        self.assertEqual(result["avg"], [2.0, 3.0, 4.0])
+        self.assertEqual(device.query(1002, tier="raw", points=3)["min"], [0.0, 3.0, 6.0])
+        store.close()
+
+    def test_wide_integers_are_exact(self):
+        """Test los timestamps y contadores de 64 bits son exactos en todos los niveles."""
+        store = TimeSeriesStore(self.directory, retention=3600.0)
+        device = store.device(1, [_register(1000), _register(1004, integer=True, width=4)])
+        counter = float(2**53 - 1)
+        device.record(BASE, np.array([1.5, counter]))
+        device.record(BASE + 1, np.array([2.5, BASE + 1.0]))
+        store.close()
+
+        self.assertEqual(device.query(1004, tier="raw")["max"], [counter, BASE + 1.0])
+        self.assertEqual(device.query(1004, tier="1m")["max"], [counter])
+        self.assertEqual(device.query(1004, tier="1h")["min"], [BASE + 1.0])
+        self.assertEqual(device.query(1000, tier="1m")["avg"], [2.0])
+
+        # El intervalo incompleto se retoma con la misma precisión
+        store = TimeSeriesStore(self.directory, retention=3600.0)
+        device = store.device(1, [_register(1000), _register(1004, integer=True, width=4)])
+        store.close()
+        self.assertEqual(device.query(1004, tier="1m")["max"], [counter])
+
+    def test_clock_step_back_is_dropped(self):
+        """Test las filas anteriores a la última guardada se descartan, también al reabrir."""
+        store, device = self._open()
+        self._record(device, [10, 11])
+        self.assertFalse(device.record(BASE + 5, np.zeros(2)))
+        store.close()
+
+        store, device = self._open()
+        self.assertFalse(device.record(BASE + 5, np.zeros(2)))
+        self.assertTrue(device.record(BASE + 12, np.zeros(2)))
+        store.close()
+
+        self.assertEqual(device.query(1000, tier="raw")["t"], [BASE + 10, BASE + 11, BASE + 12])
+
+    def test_retention_bounds_raw_tier(self):
+        """Test el nivel raw conserva solo las filas de su retención."""
+        store, device = self._open(retention=5.0)
+        self._record(device, range(3))
+        store.flush()
+        self._record(device, range(3, 12))
+        store.flush()
+
+        result = device.query(1000, tier="raw")
+
+        self.assertEqual(device.get_statistics()["raw"], 5)
+        self.assertEqual(result["t"], [BASE + s for s in range(7, 12)])
+        store.close()
+
+    def test_rollups(self):
+        """Test los niveles 1m y 1h guardan mínimo, máximo y promedio por intervalo."""
+        store, device = self._open()
+        # Tres minutos completos y uno en curso
+        self._record(device, range(0, 200, 10))
+        store.flush()
+
+        result = device.query(1000, tier="1m")
+        self.assertEqual(result["t"], [BASE, BASE + 60, BASE + 120])
+        self.assertEqual(result["min"], [0.0, 60.0, 120.0])
+        self.assertEqual(result["max"], [50.0, 110.0, 170.0])
+        self.assertEqual(result["avg"], [25.0, 85.0, 145.0])
+        # La hora sigue en curso: aún sin filas
+        self.assertEqual(device.query(1000, tier="1h")["t"], [])
+
+        store.close()
+        self.assertEqual(device.query(1000, tier="1h")["avg"], [95.0])
+        self.assertEqual(device.query(1000, tier="1m")["t"][-1], BASE + 180)
+
+    def test_reopen_resumes_open_intervals(self):
+        """Test al reabrir se conservan las filas y se retoma el intervalo incompleto."""
+        store, device = self._open()
+        self._record(device, range(0, 30, 10))
+        store.close()
+
+        store, device = self._open()
+        self._record(device, range(30, 70, 10))
+        store.close()
+
+        result = device.query(1000, tier="1m")
+        self.assertEqual(device.get_statistics()["raw"], 7)
+        self.assertEqual(result["t"], [BASE, BASE + 60])
+        self.assertEqual(result["avg"], [25.0, 60.0])
+        self.assertEqual(device.query(1000, tier="1h")["max"], [60.0])
+
+    def test_reopen_with_full_rollup_ring(self):
+        """Test al reabrir con el nivel 1m lleno las filas siguen en orden y sin duplicados."""
+        with patch.dict(store_module.ROLLUP_RETENTION, {"1m": 180}):
+            store, device = self._open()
+            # Cinco minutos en un nivel de tres filas; el último queda incompleto
+            self._record(device, range(0, 260, 10))
+            store.close()
+
+            store, device = self._open()
+            expected = [BASE + 120, BASE + 180, BASE + 240]
+            self.assertEqual(device.query(1000, tier="1m")["t"], expected)
+            # El minuto retomado se completa y se reescribe en su lugar
+            self._record(device, range(260, 310, 10))
+            store.flush()
+            result = device.query(1000, tier="1m")
+            self.assertEqual(result["t"], expected)
+            self.assertEqual(result["avg"], [145.0, 205.0, 265.0])
+            store.close()
+
+            result = device.query(1000, tier="1m")
+            self.assertEqual(result["t"], [BASE + 180, BASE + 240, BASE + 300])
+            self.assertEqual(result["avg"], [205.0, 265.0, 300.0])
+            self.assertEqual(device.get_statistics()["1m"], 3)
+
+            # Reabrir sin filas nuevas no altera el nivel
+            store, device = self._open()
+            store.close()
+            self.assertEqual(device.query(1000, tier="1m")["avg"], [205.0, 265.0, 300.0])
+
+    def test_reopen_after_unclean_shutdown(self):
+        """Test si no se cerró, el último intervalo completo no se duplica ni se altera."""
+        store, device = self._open()
+        self._record(device, range(0, 80, 10))
+        store.flush()
+
+        # Sin close: el minuto en curso se pierde, el completo queda igual
+        store, device = self._open()
+        self._record(device, [80])
+        store.close()
+
+        result = device.query(1000, tier="1m")
+        self.assertEqual(result["t"], [BASE, BASE + 60])
+        self.assertEqual(result["avg"], [25.0, 80.0])
+
+    def test_auto_tier_follows_retention(self):
+        """Test ``auto`` usa raw dentro de su retención y un agregado fuera de ella."""
+        store, device = self._open(retention=60.0)
+        self._record(device, range(300))
+        store.flush()
+
+        self.assertEqual(device.query(1000, start=BASE + 280)["tier"], "raw")
+        self.assertEqual(device.query(1000, start=BASE)["tier"], "1m")
+        store.close()
+
+    def test_mismatched_directory_raises(self):
+        """Test un directorio con otros registros u otra retención se rechaza."""
+        store, _ = self._open()
+        store.close()
+
+        with self.assertRaises(ValueError):
+            TimeSeriesStore(self.directory, retention=3600.0).device(1, REGISTERS[:1])
+        with self.assertRaises(ValueError):
+            self._open(retention=7200.0)
+
+    def test_writer_thread_flushes(self):
+        """Test el thread escritor escribe las filas pendientes."""
+        store = TimeSeriesStore(self.directory, retention=60.0, flush_interval=0.01)
+        device = store.device(1, REGISTERS)
+        store.start()
+        self._record(device, range(5))
+        store.close()
+
+        self.assertEqual(store.get_statistics()["raw"], 5)
+        self.assertEqual(store.get_statistics()["pending"], 0)
+
+
+class TestGeneratorStore(unittest.TestCase):
+    """Test cases para el almacenamiento de MeterDataGenerator."""
+
+    def setUp(self):
+        registers = [
+            {
+                "address": 1000,
+                "data_type": "FLOAT32",
+                "description": "Test Float",
+                "generation": {"type": "uniform", "params": [10.0, 20.0]},
+            },
+        ]
+        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+            json.dump(registers, f)
+            self.temp_file = f.name
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.unlink(self.temp_file)
+        shutil.rmtree(self.directory)
+
+    def test_generation_is_stored(self):
+        """Test cada generación se guarda en el directorio del dispositivo."""
+        generator = MeterDataGenerator(
+            device_id=7, register_file=self.temp_file, update_interval=0
+        )
+        store = TimeSeriesStore(self.directory, retention=3600.0, resolution=1e-6)
+        generator.attach_store(store)
+
+        generator.generate_registers()
+        store.close()
+
+        result = store.devices[7].query(1000, tier="raw")
+        self.assertTrue(os.path.isdir(os.path.join(self.directory, "device_7")))
+        self.assertEqual(result["rows"], 1)
+        self.assertAlmostEqual(
+            result["avg"][0], generator.get_register_value(1000, "FLOAT32"), places=4
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
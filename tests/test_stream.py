@@ -0,0 +1,161 @@
+"""
+Tests unitarios para el flujo de instantáneas y deltas de la flota.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.data_generation.meter_generator import MeterDataGenerator
+from src.web.stream import (
+    FRAME_DELTA,
+    FRAME_HEADER,
+    FRAME_SNAPSHOT,
+    MAX_CACHED_SELECTIONS,
+    FleetStream,
+)
+from src.web.subscriptions import ALL, Selection, apply_message
+
+
+class TestFleetStream(unittest.TestCase):
+    """Test cases para FleetStream."""
+
+    def setUp(self):
+        registers = [
+            {
+                "address": 1000,
+                "data_type": "FLOAT32",
+                "description": "Test Float",
+                "category": "current",
+                "unit": "A",
+                "generation": {"type": "fixed", "params": [42.5]},
+            },
+            {
+                "address": 1002,
+                "data_type": "INT16",
+                "description": "Test Int",
+                "generation": {"type": "fixed", "params": [100]},
+            },
+        ]
+        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as f:
+            json.dump(registers, f)
+            self.temp_file = f.name
+        self.generators = [
+            MeterDataGenerator(device_id=device_id, register_file=self.temp_file)
+            for device_id in (1, 2)
+        ]
+        for generator in self.generators:
+            generator.generate_registers()
+        self.stream = FleetStream(self.generators)
+
+    def tearDown(self):
+        os.unlink(self.temp_file)
+
+    def test_only_changed_slots_are_reported(self):
+        """Test la primera lectura reporta todo y después solo lo que cambió."""
+        self.assertEqual(self.stream.update().tolist(), [0, 1, 2, 3])
+        self.assertEqual(self.stream.update().tolist(), [])
+        self.assertEqual(self.stream.sequence, 1)
+
+        self.generators[1].block.setValues(1002, [7])
+
+        self.assertEqual(self.stream.update().tolist(), [3])
+        self.assertEqual(self.stream.values.tolist(), [42.5, 100, 42.5, 7])
+        self.assertEqual(self.stream.sequence, 2)
+
+    def test_binary_frames(self):
+        """Test instantánea y delta binarios: encabezado, valores y slots."""
+        self.stream.update()
+        snapshot = self.stream.snapshot_frame()
+        kind, sequence, _, count = FRAME_HEADER.unpack_from(snapshot)
+        self.assertEqual((kind, sequence, count), (FRAME_SNAPSHOT, 1, 4))
+        values = np.frombuffer(snapshot, "<f8", count, FRAME_HEADER.size)
+        self.assertEqual(values.tolist(), [42.5, 100, 42.5, 100])
+
+        self.generators[0].block.setValues(1000, [0, 0])
+        delta = self.stream.delta_frame(self.stream.update())
+        kind, sequence, _, count = FRAME_HEADER.unpack_from(delta)
+        self.assertEqual((kind, sequence, count), (FRAME_DELTA, 2, 1))
+        offset = FRAME_HEADER.size
+        self.assertEqual(np.frombuffer(delta, "<f8", 1, offset).tolist(), [0.0])
+        self.assertEqual(np.frombuffer(delta, "<u4", 1, offset + 8).tolist(), [0])
+        self.assertEqual(len(delta), FRAME_HEADER.size + 12)
+
+    def test_json_frames_and_layout(self):
+        """Test tramas JSON, layout y valores agrupados por dispositivo."""
+        layout = json.loads(self.stream.layout_frame())
+        self.assertEqual(len(layout["slots"]), 4)
+        self.assertEqual(layout["slots"][2]["device"], 2)
+
+        snapshot = json.loads(self.stream.snapshot_frame("json"))
+        self.assertEqual(snapshot["values"], [None, None, None, None])
+
+        changed = self.stream.update()
+        delta = json.loads(self.stream.delta_frame(changed[:1], "json"))
+        self.assertEqual((delta["slots"], delta["values"]), ([0], [42.5]))
+
+        data = self.stream.as_dict()
+        self.assertEqual(data["device_2"]["reg_1002"]["value"], 100)
+        self.assertIsInstance(data["device_2"]["reg_1002"]["value"], int)
+
+    def test_selection_frames_use_local_slots(self):
+        """Test una selección recibe solo sus slots, numerados localmente."""
+        self.stream.update()
+        selection = Selection(devices=frozenset({2}), categories=frozenset({"current"}))
+        self.assertEqual(self.stream.select(selection).tolist(), [2])
+        ranged = Selection(ranges=((1001, 1002),))
+        self.assertEqual(self.stream.select(ranged).tolist(), [1, 3])
+
+        layout = json.loads(self.stream.layout_frame(selection))
+        self.assertEqual(
+            [(slot["device"], slot["address"], slot["unit"]) for slot in layout["slots"]],
+            [(2, 1000, "A")],
+        )
+        snapshot = json.loads(self.stream.snapshot_frame("json", selection))
+        self.assertEqual(snapshot["values"], [42.5])
+
+        self.generators[1].block.setValues(1002, [7])
+        changed = self.stream.update()
+        self.assertIsNone(self.stream.delta_frame(changed, "json", selection))
+        delta = json.loads(self.stream.delta_frame(changed, "json", ranged))
+        self.assertEqual((delta["slots"], delta["values"]), ([1], [7]))
+
+    def test_unsubscribing_last_device_selects_nothing(self):
+        """Test suscribirse a un dispositivo y quitarlo no envía deltas (ni toda la flota)."""
+        self.stream.update()
+        selection = apply_message(ALL, {"action": "subscribe", "devices": [1]})
+        selection = apply_message(selection, {"action": "unsubscribe", "devices": [1]})
+
+        self.assertEqual(self.stream.select(selection).tolist(), [])
+        self.assertEqual(json.loads(self.stream.layout_frame(selection))["slots"], [])
+        for generator in self.generators:
+            generator.block.setValues(1002, [7])
+        changed = self.stream.update()
+        self.assertEqual(len(changed), 2)
+        self.assertIsNone(self.stream.delta_frame(changed, "binary", selection))
+        self.assertIsNone(self.stream.delta_frame(changed, "json", selection))
+
+    def test_selection_caches_are_bounded(self):
+        """Test muchas selecciones distintas no hacen crecer las cachés sin límite."""
+        self.stream.update()
+        first = Selection(ranges=((0, 0),))
+        self.stream.select(first)
+        for start in range(MAX_CACHED_SELECTIONS * 4):
+            selection = Selection(ranges=((start, start + 1000),))
+            self.stream.select(selection)
+            self.stream.layout_frame(selection)
+
+        self.assertEqual(len(self.stream._selections), MAX_CACHED_SELECTIONS)
+        self.assertEqual(len(self.stream._layouts), MAX_CACHED_SELECTIONS)
+        self.assertNotIn(first, self.stream._selections)
+        # Una selección descartada se vuelve a resolver igual
+        self.assertEqual(self.stream.select(first).tolist(), [])
+        self.assertIsNone(self.stream.select(ALL))
+        self.assertEqual(len(json.loads(self.stream.layout_frame(ALL))["slots"]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests unitarios para las suscripciones de los clientes WebSocket.
+"""
+
+import unittest
+
+from src.web.subscriptions import ALL, Selection, apply_message
+
+
+class TestSubscriptions(unittest.TestCase):
+    """Test cases para apply_message."""
+
+    def test_subscribe_and_unsubscribe(self):
+        """Test agregar y quitar criterios conserva los demás."""
+        selection = apply_message(
+            ALL,
+            {"action": "subscribe", "devices": [2, 1], "categories": ["current"]},
+        )
+        selection = apply_message(selection, {"action": "subscribe", "addresses": [[3000, 3010]]})
+        self.assertEqual(selection.devices, {1, 2})
+        self.assertEqual(selection.ranges, ((3000, 3010),))
+
+        selection = apply_message(selection, {"action": "unsubscribe", "devices": [2]})
+        self.assertEqual(selection.devices, {1})
+        self.assertEqual(selection.categories, {"current"})
+        self.assertFalse(selection.is_all)
+
+        self.assertTrue(apply_message(selection, {"action": "clear"}).is_all)
+
+    def test_unsubscribing_last_value_selects_nothing(self):
+        """Test quitar el último valor de un criterio no equivale a toda la flota."""
+        selection = apply_message(ALL, {"action": "subscribe", "devices": [1]})
+        selection = apply_message(selection, {"action": "unsubscribe", "devices": [1]})
+
+        self.assertEqual(selection.devices, frozenset())
+        self.assertIsNone(selection.categories)
+        self.assertFalse(selection.is_all)
+
+    def test_unsubscribe_from_unrestricted_criterion_raises(self):
+        """Test no se pueden quitar valores de un criterio sin restricción."""
+        with self.assertRaises(ValueError):
+            apply_message(ALL, {"action": "unsubscribe", "devices": [1]})
+
+    def test_equal_selections_share_key(self):
+        """Test el orden de los criterios no cambia la selección (mismo grupo)."""
+        first = apply_message(ALL, {"action": "subscribe", "devices": [1, 2]})
+        second = apply_message(ALL, {"action": "subscribe", "devices": [2, 1]})
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(ALL, Selection())
+
+    def test_invalid_messages(self):
+        """Test acción, listas y rangos inválidos."""
+        for message in (
+            [],
+            {"action": "watch"},
+            {"action": "subscribe", "devices": ["1"]},
+            {"action": "subscribe", "devices": [True]},
+            {"action": "subscribe", "categories": "current"},
+            {"action": "subscribe", "addresses": [[10, 5]]},
+            {"action": "subscribe", "addresses": [[10]]},
+        ):
+            with self.subTest(message=message), self.assertRaises(ValueError):
+                apply_message(ALL, message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -61,7 +61,7 @@ Opciones RTU:
 
     parser.add_argument("-i", "--slave-id", type=int, default=1, help=argparse.SUPPRESS)
 
-    parser.add_argument("-t", "--update-interval", type=int, default=60, help=argparse.SUPPRESS)
+    parser.add_argument("-t", "--update-interval", type=float, default=60, help=argparse.SUPPRESS)
 
     parser.add_argument("-h", "--help", action="help", help=argparse.SUPPRESS)
 
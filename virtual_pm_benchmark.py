@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Virtual Power Meter - Prueba de carga
+=====================================
+
+Inicia el simulador en localhost, ejecuta clientes Modbus TCP concurrentes
+contra sus tablas de registros y reporta peticiones por segundo y latencias
+p50/p95/p99 por función Modbus. Con --generation mide solo el loop de
+actualización (frecuencia lograda y uso de CPU). Los resultados pueden
+guardarse en JSON para comparar versiones.
+
+Ejemplos:
+    python virtual_pm_benchmark.py -d 10 -c 20 -D 30 --fast-read -o resultados.json
+    python virtual_pm_benchmark.py --generation -t 10ms -D 10
+"""
+
+import sys
+import os
+
+# Añadir el directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.modbus.benchmark import (
+    parse_benchmark_arguments,
+    print_generation_report,
+    print_report,
+    run_benchmark,
+    run_generation_benchmark,
+    save_report,
+)
+
+
+def main():
+    """Función principal de la prueba de carga."""
+    try:
+        config, args = parse_benchmark_arguments()
+        if args.generation:
+            report = run_generation_benchmark(config)
+            print_generation_report(report)
+        else:
+            report = run_benchmark(config)
+            print_report(report)
+        if args.output:
+            save_report(report, args.output)
+            print(f"💾 Resultados guardados en {args.output}")
+
+    except KeyboardInterrupt:
+        print("\n🛑 Prueba interrumpida por el usuario")
+        sys.exit(0)
+    except Exception as e:
+        print(f"❌ Error fatal: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
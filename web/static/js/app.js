@@ -76,7 +76,7 @@ class VirtualPowerMeterApp {
         }
         
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        const wsUrl = `${protocol}//${window.location.host}/ws`;
+        const wsUrl = `${protocol}//${window.location.host}/ws?format=json`;
         
         this.websocket = new WebSocket(wsUrl);
         
@@ -22,23 +22,30 @@ import sys
 import os
 import json
 import asyncio
-import threading
-import time
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 import uvicorn
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 # Añadir el directorio raíz al path para importar módulos
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.config.cli_parser import parse_arguments
+from src.config.cli_parser import create_argument_parser, parse_arguments, validate_arguments
+from src.data_generation.history import DOWNSAMPLE_METHODS, downsample_lttb, downsample_minmax
+from src.data_generation.store import TIER_NAMES
 from src.modbus.server import ModbusServerManager
+from src.modbus.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ServerMetrics
+from src.modbus.profiling import (
+    ProfilerBusy, capture_allocations, capture_profile, validate_stats_options
+)
+from src.web.broadcast import BroadcastHub
+from src.web.stream import STREAM_FORMATS, FleetStream
+from src.web.subscriptions import ALL, Selection, apply_message
 
 app = FastAPI(title="Virtual Power Meter", description="Simulador de medidores de potencia virtuales")
 
@@ -50,7 +57,9 @@ app.mount("/static", StaticFiles(directory="web/static"), name="static")
 class SimulatorState:
     def __init__(self):
         self.server_manager: Optional[ModbusServerManager] = None
-        self.server_thread: Optional[threading.Thread] = None
+        # El simulador y el recolector de datos corren como tareas en el loop de uvicorn
+        self.server_task: Optional[asyncio.Task] = None
+        self.collector_task: Optional[asyncio.Task] = None
         self.is_running = False
         self.config = {
             'protocol': 'tcp',
@@ -62,10 +71,20 @@ class SimulatorState:
             'unit_id': 1,
             'slave_id': 1,
             'port_serial': 'COM3',
-            'baudrate': 9600
+            'baudrate': 9600,
+            # Historial en memoria para /api/history y los gráficos (0: deshabilitado;
+            # ej: 17280 filas cada 5 s son 24 h, ~5 MB por dispositivo)
+            'history': 0,
+            'history_resolution': 5.0,
+            # Almacenamiento persistente para /api/store (None: deshabilitado)
+            'store': None,
+            'store_retention': 24.0,
+            'store_resolution': 1.0
         }
-        self.websocket_clients: List[WebSocket] = []
-        self.last_data = {}
+        # Difusión a los clientes WebSocket (cola acotada y escritor por cliente)
+        self.hub = BroadcastHub()
+        # Valores de la flota por slot, enviados como instantánea y deltas
+        self.stream: Optional[FleetStream] = None
 
 state = SimulatorState()
 
@@ -120,18 +139,24 @@ async def update_config(
     host: str = Form("0.0.0.0"),
     port: int = Form(502),
     devices: int = Form(1),
-    update_interval: int = Form(60),
+    update_interval: float = Form(60),
     verbose: bool = Form(False),
     unit_id: int = Form(1),
     slave_id: int = Form(1),
     port_serial: str = Form("COM3"),
-    baudrate: int = Form(9600)
+    baudrate: int = Form(9600),
+    history: int = Form(0),
+    history_resolution: float = Form(5.0),
+    store: str = Form(""),
+    store_retention: float = Form(24.0),
+    store_resolution: float = Form(1.0)
 ):
     """Actualizar configuración del simulador."""
     if state.is_running:
         raise HTTPException(status_code=400, detail="No se puede cambiar la configuración mientras el simulador está ejecutándose")
     
-    state.config.update({
+    config = dict(state.config)
+    config.update({
         'protocol': protocol,
         'host': host,
         'port': port,
@@ -141,11 +166,28 @@ async def update_config(
         'unit_id': unit_id,
         'slave_id': slave_id,
         'port_serial': port_serial,
-        'baudrate': baudrate
+        'baudrate': baudrate,
+        'history': history,
+        'history_resolution': history_resolution,
+        # Directorio vacío: sin almacenamiento
+        'store': store.strip() or None,
+        'store_retention': store_retention,
+        'store_resolution': store_resolution
     })
+    _validate_config(config)
+    state.config.update(config)
     
     return RedirectResponse(url="/config?success=1", status_code=302)
 
+def _validate_config(config: Dict[str, Any]) -> None:
+    """Valida la configuración con las mismas reglas que la línea de comandos (400 si no es válida)."""
+    args = create_argument_parser().parse_args([])
+    vars(args).update(config)
+    try:
+        validate_arguments(args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/status")
 async def get_status():
     """Obtener estado actual del simulador."""
@@ -153,9 +195,64 @@ async def get_status():
         "is_running": state.is_running,
         "config": state.config,
         "devices_count": len(state.server_manager.generators) if state.server_manager else 0,
+        "generation_timing": (
+            state.server_manager.timings.get_statistics() if state.server_manager else None
+        ),
+        "websocket": state.hub.get_statistics(),
         "last_update": datetime.now().isoformat()
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas de peticiones Modbus en formato de texto Prometheus."""
+    metrics = state.server_manager.metrics if state.server_manager else ServerMetrics()
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+def _capture_filename(kind: str, extension: str) -> str:
+    """Nombre de archivo de descarga para una captura de diagnóstico."""
+    return f"vpm-{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+
+@app.get("/api/debug/profile")
+async def debug_profile(seconds: float = 10, format: str = "pstats",
+                        sort: str = "cumulative", limit: int = 50):
+    """
+    Perfilar el simulador en ejecución durante N segundos (cProfile).
+
+    Devuelve el archivo pstats (format=pstats) o un resumen de texto (format=text).
+    """
+    if format not in ("pstats", "text"):
+        raise HTTPException(status_code=400, detail="format debe ser 'pstats' o 'text'")
+    try:
+        # Antes de capturar: un error no debe esperar (ni perfilar) ``seconds`` segundos
+        validate_stats_options(sort, limit)
+        session = await capture_profile(seconds)
+        if format == "pstats":
+            content, media_type, extension = session.stats_bytes(), "application/octet-stream", "pstats"
+        else:
+            content, media_type, extension = session.stats_text(sort, limit), "text/plain", "txt"
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = _capture_filename("profile", extension)
+    return Response(content=content, media_type=media_type,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/api/debug/allocations")
+async def debug_allocations(seconds: float = 10, limit: int = 25):
+    """Capturar las asignaciones de memoria durante N segundos (tracemalloc) como texto."""
+    try:
+        report = await capture_allocations(seconds, limit)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = _capture_filename("allocations", "txt")
+    return Response(content=report, media_type="text/plain",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @app.post("/api/start")
 async def start_simulator():
     """Iniciar el simulador."""
@@ -176,26 +273,29 @@ async def start_simulator():
                 self.slave_id = config['slave_id']
                 self.port_serial = config['port_serial']
                 self.baudrate = config['baudrate']
+                self.history = config['history']
+                self.history_resolution = config['history_resolution']
+                self.store = config['store']
+                self.store_retention = config['store_retention']
+                self.store_resolution = config['store_resolution']
         
         args = Args(state.config)
         
         # Crear el manager del servidor
         state.server_manager = ModbusServerManager(args)
         
-        # Iniciar en un hilo separado
-        def run_server():
-            try:
-                state.server_manager.start_server()
-            except Exception as e:
-                print(f"Error en el servidor: {e}")
-                state.is_running = False
+        # Ejecutar el servidor en el loop de la interfaz web
+        def on_server_done(task: asyncio.Task):
+            state.is_running = False
+            if not task.cancelled() and task.exception() is not None:
+                print(f"Error en el servidor: {task.exception()}")
         
-        state.server_thread = threading.Thread(target=run_server, daemon=True)
-        state.server_thread.start()
+        state.server_task = asyncio.create_task(state.server_manager.serve())
+        state.server_task.add_done_callback(on_server_done)
         state.is_running = True
         
-        # Iniciar el hilo de recolección de datos para WebSocket
-        threading.Thread(target=data_collector_thread, daemon=True).start()
+        # Iniciar la recolección de datos para WebSocket
+        state.collector_task = asyncio.create_task(data_collector_task())
         
         return {"status": "success", "message": "Simulador iniciado correctamente"}
         
@@ -210,8 +310,12 @@ async def stop_simulator():
     
     try:
         state.is_running = False
+        if state.collector_task:
+            state.collector_task.cancel()
         if state.server_manager:
-            state.server_manager._running = False
+            await state.server_manager.shutdown()
+        if state.server_task:
+            await asyncio.gather(state.server_task, return_exceptions=True)
         
         return {"status": "success", "message": "Simulador detenido correctamente"}
         
@@ -253,99 +357,146 @@ async def save_registers(filename: str, request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def stream_resync(fmt: str, selection: Selection) -> List[Any]:
+    """Layout e instantánea actuales de una selección para un cliente nuevo o desincronizado."""
+    if state.stream is None:
+        return []
+    return [state.stream.layout_frame(selection), state.stream.snapshot_frame(fmt, selection)]
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket para datos en tiempo real."""
+async def websocket_endpoint(websocket: WebSocket, format: str = "binary"):
+    """
+    WebSocket para datos en tiempo real.
+
+    Al conectarse se envía el layout (JSON) y una instantánea de todos los
+    valores; después, solo los valores que cambiaron. ``?format=json`` envía
+    las tramas en JSON en lugar de binario. El cliente puede acotar lo que
+    recibe enviando mensajes de suscripción (ver src/web/subscriptions.py);
+    cada cambio de suscripción se responde con un layout e instantánea nuevos.
+    """
     await websocket.accept()
-    state.websocket_clients.append(websocket)
+    if format not in STREAM_FORMATS:
+        await websocket.close(code=1003, reason=f"Formato desconocido: {format}")
+        return
+
+    async def send(message):
+        if isinstance(message, bytes):
+            await websocket.send_bytes(message)
+        else:
+            await websocket.send_text(message)
+
+    # Los clientes se agrupan por (formato, selección): cada grupo serializa una vez
+    channel = state.hub.register(
+        send, websocket.close, key=(format, ALL), resync=lambda: stream_resync(*channel.key)
+    )
     
     try:
         while True:
-            # Mantener conexión activa
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            try:
+                selection = apply_message(channel.key[1], json.loads(text))
+            except ValueError as e:
+                # Incluye JSON inválido (json.JSONDecodeError es un ValueError)
+                channel.offer(json.dumps({"type": "error", "message": str(e)}))
+                continue
+            if selection != channel.key[1]:
+                channel.key = (format, selection)
+                channel.request_resync()
     except WebSocketDisconnect:
-        state.websocket_clients.remove(websocket)
+        pass
+    finally:
+        await state.hub.unregister(channel)
 
-def data_collector_thread():
+async def data_collector_task():
     """Recolectar datos del simulador y enviarlos via WebSocket."""
     while state.is_running:
         try:
-            if state.server_manager and hasattr(state.server_manager, 'generators') and state.server_manager.generators:
-                data = {}
-                for i, generator in enumerate(state.server_manager.generators):
-                    device_data = {}
-                    if hasattr(generator, 'register_map') and hasattr(generator, 'data_store'):
-                        for register in generator.register_map.values():
-                            try:
-                                address = register.address
-                                # Intentar obtener valores del data store
-                                if hasattr(generator.data_store, 'getValues'):
-                                    value = generator.data_store.getValues(3, address, count=1)
-                                    if value:
-                                        device_data[f"reg_{address}"] = {
-                                            "address": address,
-                                            "description": register.description,
-                                            "value": value[0] if len(value) == 1 else value,
-                                            "unit": getattr(register, 'unit', ''),
-                                            "data_type": register.data_type
-                                        }
-                                else:
-                                    # Fallback: generar valor dummy para la UI
-                                    device_data[f"reg_{address}"] = {
-                                        "address": address,
-                                        "description": register.description,
-                                        "value": 0.0,
-                                        "unit": getattr(register, 'unit', ''),
-                                        "data_type": register.data_type
-                                    }
-                            except Exception as e:
-                                print(f"Error procesando registro {address}: {e}")
-                                continue
-                    
-                    data[f"device_{generator.device_id}"] = device_data
-                
-                state.last_data = data
-                
-                # Enviar a todos los clientes WebSocket conectados
-                if state.websocket_clients:
-                    message = json.dumps({
-                        "type": "data_update",
-                        "data": data,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    # Crear lista de clientes a remover
-                    clients_to_remove = []
-                    
-                    for websocket in state.websocket_clients:
-                        try:
-                            # Usar asyncio de forma más segura
-                            import asyncio
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            loop.run_until_complete(websocket.send_text(message))
-                            loop.close()
-                        except Exception as ws_error:
-                            print(f"Error enviando a WebSocket: {ws_error}")
-                            clients_to_remove.append(websocket)
-                    
-                    # Remover clientes desconectados
-                    for client in clients_to_remove:
-                        if client in state.websocket_clients:
-                            state.websocket_clients.remove(client)
+            generators = state.server_manager.generators if state.server_manager else None
+            if generators:
+                stream = state.stream
+                if stream is None or stream.generators != generators:
+                    # Flota nueva (o aún inicializándose): todos los clientes se resincronizan
+                    state.stream = FleetStream(generators)
+                    state.stream.update()
+                    state.hub.resync_all()
+                else:
+                    changed = stream.update()
+                    # Encolar solo los cambios, serializados una vez por formato y
+                    # selección; los envíos los hace el escritor de cada cliente,
+                    # sin demorar al recolector
+                    if len(changed) and state.hub:
+                        state.hub.publish_grouped(lambda key: stream.delta_frame(changed, *key))
             
-            time.sleep(2)  # Actualizar cada 2 segundos
+            await asyncio.sleep(2)  # Actualizar cada 2 segundos
             
         except Exception as e:
             print(f"Error en data collector: {e}")
-            time.sleep(5)
+            await asyncio.sleep(5)
+
+@app.get("/api/history")
+async def get_history(device: int, address: int, start: Optional[float] = None,
+                      end: Optional[float] = None, points: int = 500, method: str = "minmax"):
+    """
+    Historial de un registro en una ventana de tiempo (segundos Unix), reducido en el
+    servidor a ``points`` puntos (min/max/promedio por intervalo o LTTB).
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        methods = ", ".join(DOWNSAMPLE_METHODS)
+        raise HTTPException(status_code=400, detail=f"method debe ser uno de: {methods}")
+    if not 3 <= points <= 10000:
+        raise HTTPException(status_code=400, detail="points debe estar entre 3 y 10000")
+
+    generators = state.server_manager.generators if state.server_manager else []
+    generator = next((g for g in generators if g.device_id == device), None)
+    if generator is None or generator.history is None:
+        raise HTTPException(status_code=404, detail=f"Sin historial para el dispositivo {device}")
+    try:
+        times, values = generator.history.series(address, start, end)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Registro {address} no encontrado")
+
+    downsample = downsample_lttb if method == "lttb" else downsample_minmax
+    return {
+        "device": device,
+        "address": address,
+        "method": method,
+        "samples": len(times),
+        **downsample(times, values, points),
+    }
+
+@app.get("/api/store")
+async def get_store(device: int, address: int, start: Optional[float] = None,
+                    end: Optional[float] = None, tier: str = "auto", points: int = 500):
+    """
+    Valores guardados de un registro en una ventana de tiempo (segundos Unix), con
+    mínimo, máximo y promedio por intervalo. ``tier=auto`` usa el nivel más detallado
+    (raw, 1m o 1h) cuya retención cubre la ventana.
+    """
+    if tier != "auto" and tier not in TIER_NAMES:
+        tiers = ", ".join(("auto",) + TIER_NAMES)
+        raise HTTPException(status_code=400, detail=f"tier debe ser uno de: {tiers}")
+    if not 1 <= points <= 10000:
+        raise HTTPException(status_code=400, detail="points debe estar entre 1 y 10000")
+
+    store = state.server_manager.store if state.server_manager else None
+    device_store = store.devices.get(device) if store else None
+    if device_store is None:
+        raise HTTPException(status_code=404, detail=f"Sin almacenamiento para el dispositivo {device}")
+    try:
+        # La lectura de los archivos mapeados puede tocar el disco: fuera del loop
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, device_store.query, address, start, end, tier, points
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Registro {address} no encontrado")
+    return {"device": device, "address": address, **result}
 
 @app.get("/api/data")
 async def get_current_data():
     """Obtener datos actuales del simulador."""
     return {
         "is_running": state.is_running,
-        "data": state.last_data,
+        "data": state.stream.as_dict() if state.stream else {},
         "timestamp": datetime.now().isoformat()
     }
 